@@ -0,0 +1,68 @@
+"""Blackboard.compute_diff latency: difflib over the blob store vs the git backend.
+
+Large files get scattered edits (the case where difflib's SequenceMatcher slows down).
+Usage: python benchmarks/bench_git_diff.py [--files 20] [--lines 50000] [--runs 3]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stratos.core.sandbox import Sandbox
+from stratos.core.pool import Blackboard
+from stratos.core.git_diff import GitDiffBackend
+
+def write_files(root, files, lines, seed, edit_every=0):
+    rng = random.Random(seed)
+    for i in range(files):
+        body = [f"line {n} of file {i}: value = {n * 31 % 997}" for n in range(lines)]
+        if edit_every:
+            for n in range(0, lines, edit_every):
+                body[n + rng.randrange(edit_every)] = f"edited {rng.random():.6f}"
+        with open(os.path.join(root, f"big_{i}.txt"), "w") as f:
+            f.write("\n".join(body) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--edit-every", type=int, default=500, help="One edited line per N lines")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="stratos-diff-")
+    try:
+        write_files(root, args.files, args.lines, seed=0)
+        sandbox = Sandbox(root)
+        before = sandbox.get_snapshot()
+        generation = sandbox.snapshot_index.generation
+        boards = {}
+        for name, backend in (("difflib", None), ("git", GitDiffBackend(root))):
+            board = Blackboard(sandbox, MagicMock())
+            board.diff_backend = backend
+            board.set_baseline(before, generation)
+            boards[name] = board
+
+        write_files(root, args.files, args.lines, seed=1, edit_every=args.edit_every)
+        after = sandbox.get_snapshot()
+        dirty = sandbox.snapshot_index.changed_since(generation)
+        print(f"{args.files} files x {args.lines} lines, 1 edit per {args.edit_every} lines")
+        for name, board in boards.items():
+            best, size = float("inf"), 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                report = board.compute_diff(after, dirty=dirty)
+                best = min(best, time.perf_counter() - start)
+                size = len(report)
+            print(f"{name:<8} {best * 1000:>9.1f}ms  ({size} chars)")
+        boards["git"].diff_backend.close()
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
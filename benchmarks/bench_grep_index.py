@@ -0,0 +1,64 @@
+"""grep_search latency with and without the trigram index on a synthetic repo.
+
+Usage: python benchmarks/bench_grep_index.py [--files 20000] [--runs 5]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stratos.core.sandbox import Sandbox
+
+QUERIES = ["render_widget_42", r"def handler_\d+\(", "(?i)todo: remove", r"class \w+Service"]
+
+def build_repo(root, files):
+    for i in range(files):
+        sub = os.path.join(root, f"src/pkg{i % 200}")
+        os.makedirs(sub, exist_ok=True)
+        body = [f"import module_{i % 97}", f"def handler_{i}(request):", f"    return compute_{i}(request)"]
+        if i % 1000 == 42:
+            body.append("    render_widget_42()  # TODO: remove")
+        if i % 500 == 0:
+            body.append(f"class Item{i}Service:\n    pass")
+        with open(os.path.join(sub, f"mod_{i}.py"), "w") as f:
+            f.write("\n".join(body * 5) + "\n")
+
+def timed(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="stratos-grep-")
+    try:
+        build_repo(root, args.files)
+        plain = Sandbox(root)
+        plain.search_index = None
+        indexed = Sandbox(root)
+        indexed.enable_search_index(os.path.join(root, "..", os.path.basename(root) + "-index.json"))
+        start = time.perf_counter()
+        indexed.grep_search("warmup_query")
+        print(f"Repo: {args.files} files | index build: {time.perf_counter() - start:.2f}s")
+        print(f"{'query':<24} {'no index':>10} {'indexed':>10}")
+        for q in QUERIES:
+            t_plain = timed(lambda: plain.grep_search(q), args.runs)
+            t_index = timed(lambda: indexed.grep_search(q), args.runs)
+            print(f"{q:<24} {t_plain * 1000:>8.1f}ms {t_index * 1000:>8.1f}ms")
+    finally:
+        shutil.rmtree(root)
+        try: os.remove(root + "-index.json")
+        except OSError: pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""AIPool setup time and HTTP connection pools: per-agent clients vs the shared registries.
+
+"before" replays the old behavior: one genai.Client per agent,
+and FunctionDeclarations built twice per agent (in AIAgent.__init__, then again by the
+pool after injecting its tools). "after" uses CLIENTS and TOOLS.
+Each genai.Client owns a sync and an async connection pool. With --live (needs
+GEMINI_API_KEY) every agent makes one small request and the idle keep-alive
+connections left in the sync pools are counted.
+
+Usage: python benchmarks/bench_pool_setup.py [--specialists 5] [--runs 3] [--live]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stratos.core import agent as agent_module
+from stratos.core.clients import ClientRegistry
+from stratos.core.pool import AIPool
+from stratos.core.prompt_cache import PromptCacheManager
+from stratos.core.sandbox import Sandbox
+from stratos.core.tools import ToolRegistry
+
+class UnsharedClients(ClientRegistry):
+    def get(self, api_key):
+        return self.factory(api_key)
+
+    def prompt_cache(self, api_key, logger=None):
+        return PromptCacheManager(self.get(api_key), logger=logger)
+
+class UnsharedTools:
+    def tools(self, tool_map):
+        ToolRegistry().tools(tool_map) # The declarations the pool used to rebuild
+        return ToolRegistry().tools(tool_map)
+
+    def __getattr__(self, name):
+        return getattr(ToolRegistry(), name)
+
+def build(api_key, specialists):
+    root = tempfile.mkdtemp(prefix="stratos-setup-")
+    try:
+        started = time.perf_counter()
+        pool = AIPool(Sandbox(os.path.join(root, "project")), MagicMock(prompt_input=""), api_key, {"name": "bench", "desc": "bench"})
+        pool.setup_default_pool()
+        for n in range(specialists):
+            pool.request_specialist(role_name=f"EXPERT{n}", role_description="Specialist")
+        elapsed = time.perf_counter() - started
+        agents = pool._all_agents()
+        pool.archiver.close()
+        return elapsed, agents
+    finally:
+        shutil.rmtree(root)
+
+def idle_connections(clients):
+    total = 0
+    for client in clients:
+        pool = getattr(getattr(getattr(client._api_client, "_httpx_client", None), "_transport", None), "_pool", None)
+        total += len(pool.connections) if pool is not None else 0
+    return total
+
+def run(label, api_key, args):
+    times = []
+    for _ in range(args.runs):
+        elapsed, agents = build(api_key, args.specialists)
+        times.append(elapsed)
+    clients = {id(a.client): a.client for a in agents}.values()
+    line = (f"{label}: setup {min(times) * 1000:.0f} ms for {len(agents)} agents, "
+            f"{len(clients)} clients ({2 * len(clients)} connection pools), "
+            f"{len({id(a.tools) for a in agents})} declaration lists")
+    if args.live:
+        for a in agents:
+            a.client.models.get(model=a.model_id)
+        line += f", {idle_connections(clients)} idle connections"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--specialists", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+    api_key = os.environ.get("GEMINI_API_KEY") if args.live else "offline-key"
+    if not api_key:
+        sys.exit("--live needs GEMINI_API_KEY")
+
+    with patch.object(agent_module, "CLIENTS", UnsharedClients()), patch.object(agent_module, "TOOLS", UnsharedTools()):
+        run("before", api_key, args)
+    run("after ", api_key, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Peak RSS of workspace snapshots: full-text dicts (legacy) vs. blob-store digests.
+
+Usage: python benchmarks/bench_snapshot_memory.py [--files 5000] [--size 8192]
+
+Each mode runs in its own interpreter so ru_maxrss is not polluted by the other.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+def build_workspace(root, files, size):
+    for i in range(files):
+        sub = os.path.join(root, f"pkg{i % 50}")
+        os.makedirs(sub, exist_ok=True)
+        line = f"value_{i} = compute({i}, 'payload')  # generated line\n"
+        with open(os.path.join(sub, f"module_{i}.py"), "w") as f:
+            f.write(line * max(1, size // len(line)))
+
+def legacy_snapshot(root):
+    """The pre-index Sandbox.get_snapshot: every file read into a str."""
+    from pathlib import Path
+    snap = {}
+    for p in Path(root).rglob("*"):
+        if p.is_file() and ".git" not in p.parts:
+            try: snap[str(p.relative_to(root))] = p.read_text(encoding="utf-8")
+            except Exception: pass
+    return snap
+
+def run_mode(mode, root):
+    if mode == "legacy":
+        # Blackboard.last_snapshot + the fresh get_snapshot() held side by side
+        last = legacy_snapshot(root)
+        current = legacy_snapshot(root)
+        count = len(last) + len(current)
+    else:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from stratos.core.snapshot import SnapshotIndex
+        index = SnapshotIndex(root)
+        index.refresh()
+        last = index.snapshot()
+        index.refresh()
+        current = index.snapshot()
+        count = len(last) + len(current)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode}:{count}:{peak_kb}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=8192, help="Approximate bytes per file")
+    parser.add_argument("--mode", choices=["legacy", "blobs"], help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.root)
+        return
+
+    root = tempfile.mkdtemp(prefix="stratos-bench-")
+    try:
+        build_workspace(root, args.files, args.size)
+        print(f"Workspace: {args.files} files x ~{args.size} bytes")
+        for mode in ("legacy", "blobs"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--root", root],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            _, _, peak_kb = out.split(":")
+            print(f"  {mode:<7} peak RSS: {int(peak_kb) / 1024:8.1f} MB")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
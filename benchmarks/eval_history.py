@@ -0,0 +1,85 @@
+"""Input tokens of a think_and_act session with and without HistoryManager pruning.
+
+Sessions are the agent histories checkpointed in mission.sqlite3 files (see --resume),
+or JSON files holding a list of messages (types.Content dumps). Each model turn is
+replayed: without pruning it pays for every earlier message, with pruning the history is
+pruned before the turn as AIAgent does. Without arguments a synthetic session is used.
+Token counts use the default 4 chars/token estimate.
+
+Usage: python benchmarks/eval_history.py [mission.sqlite3 | session.json ...] [--keep 4] [--max-tokens 120000]
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from google.genai import types
+from stratos.core.context_budget import TokenEstimator
+from stratos.core.history import HistoryManager, messages_chars
+
+def load_sessions(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return {os.path.basename(path): json.load(f)}
+    db = sqlite3.connect(path)
+    try:
+        return {f"{os.path.basename(path)}:{name}": json.loads(state).get("history", [])
+                for name, state in db.execute("SELECT name, state FROM agents")}
+    finally:
+        db.close()
+
+def synthetic_session(turns=20):
+    messages = [{"role": "user", "parts": [{"text": "STATE:\n" + "context line\n" * 800 + "\nTASK: refactor the billing module"}]}]
+    for n in range(turns):
+        name, args, result = [
+            ("read_file", {"path": f"app/module_{n}.py"}, f"# module {n}\n" + "def handler(request):\n    return request\n" * 300),
+            ("grep_search", {"pattern": f"handler_{n}"}, "\n".join(f"app/module_{i}.py:{i}: handler_{n}()" for i in range(150))),
+            ("execute_command", {"command": "pytest -q"}, "." * 60 + "\n" + "FAILED tests/test_x.py::test_y - AssertionError\n" * 40),
+            ("write_file", {"path": f"app/module_{n}.py", "content": "x = 1\n" * 50}, "SUCCESS: File written."),
+        ][n % 4]
+        messages.append({"role": "model", "parts": [{"function_call": {"name": name, "args": args}}]})
+        messages.append({"role": "user", "parts": [{"function_response": {"name": name, "response": {"result": result}}}]})
+    return {"synthetic": messages}
+
+def replay(history, keep, max_tokens):
+    messages = [types.Content.model_validate(m) for m in history]
+    estimator = TokenEstimator()
+    manager = HistoryManager(keep_results=keep, max_tokens=max_tokens, estimator=estimator)
+    full = pruned = 0
+    sent = []
+    for message in messages:
+        if message.role == "model": # A model turn: the input is everything before it
+            full += math.ceil(messages_chars(messages[:len(sent)]) / estimator.ratio())
+            manager.prune(sent)
+            pruned += math.ceil(messages_chars(sent) / estimator.ratio())
+        sent.append(message)
+    return full, pruned, manager.elided
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sessions", nargs="*")
+    parser.add_argument("--keep", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=120_000)
+    args = parser.parse_args()
+
+    sessions = {}
+    for path in args.sessions:
+        sessions.update(load_sessions(path))
+    if not sessions:
+        sessions = synthetic_session()
+    total_full = total_pruned = 0
+    for name, history in sessions.items():
+        if not history:
+            continue
+        full, pruned, elided = replay(history, args.keep, args.max_tokens)
+        total_full += full
+        total_pruned += pruned
+        print(f"{name}: {full} -> {pruned} input tokens ({elided} results elided)")
+    if total_full:
+        print(f"TOTAL: {total_full} -> {total_pruned} input tokens ({100 * (1 - total_pruned / total_full):.1f}% saved)")
+
+if __name__ == "__main__":
+    main()
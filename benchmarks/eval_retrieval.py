@@ -0,0 +1,107 @@
+"""Turns-to-completion with and without BM25 retrieval on recorded missions.
+
+A mission file is JSON: {"name": ..., "root": <workspace dir>, "steps": [
+    {"task": ..., "todo": ..., "reads": [files the agent opened], "turns": <turns it took>}]}
+"reads"/"turns" come from a run without retrieval (the read_file/grep targets in the session log).
+
+Offline (default): every recorded read whose file is in the retrieved chunks is a turn the
+agent no longer needs; reports read coverage and projected turns. Without mission files a
+synthetic mission is generated.
+--live: replays each step with a real agent (needs GEMINI_API_KEY) on a copy of the workspace,
+once with retrieval off and once on, and compares AIAgent.last_turns.
+
+Usage: python benchmarks/eval_retrieval.py [mission.json ...] [--k 6] [--live]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stratos.core.sandbox import Sandbox
+from stratos.core.pool import Blackboard
+
+def synthetic_mission(root):
+    topics = ["auth", "billing", "search", "export", "email", "cache", "upload", "report"]
+    for t in topics:
+        os.makedirs(os.path.join(root, "app", t), exist_ok=True)
+        with open(os.path.join(root, "app", t, "service.py"), "w") as f:
+            f.write(f"class {t.title()}Service:\n" + "".join(
+                f"    def {t}_step_{i}(self, request):\n        return self.repo.{t}_query_{i}(request)\n\n" for i in range(30)))
+        with open(os.path.join(root, "app", t, "routes.py"), "w") as f:
+            f.write(f"from .service import {t.title()}Service\n\n" + "".join(
+                f"@route('/{t}/{i}')\ndef {t}_view_{i}(request):\n    return {t.title()}Service().{t}_step_{i}(request)\n\n" for i in range(20)))
+    steps = [{"task": f"Fix the {t} flow: {t}_step_7 returns stale data", "todo": f"1. Patch {t.title()}Service",
+              "reads": [f"app/{t}/service.py", f"app/{t}/routes.py"], "turns": 6} for t in topics]
+    return {"name": "synthetic", "root": root, "steps": steps}
+
+def offline(mission, k):
+    sandbox = Sandbox(mission["root"])
+    sandbox.chunk_index.sync(sandbox.get_snapshot(), sandbox.blob_store)
+    covered_reads = total_reads = turns = projected = 0
+    for step in mission["steps"]:
+        hits = sandbox.chunk_index.search(f"{step['task']}\n{step.get('todo', '')}", k)
+        files = {chunk.path.replace(os.sep, "/") for _, chunk in hits}
+        reads = set(step.get("reads", []))
+        covered = len(reads & files)
+        covered_reads += covered
+        total_reads += len(reads)
+        turns += step.get("turns", 0)
+        projected += max(1, step.get("turns", 0) - covered)
+    print(f"{mission['name']}: {len(mission['steps'])} steps, reads covered {covered_reads}/{total_reads}, "
+          f"turns {turns} -> ~{projected} with retrieval (k={k})")
+
+def live(mission, k):
+    from stratos.core.agent import AIAgent
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        sys.exit("--live needs GEMINI_API_KEY")
+    totals = {}
+    for label, top_k in (("without", 0), ("with", k)):
+        work = tempfile.mkdtemp(prefix="stratos-eval-")
+        try:
+            shutil.copytree(mission["root"], work, dirs_exist_ok=True)
+            sandbox = Sandbox(work)
+            sandbox.auto_approve = True
+            logger = MagicMock(show_results=False)
+            board = Blackboard(sandbox, logger)
+            board.retrieval_k = top_k
+            agent = AIAgent("AGENT_CODER", "IMPLEMENTATION_ENGINEER", sandbox, logger, api_key,
+                            {"name": mission["name"], "desc": "recorded mission replay"})
+            totals[label] = 0
+            for step in mission["steps"]:
+                board.post("TODO_LIST", step.get("todo", ""))
+                agent.think_and_act(step["task"], context=board.get_all_context(agent=agent, task=step["task"]))
+                totals[label] += agent.last_turns
+        finally:
+            shutil.rmtree(work)
+    print(f"{mission['name']}: turns without retrieval {totals['without']}, with retrieval {totals['with']} (k={k})")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("missions", nargs="*")
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.missions:
+        missions = []
+        for path in args.missions:
+            with open(path) as f:
+                missions.append(json.load(f))
+    else:
+        scratch = tempfile.mkdtemp(prefix="stratos-eval-")
+        missions = [synthetic_mission(scratch)]
+    try:
+        for mission in missions:
+            (live if args.live else offline)(mission, args.k)
+    finally:
+        if scratch:
+            shutil.rmtree(scratch)
+
+if __name__ == "__main__":
+    main()
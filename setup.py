@@ -24,7 +24,7 @@ setup(
     author=meta.get("author", ""),
     author_email=meta.get("author_email", ""),
     url=meta.get("url", ""),
-    packages=find_packages(exclude=["tests*", "docs*"]),
+    packages=find_packages(exclude=["tests*", "docs*", "benchmarks*"]),
     include_package_data=True,
     package_data={
         "stratos": ["assets/*"],
@@ -37,7 +37,8 @@ setup(
         "readchar",
         "google-auth-oauthlib",
         "google-auth-httplib2",
-        "duckduckgo-search"
+        "duckduckgo-search",
+        "tomli; python_version < '3.11'"
     ],
     entry_points={
         "console_scripts": [
@@ -11,7 +11,9 @@ def parse_arguments():
         epilog="""Examples:
   stratos
   stratos -p MyProject -d 'Create a snake game'
-  stratos --debug"""
+  stratos --debug
+  stratos --resume MyProject
+  stratos cache stats"""
     )
     
     parser.add_argument("-v", "--version", action="version", version=f"Stratos CLI v{__version__}")
@@ -20,6 +22,7 @@ def parse_arguments():
     parser.add_argument("-p", "--project", metavar="NAME", help="Directly launch a specific project by name")
     parser.add_argument("-d", "--desc", metavar="TEXT", help="Description for the project (requires -p)")
     parser.add_argument("--quick", action="store_true", help="Quick launch MVP mode (equivalent to -p *)")
+    parser.add_argument("--resume", metavar="NAME", help="Continue an interrupted mission from its last completed phase")
     
     # Configuration Overrides
     parser.add_argument("--debug", action="store_true", help="Enable debug mode logging")
@@ -30,8 +33,30 @@ def parse_arguments():
     # Advanced
     parser.add_argument("--api-key", metavar="KEY", help="Override Gemini API Key for this session")
 
+    # Maintenance subcommands
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    cache_parser = subparsers.add_parser("cache", help="Inspect or clear the web search cache")
+    cache_parser.add_argument("action", choices=["stats", "clear"], help="'stats' to show usage, 'clear' to empty it")
+
     return parser.parse_args()
 
+def run_cache_command(action):
+    from stratos.core.search_cache import SearchCache
+    from stratos.utils.config import SEARCH_CACHE_FILE
+    config = load_config()
+    cache = SearchCache(SEARCH_CACHE_FILE, ttl=config.get("search_cache_ttl", 86400))
+    if action == "clear":
+        print(f"Search cache cleared ({cache.clear()} entries removed).")
+    else:
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        hit_rate = (stats["hits"] + stats["coalesced"]) / lookups * 100 if lookups else 0
+        print(f"Search cache: {SEARCH_CACHE_FILE}")
+        print(f"  Entries   : {stats['entries']} ({stats['fresh']} fresh, {stats['expired']} expired, TTL {stats['ttl']}s)")
+        print(f"  Lookups   : {lookups} ({stats['hits']} hits, {stats['coalesced']} coalesced, {stats['misses']} misses, {hit_rate:.0f}% served from cache)")
+        print(f"  Disk size : {stats['size_bytes'] / 1024:.1f} KB")
+    cache.close()
+
 def main_entry():
     args = parse_arguments()
     
@@ -41,9 +66,17 @@ def main_entry():
         save_config(DEFAULT_CONFIG)
         print("Configuration reset to defaults.")
         sys.exit(0)
+
+    if args.command == "cache":
+        run_cache_command(args.action)
+        sys.exit(0)
         
     try:
-        main(args)
+        if args.resume:
+            from stratos.core.engine import run_stratos
+            run_stratos(args.resume, resume=True)
+        else:
+            main(args)
     except KeyboardInterrupt:
         print("\n\n  › STRATOS | User interruption. Closing...")
         sys.exit(0)
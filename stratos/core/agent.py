@@ -1,28 +1,46 @@
-from google import genai
 from google.genai import types
 import os
 import platform
 import datetime
-import json
-import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from .context_budget import ESTIMATOR
+from .history import HistoryManager
+from .runtime import RUNTIME
+from .clients import CLIENTS
+from .tools import TOOLS, TOOL_SCHEMAS, DEFAULT_SCHEMA
 
 load_dotenv()
 
+# Tools without side effects or approval prompts: consecutive calls in one turn run concurrently
+READ_ONLY_TOOLS = frozenset({
+    "read_file", "file_info", "glob_search", "grep_search", "get_structure_tree",
+    "search_web", "web_fetch", "get_full_diff",
+})
+MAX_PARALLEL_TOOLS = 6
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOLS, thread_name_prefix="stratos-tool") # Shared by all agents
+
 class AIAgent:
-    def __init__(self, name, role, sandbox, logger, api_key, project_info, pool_callback=None, model_id='gemini-2.5-flash'):
+    def __init__(self, name, role, sandbox, logger, api_key, project_info, pool_callback=None, model_id='gemini-2.5-flash', extra_tools=None):
         self.name = name
+        self.seen_generation = None # Blackboard generation of this agent's last turn
         self.role = role
         self.sandbox = sandbox
         self.logger = logger
         self.project_name = project_info['name']
         self.project_desc = project_info['desc']
-        self.client = genai.Client(api_key=api_key)
+        self.client = CLIENTS.get(api_key) # Shared HTTP connection pools
         self.model_id = model_id
         self.pool_callback = pool_callback
         
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.cached_input_tokens = 0 # Part of total_input_tokens served from the prompt cache
+        self.prompt_cache = CLIENTS.prompt_cache(api_key, logger) # One cache per model for the whole team
+        self.history_manager = HistoryManager()
+        self.last_turns = 0 # Model turns used by the last think_and_act (see benchmarks/eval_retrieval.py)
+        self.history = [] # Messages of the current (or last) task; every task starts a fresh one
 
         # --- MANDATORY VALIDATION WRAPPERS ---
         
@@ -39,52 +57,50 @@ class AIAgent:
             self.logger.stop_prompt()
             return res
 
-        def exec_wrapper(command):
-            """Unified wrapper for ALL system commands to force human validation."""
-            self.logger.debug(f"[AGENT-REQUEST] {self.name} wants to run: {command}")
+        def approve(command, request, allow_label, deny_label):
+            """Checks the approval policy; only 'ask' decisions reach the human. Returns (allowed, order/reason or the allowing rule, by_policy)."""
+            decision = self.sandbox.check_command_policy(self.name, command)
+            if decision.decision == "allow":
+                return True, decision.rule, True
+            if decision.decision == "deny":
+                return False, f"{decision.rule}: {decision.reason}", True
             details = {"command": command, "dir": str(self.sandbox.root_dir)}
             options = [
-                {"label": "Allow Execution", "value": "y"},
-                {"label": "Deny Execution", "value": "n"},
+                {"label": allow_label, "value": "y"},
+                {"label": deny_label, "value": "n"},
                 {"label": "Provide Specific Order", "value": "o", "require_text": True}
             ]
-            self.logger.start_prompt(self.name, "Requesting command execution", details=details, options=options)
+            self.logger.start_prompt(self.name, request, details=details, options=options)
             allowed, result = self.sandbox.request_command_approval(self.name, command)
             self.logger.stop_prompt()
+            return allowed, result, False
+
+        def exec_wrapper(command):
+            """Unified wrapper for ALL system commands to enforce the approval policy / human validation."""
+            self.logger.debug(f"[AGENT-REQUEST] {self.name} wants to run: {command}")
+            allowed, result, by_policy = approve(command, "Requesting command execution", "Allow Execution", "Deny Execution")
             
             if allowed:
-                self.logger.debug(f"[USER-APPROVED] Command: {command}")
-                return self.sandbox.execute_command(command)
+                self.logger.debug(f"[{'POLICY' if by_policy else 'USER'}-APPROVED] Command: {command}")
+                # Auto-allowed read-only commands never run in the persistent shell, whose state an approved command may have rigged
+                return self.sandbox.execute_command(command, isolated=by_policy and result == "read_only")
+            elif by_policy:
+                self.logger.debug(f"[POLICY-DENIED] Reason: {result}")
+                return f"POLICY_DENIED: Execution blocked by the approval policy ({result}). Use another approach."
             else:
                 self.logger.debug(f"[USER-DENIED] Reason: {result}")
                 return f"USER_DENIED: Execution blocked by human. Order/Reason: {result}"
 
         def git_init_wrapper():
-            cmd = "git init"
-            details = {"command": cmd, "dir": str(self.sandbox.root_dir)}
-            options = [
-                {"label": "Allow Git Init", "value": "y"},
-                {"label": "Deny Git Init", "value": "n"},
-                {"label": "Provide Specific Order", "value": "o", "require_text": True}
-            ]
-            self.logger.start_prompt(self.name, "Requesting git initialization", details=details, options=options)
-            allowed, _ = self.sandbox.request_command_approval(self.name, cmd)
-            self.logger.stop_prompt()
+            allowed, result, by_policy = approve("git init", "Requesting git initialization", "Allow Git Init", "Deny Git Init")
             if allowed: return self.sandbox.git_init()
+            elif by_policy: return f"POLICY_DENIED: Git init blocked by the approval policy ({result})."
             else: return "USER_DENIED: Git init cancelled."
 
         def install_deps_wrapper():
-            cmd = "pip install -r requirements.txt"
-            details = {"command": cmd, "dir": str(self.sandbox.root_dir)}
-            options = [
-                {"label": "Allow Installation", "value": "y"},
-                {"label": "Deny Installation", "value": "n"},
-                {"label": "Provide Specific Order", "value": "o", "require_text": True}
-            ]
-            self.logger.start_prompt(self.name, "Requesting dependency installation", details=details, options=options)
-            allowed, _ = self.sandbox.request_command_approval(self.name, cmd)
-            self.logger.stop_prompt()
+            allowed, result, by_policy = approve("pip install -r requirements.txt", "Requesting dependency installation", "Allow Installation", "Deny Installation")
             if allowed: return self.sandbox.install_dependencies()
+            elif by_policy: return f"POLICY_DENIED: Installation blocked by the approval policy ({result})."
             else: return "USER_DENIED: Installation cancelled."
 
         def report_status_wrapper(message):
@@ -95,6 +111,7 @@ class AIAgent:
         self.tool_map = {
             "write_file": self.sandbox.write_file,
             "read_file": self.sandbox.read_file,
+            "file_info": self.sandbox.file_info,
             "smart_replace": self.sandbox.smart_replace,
             "glob_search": self.sandbox.glob_search,
             "grep_search": self.sandbox.grep_search,
@@ -113,33 +130,13 @@ class AIAgent:
         
         if self.pool_callback:
             self.tool_map["request_specialist"] = self.pool_callback
+        if extra_tools:
+            self.tool_map.update(extra_tools) # Pool-provided tools (shared TODO list, full diffs)
 
-        self.tools = []
-        for tool_name, func in self.tool_map.items():
-            self.tools.append(types.FunctionDeclaration(
-                name=tool_name,
-                description=func.__doc__ or "Execute action",
-                parameters=self._get_tool_schema(tool_name)
-            ))
+        self.tools = TOOLS.tools(self.tool_map) # Shared with every agent having the same tools
 
     def _get_tool_schema(self, name):
-        schemas = {
-            "write_file": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "content": {"type": "STRING"}}, "required": ["path", "content"]},
-            "read_file": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "start_line": {"type": "INTEGER"}, "end_line": {"type": "INTEGER"}}, "required": ["path"]},
-            "smart_replace": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "old_text": {"type": "STRING"}, "new_text": {"type": "STRING"}}, "required": ["path", "old_text", "new_text"]},
-            "execute_command": {"type": "OBJECT", "properties": {"command": {"type": "STRING"}}, "required": ["command"]},
-            "grep_search": {"type": "OBJECT", "properties": {"pattern": {"type": "STRING"}, "path": {"type": "STRING"}}, "required": ["pattern"]},
-            "glob_search": {"type": "OBJECT", "properties": {"pattern": {"type": "STRING"}}, "required": ["pattern"]},
-            "search_web": {"type": "OBJECT", "properties": {"query": {"type": "STRING"}}, "required": ["query"]},
-            "web_fetch": {"type": "OBJECT", "properties": {"url": {"type": "STRING"}}, "required": ["url"]},
-            "ask_user": {"type": "OBJECT", "properties": {"question": {"type": "STRING"}}, "required": ["question"]},
-            "request_confirmation": {"type": "OBJECT", "properties": {"action": {"type": "STRING"}}, "required": ["action"]},
-            "git_commit": {"type": "OBJECT", "properties": {"message": {"type": "STRING"}}, "required": ["message"]},
-            "update_todo_list": {"type": "OBJECT", "properties": {"todo_content": {"type": "STRING"}}, "required": ["todo_content"]},
-            "report_status": {"type": "OBJECT", "properties": {"message": {"type": "STRING"}}, "required": ["message"]},
-            "request_specialist": {"type": "OBJECT", "properties": {"role_name": {"type": "STRING"}, "role_description": {"type": "STRING"}, "weight": {"type": "STRING", "enum": ["HEAVY", "MEDIUM", "LIGHT"]}}, "required": ["role_name", "role_description"]}
-        }
-        return schemas.get(name, {"type": "OBJECT", "properties": {}})
+        return TOOL_SCHEMAS.get(name, DEFAULT_SCHEMA)
 
     def _get_global_prompt(self):
         return (
@@ -154,14 +151,15 @@ class AIAgent:
             "CRITICAL RULES:\n"
             "1. NO SUBDIRECTORIES FOR PROJECT: DO NOT create a new folder named after the project. You are already in the project folder. Create files directly in the current root or appropriate subfolders (src, data, etc.).\n"
             "2. FULL FUNCTIONALITY: The deliverable must be fully functional. No placeholders, no 'insert code here'. The app must run immediately after installation.\n"
-            "3. BASH_COMMANDS: Every 'execute_command' call WILL REQUIRE human approval. No exceptions. Chain commands with '&&' sparingly; prefer sequential calls for better error handling.\n"
+            "3. BASH_COMMANDS: Every 'execute_command' call goes through the user's approval policy: read-only commands on project files usually run immediately (in a fresh shell at your current directory), others may wait for human approval or be denied (POLICY_DENIED). Chain commands with '&&' sparingly; prefer sequential calls for better error handling. The shell is persistent: 'cd', 'export' and 'source .venv/bin/activate' carry over to your next commands, so do not repeat them.\n"
             "4. NO ECHO COMMANDS: DO NOT use `execute_command('echo ...')` to log progress. Use the dedicated tool `report_status('message')` instead. This prevents unnecessary security prompts.\n"
             "5. FILE EDITS: When using 'smart_replace', ensure unique context. Prefer 'write_file' for creating new files. Read a file before editing it to ensure you have the correct context.\n"
-            "6. FILE SEARCHING: Use 'glob_search' to find files by pattern (e.g., '**/*.py') and 'grep_search' to find code content. Use 'get_structure_tree' to understand project layout.\n"
+            "6. FILE SEARCHING: Use 'glob_search' to find files by pattern (e.g., '**/*.py') and 'grep_search' to find code content. Use 'get_structure_tree' to understand project layout. For large files, call 'file_info' for the line count and page with read_file(start_line, end_line).\n"
             "7. DEPENDENCIES: Use 'install_dependencies' to install packages from requirements.txt. Use 'web_fetch' to retrieve external documentation if needed. Use 'search_web' to find documentation or solutions to errors.\n\n"
             "TEAM_STUCTURE & SYNC:\n"
             "1. FOLLOW_THE_LEADER: Follow the PROJECT_MANAGER roadmap and the TODO_LIST.\n"
-            "2. UPDATE_TODO: Use 'update_todo_list' when progress is made.\n\n"
+            "2. UPDATE_TODO: Use 'update_todo_list' when progress is made.\n"
+            "3. RECENT_CHANGES: Large, generated and lock files are summarized as '+N/-M' lines. Call 'get_full_diff' with the report's handle only when you need those hunks.\n\n"
             "DEVELOPMENT_PHILOSOPHY: EFFICIENCY_AND_SIMPLICITY\n"
             "1. MINIMAL_VIABLE_APPROACH: Prioritize single-file solutions if possible, but ensure completeness.\n"
             "2. ERROR RECOVERY: If a tool fails, DO NOT request the user to fix it. Attempt to debug it yourself using 'grep_search' or 'read_file'.\n"
@@ -173,24 +171,40 @@ class AIAgent:
         return f"=== AGENT_PROFILE ===\nID: {self.name} | ROLE: {self.role}\n======================\n"
 
     def think_and_act(self, task, context=""):
+        """Blocking facade over athink_and_act (runs on the shared event loop)."""
+        return RUNTIME.run(self.athink_and_act(task, context))
+
+    async def athink_and_act(self, task, context=""):
         self.logger.log(self.name, f"TASK: {task[:50]}...", style="agent")
-        messages = [types.Content(role="user", parts=[types.Part(text=f"{self._get_global_prompt()}\n{self._get_personalized_prompt()}\nSTATE:\n{context}\n\nTASK: {task}")])]
+        system_instruction = self._get_global_prompt() # Same for every agent: sent once per cache, not per turn
+        prompt = f"{self._get_personalized_prompt()}STATE:\n{context}\n\nTASK: {task}" # The profile stays out of the shared prefix
+        messages = self.history = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+        reserved = ESTIMATOR.estimate(system_instruction, self.model_id) + int(self._declarations_chars() / ESTIMATOR.ratio(self.model_id))
         
         turns = 0
         while turns < 25:
-            self.logger.wait_if_paused() # CHECK BEFORE EACH TURN
+            await asyncio.to_thread(self.logger.wait_if_paused) # CHECK BEFORE EACH TURN
             turns += 1
+            self.last_turns = turns
+            saved = self.history_manager.prune(messages, self.model_id, reserved)
+            if saved: self.logger.debug(f"HISTORY_PRUNED {self.name}: {saved} chars of old tool results elided")
             full_response = None
             retry_count = 0
+            cache = None
             while retry_count < 3:
                 try:
-                    self.logger.wait_if_paused() # CHECK BEFORE API CALL
-                    stream = self.client.models.generate_content_stream(model=self.model_id, contents=messages, config=types.GenerateContentConfig(tools=[types.Tool(function_declarations=self.tools)]))
+                    await asyncio.to_thread(self.logger.wait_if_paused) # CHECK BEFORE API CALL
+                    cache = await asyncio.to_thread(self.prompt_cache.get, self.model_id, system_instruction, self.tools)
+                    if cache:
+                        config = types.GenerateContentConfig(cached_content=cache)
+                    else:
+                        config = types.GenerateContentConfig(system_instruction=system_instruction, tools=[TOOLS.as_tool(self.tools)])
+                    stream = await self.client.aio.models.generate_content_stream(model=self.model_id, contents=messages, config=config)
                     full_text = ""
                     accumulated_parts = []
                     last_usage = None
                     
-                    for chunk in stream:
+                    async for chunk in stream:
                         if hasattr(chunk, 'usage_metadata') and chunk.usage_metadata:
                             last_usage = chunk.usage_metadata
                             
@@ -210,15 +224,24 @@ class AIAgent:
                     if last_usage:
                         self.total_input_tokens += last_usage.prompt_token_count
                         self.total_output_tokens += last_usage.candidates_token_count
+                        self.cached_input_tokens += last_usage.cached_content_token_count or 0
+                        if turns == 1: # Only the first prompt is plain text, the calibration sample of the estimator
+                            ESTIMATOR.observe(self.model_id, len(system_instruction) + len(prompt) + self._declarations_chars(), last_usage.prompt_token_count)
                         
                     full_response = True
                     break
                 except Exception as e:
+                        if cache and "cache" in str(e).lower():
+                            # Expired or deleted server-side: forget it, the retry sends the prefix inline or recreates it
+                            self.prompt_cache.invalidate(cache)
+                            cache = None
+                            retry_count += 1
+                            continue
                         retry_count += 1
                         if any(x in str(e).lower() for x in ["429", "quota", "overloaded"]):
                             backoff = 2 ** retry_count
                             self.logger.warning(f"API Rate limit hit. Retrying in {backoff}s...")
-                            time.sleep(backoff)
+                            await asyncio.sleep(backoff)
                         else: return f"ERROR: {str(e)}"
 
             if not full_response: return "ERROR: API_UNAVAILABLE"
@@ -230,18 +253,14 @@ class AIAgent:
             function_calls = [part.function_call for part in model_content.parts if part.function_call]
             if not function_calls: return full_text or "DONE"
 
-            tool_responses = []
             for fc in function_calls:
                 args = fc.args or {}
                 target = args.get("path") or args.get("command") or args.get("url") or ""
                 if len(target) > 50: target = target[:47] + "..."
                 self.logger.log(self.name, f"{fc.name} ({target})", style="exec")
-                
-                if fc.name in self.tool_map:
-                    try: res = self.tool_map[fc.name](**args)
-                    except Exception as e: res = f"ERROR: {str(e)}"
-                else: res = "ERROR: Unknown tool"
-                
+
+            tool_responses = []
+            for fc, res in zip(function_calls, await self._run_tools(function_calls)):
                 if self.logger.show_results:
                     res_preview = str(res)
                     if len(res_preview) > 100: res_preview = res_preview[:97] + "..."
@@ -251,5 +270,60 @@ class AIAgent:
             messages.append(types.Content(role="user", parts=tool_responses))
         return "ERROR: MAX_TURNS_REACHED"
 
+    def _call_tool(self, fc):
+        if fc.name not in self.tool_map: return "ERROR: Unknown tool"
+        try: return self.tool_map[fc.name](**(fc.args or {}))
+        except Exception as e: return f"ERROR: {str(e)}"
+
+    async def _run_tools(self, function_calls):
+        """Results in call order. Consecutive read-only calls run concurrently; any other call is a barrier.
+
+        Tools are synchronous: they run in executor threads so the event loop keeps serving other agents.
+        """
+        loop = asyncio.get_running_loop()
+        results = [None] * len(function_calls)
+        batch = []
+        async def flush():
+            done = await asyncio.gather(*(loop.run_in_executor(TOOL_EXECUTOR, self._call_tool, function_calls[i]) for i in batch))
+            for i, res in zip(batch, done): results[i] = res
+            batch.clear()
+
+        for i, fc in enumerate(function_calls):
+            if fc.name in READ_ONLY_TOOLS:
+                batch.append(i)
+                continue
+            await flush() # Mutating and approval-gated calls see the effects of everything before them
+            results[i] = await loop.run_in_executor(None, self._call_tool, fc)
+        await flush()
+        return results
+
+    def export_state(self) -> dict:
+        """JSON-able state for mission checkpoints.
+
+        Checkpoints are taken between actions and each action starts a fresh history,
+        so the messages are not saved: only the token counters carry over.
+        """
+        return {
+            "total_input_tokens": self.total_input_tokens,
+            "total_output_tokens": self.total_output_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+        }
+
+    def restore_state(self, state):
+        self.total_input_tokens = state.get("total_input_tokens", 0)
+        self.total_output_tokens = state.get("total_output_tokens", 0)
+        self.cached_input_tokens = state.get("cached_input_tokens", 0)
+
+    def _declarations_chars(self):
+        return len(TOOLS.fingerprint(self.tools))
+
+    def token_stats(self) -> dict:
+        """Input tokens split into cached and uncached, plus output tokens."""
+        return {"cached_input": self.cached_input_tokens,
+                "uncached_input": self.total_input_tokens - self.cached_input_tokens,
+                "output": self.total_output_tokens}
+
     def get_costs(self):
-        return ((self.total_input_tokens / 1_000_000) * 0.10) + ((self.total_output_tokens / 1_000_000) * 0.40)
+        # Cached input tokens are billed at a quarter of the regular input rate
+        uncached = self.total_input_tokens - self.cached_input_tokens
+        return ((uncached / 1_000_000) * 0.10) + ((self.cached_input_tokens / 1_000_000) * 0.025) + ((self.total_output_tokens / 1_000_000) * 0.40)
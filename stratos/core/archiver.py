@@ -0,0 +1,109 @@
+import threading
+
+KEEP_LOGS = 8             # Team log entries left verbatim (what get_all_context shows)
+FOLD_BATCH = 8            # Entries that must pile up beyond KEEP_LOGS before a fold
+MAX_ARCHIVE_CHARS = 6000  # Size the archive is held to, whatever the mission length
+ARCHIVED_KEYS = ("MASTER_PLAN", "DETAILED_SPECS") # Blackboard keys whose old versions are archived
+
+SUMMARY_PROMPT = (
+    "You maintain the compressed history of a software team's mission.\n"
+    "Merge the NEW ENTRIES into the CURRENT ARCHIVE. Keep decisions, chosen stack, file names, "
+    "finished and failed work, open problems and user orders. Drop chatter and repetitions.\n"
+    "Answer with the updated archive only, as terse bullet points, under {limit} characters.\n\n"
+    "CURRENT ARCHIVE:\n{archive}\n\nNEW ENTRIES:\n{entries}\n"
+)
+
+def extractive_summarizer(archive, entries, limit=MAX_ARCHIVE_CHARS) -> str:
+    """Deterministic local summarizer: keeps the first line of each entry, newest last."""
+    lines = [line for line in archive.splitlines() if line]
+    for entry in entries:
+        first = entry.strip().splitlines()[0] if entry.strip() else ""
+        if first:
+            lines.append("- " + (first[:197] + "..." if len(first) > 200 else first))
+    while lines and sum(len(l) + 1 for l in lines) > limit:
+        lines.pop(0)
+    return "\n".join(lines)
+
+class GeminiSummarizer:
+    """Summarizer backed by a (light) Gemini model. Falls back to the extractive one on errors."""
+
+    def __init__(self, api_key, model_id, logger=None):
+        self.api_key = api_key
+        self.model_id = model_id
+        self.logger = logger
+        self.client = None
+
+    def __call__(self, archive, entries, limit=MAX_ARCHIVE_CHARS) -> str:
+        try:
+            if self.client is None:
+                from .clients import CLIENTS
+                self.client = CLIENTS.get(self.api_key)
+            prompt = SUMMARY_PROMPT.format(limit=limit, archive=archive or "(empty)", entries="\n".join(entries))
+            response = self.client.models.generate_content(model=self.model_id, contents=prompt)
+            if response.text and response.text.strip():
+                return response.text.strip()
+        except Exception as e:
+            if self.logger: self.logger.debug(f"ARCHIVE_SUMMARY_FALLBACK: {e}")
+        return extractive_summarizer(archive, entries, limit)
+
+class RollingArchiver:
+    """Folds old team log entries and superseded plan versions into Blackboard.compressed_archive.
+
+    schedule() is cheap and returns at once: the summarizer (any callable
+    (archive, entries, limit) -> str) runs on a background thread, one fold at a time.
+    Entries posted while a fold runs are kept for the next one.
+    """
+
+    def __init__(self, blackboard, summarizer=extractive_summarizer, logger=None,
+                 keep_logs=KEEP_LOGS, fold_batch=FOLD_BATCH, max_chars=MAX_ARCHIVE_CHARS):
+        self.blackboard = blackboard
+        self.summarizer = summarizer
+        self.logger = logger
+        self.keep_logs = keep_logs
+        self.fold_batch = fold_batch
+        self.max_chars = max_chars
+        self.folds = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def pending(self) -> bool:
+        board = self.blackboard
+        return len(board.team_log) >= self.keep_logs + self.fold_batch or bool(board.superseded)
+
+    def schedule(self) -> bool:
+        """Starts a background fold if there is enough to fold and none is running."""
+        with self._lock:
+            if (self._thread and self._thread.is_alive()) or not self.pending():
+                return False
+            self._thread = threading.Thread(target=self._fold, name="stratos-archiver", daemon=True)
+            self._thread.start()
+            return True
+
+    def _fold(self):
+        board = self.blackboard
+        with board.lock:
+            logs = board.team_log[:max(0, len(board.team_log) - self.keep_logs)]
+            superseded = board.superseded
+            archive = board.compressed_archive
+        entries = [f"[SUPERSEDED {key}] {value}" for key, value in superseded] + list(logs)
+        if not entries:
+            return
+        try:
+            summary = self.summarizer(archive, entries, self.max_chars)
+        except Exception as e:
+            if self.logger: self.logger.debug(f"ARCHIVE_FOLD_FAILED: {e}")
+            return
+        if len(summary) > self.max_chars:
+            summary = "[...]\n" + summary[-self.max_chars:]
+        # Only what was read is dropped: entries added meanwhile stay for the next fold
+        board.fold_history(len(logs), len(superseded), summary)
+        self.folds += 1
+        if self.logger: self.logger.debug(f"ARCHIVE_FOLDED {len(entries)} entries -> {len(summary)} chars")
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def close(self, timeout=5.0):
+        self.wait(timeout)
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# Blobs smaller than this are kept raw: compression overhead is not worth it
+MIN_COMPRESS_SIZE = 512
+
+def blob_digest(data: bytes) -> str:
+    """Content hash used as the blob key (shared with the snapshot index)."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class BlobStore:
+    """Content-addressed, deduplicated store for file contents.
+
+    Blobs are keyed by their content hash and compressed with zstd when available
+    (zlib otherwise). A small LRU keeps the most recently used blobs decompressed.
+    """
+
+    def __init__(self, compression="auto", hot_size=64):
+        if compression == "auto":
+            compression = "zstd" if HAS_ZSTD else "zlib"
+        if compression == "zstd" and not HAS_ZSTD:
+            compression = "zlib"
+        self.compression = compression  # "zstd", "zlib" or None
+        self.hot_size = hot_size
+        self._blobs = {}  # digest -> (codec, payload)
+        self._hot = OrderedDict()  # digest -> str
+        self._lock = threading.Lock()
+        self._local = threading.local()  # One ZstdDecompressor per thread: get() decodes outside _lock
+        if compression == "zstd":
+            self._zc = zstandard.ZstdCompressor(level=3)
+
+    def _encode(self, data):
+        if not self.compression or len(data) < MIN_COMPRESS_SIZE:
+            return None, data
+        if self.compression == "zstd":
+            return "zstd", self._zc.compress(data)
+        return "zlib", zlib.compress(data, 6)
+
+    def _decompressor(self):
+        zd = getattr(self._local, "zd", None)
+        if zd is None:
+            zd = self._local.zd = zstandard.ZstdDecompressor()
+        return zd
+
+    def _decode(self, codec, payload):
+        if codec == "zstd": return self._decompressor().decompress(payload)
+        if codec == "zlib": return zlib.decompress(payload)
+        return payload
+
+    def put(self, text: str, digest: str = None) -> str:
+        """Stores text (deduplicated) and returns its digest."""
+        data = text.encode("utf-8")
+        digest = digest or blob_digest(data)
+        with self._lock:
+            if digest not in self._blobs:
+                self._blobs[digest] = self._encode(data)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Returns the text stored under digest. Raises KeyError if unknown."""
+        with self._lock:
+            text = self._hot.get(digest)
+            if text is not None:
+                self._hot.move_to_end(digest)
+                return text
+            codec, payload = self._blobs[digest]
+        text = self._decode(codec, payload).decode("utf-8")
+        with self._lock:
+            self._hot[digest] = text
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+        return text
+
+    def collect(self, live) -> int:
+        """Drops every blob not referenced by the live digests. Returns the number removed."""
+        live = set(live)
+        with self._lock:
+            dead = [d for d in self._blobs if d not in live]
+            for d in dead:
+                del self._blobs[d]
+                self._hot.pop(d, None)
+        return len(dead)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "blobs": len(self._blobs),
+                "stored_bytes": sum(len(p) for _, p in self._blobs.values()),
+                "hot_blobs": len(self._hot),
+                "compression": self.compression or "none",
+            }
+
+    def __contains__(self, digest):
+        return digest in self._blobs
+
+    def __len__(self):
+        return len(self._blobs)
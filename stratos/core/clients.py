@@ -0,0 +1,49 @@
+import threading
+from google import genai
+from .prompt_cache import PromptCacheManager
+
+class ClientRegistry:
+    """One genai.Client per API key for the whole process.
+
+    A client owns its HTTP connection pools (sync and async) and takes ~100 ms to build:
+    agents, the archiver and the engine share one instead of opening a pool each.
+    The prompt cache manager is shared the same way, so agents with the same prefix reuse one cache.
+    """
+
+    def __init__(self, factory=None):
+        self.factory = factory or (lambda api_key: genai.Client(api_key=api_key))
+        self._clients = {}
+        self._caches = {} # api_key -> PromptCacheManager
+        self._lock = threading.Lock()
+
+    def get(self, api_key):
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = self._clients[api_key] = self.factory(api_key)
+            return client
+
+    def prompt_cache(self, api_key, logger=None) -> PromptCacheManager:
+        client = self.get(api_key)
+        with self._lock:
+            manager = self._caches.get(api_key)
+            if manager is None:
+                manager = self._caches[api_key] = PromptCacheManager(client, logger=logger)
+            return manager
+
+    def close(self):
+        """Deletes the prompt caches and closes the pooled connections (at process exit)."""
+        with self._lock:
+            clients, caches = list(self._clients.values()), list(self._caches.values())
+            self._clients.clear()
+            self._caches.clear()
+        for manager in caches:
+            manager.close()
+        for client in clients:
+            try: client.close()
+            except Exception: pass
+
+    def __len__(self):
+        return len(self._clients)
+
+CLIENTS = ClientRegistry() # Shared by all agents of the process
@@ -0,0 +1,112 @@
+import math
+import threading
+
+DEFAULT_CONTEXT_WINDOW = 1_048_576
+MODEL_CONTEXT_WINDOWS = {
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-pro": 1_048_576,
+    "gemini-3.1-pro-preview": 1_048_576,
+}
+STATE_SHARE = 0.05       # Part of the context window given to the STATE block of a prompt
+MAX_STATE_TOKENS = 24000 # Above this, more state mostly dilutes the task
+MIN_STATE_TOKENS = 2000
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+CALIBRATION_WEIGHT = 0.3 # Weight of a new observation in the moving average
+
+def state_budget(model_id=None) -> int:
+    """Tokens the assembled context may use for a model."""
+    window = MODEL_CONTEXT_WINDOWS.get(model_id, DEFAULT_CONTEXT_WINDOW)
+    return max(MIN_STATE_TOKENS, min(MAX_STATE_TOKENS, int(window * STATE_SHARE)))
+
+class TokenEstimator:
+    """Character-ratio token estimate, calibrated per model from the usage metadata of real calls."""
+
+    def __init__(self, chars_per_token=DEFAULT_CHARS_PER_TOKEN):
+        self.default = chars_per_token
+        self._ratios = {} # model -> chars per token
+        self._lock = threading.Lock()
+
+    def ratio(self, model=None) -> float:
+        return self._ratios.get(model, self.default)
+
+    def estimate(self, text, model=None) -> int:
+        return math.ceil(len(text) / self.ratio(model)) if text else 0
+
+    def observe(self, model, chars, tokens):
+        """Folds a (prompt characters, prompt_token_count) pair into the model's ratio."""
+        if chars <= 0 or not tokens or tokens <= 0:
+            return
+        sample = min(8.0, max(1.5, chars / tokens))
+        with self._lock:
+            current = self._ratios.get(model)
+            self._ratios[model] = sample if current is None else current + CALIBRATION_WEIGHT * (sample - current)
+
+ESTIMATOR = TokenEstimator() # Shared by the agents (calibration) and the Blackboard (budgeting)
+
+class Section:
+    """A titled part of the context. keep='head' trims from the end, 'tail' keeps the last lines."""
+    __slots__ = ("name", "title", "text", "priority", "share", "keep")
+
+    def __init__(self, name, title, text, priority, share=1.0, keep="head"):
+        self.name = name
+        self.title = title
+        self.text = text
+        self.priority = priority
+        self.share = share
+        self.keep = keep
+
+class ContextBudgeter:
+    """Assembles sections within a token budget.
+
+    Sections are served by priority, each up to its share of the budget; whatever is left
+    then goes to the sections that were cut, again by priority. Output keeps the given order.
+    """
+
+    def __init__(self, estimator=None):
+        self.estimator = estimator or ESTIMATOR
+
+    def _trim(self, section, tokens, model):
+        limit = int(tokens * self.estimator.ratio(model))
+        text = section.text
+        if len(text) <= limit:
+            return text
+        marker = "... [EARLIER ENTRIES TRUNCATED]\n" if section.keep == "tail" else "\n... [TRUNCATED]"
+        limit = max(0, limit - len(marker))
+        if section.keep == "tail":
+            lines, size = [], 0
+            for line in reversed(text.splitlines()):
+                if size + len(line) + 1 > limit:
+                    break
+                lines.append(line)
+                size += len(line) + 1
+            return marker + "\n".join(reversed(lines))
+        cut = text.rfind("\n", 0, limit)
+        return text[:cut if cut > limit // 2 else limit] + marker
+
+    def assemble(self, sections, budget, model=None):
+        """Returns (text, usage) where usage maps section name -> (tokens used, tokens wanted)."""
+        header = {s.name: self.estimator.estimate(s.title + "\n\n", model) for s in sections if s.text}
+        wanted = {s.name: self.estimator.estimate(s.text, model) for s in sections if s.text}
+        remaining = budget - sum(header.values())
+        grant = {}
+        by_priority = sorted((s for s in sections if s.text), key=lambda s: s.priority)
+        for s in by_priority:
+            grant[s.name] = max(0, min(wanted[s.name], int(budget * s.share), remaining))
+            remaining -= grant[s.name]
+        for s in by_priority:
+            extra = max(0, min(wanted[s.name] - grant[s.name], remaining))
+            grant[s.name] += extra
+            remaining -= extra
+
+        parts, usage = [], {}
+        for s in sections:
+            if not s.text:
+                continue
+            body = s.text if grant[s.name] >= wanted[s.name] else self._trim(s, grant[s.name], model)
+            parts.append(f"{s.title}\n{body}")
+            usage[s.name] = (self.estimator.estimate(body, model) + header[s.name], wanted[s.name] + header[s.name])
+        return "\n\n".join(parts), usage
+
+def format_usage(usage) -> str:
+    return " ".join(f"{name}={used}/{wanted}" for name, (used, wanted) in usage.items())
@@ -0,0 +1,115 @@
+import fnmatch
+import hashlib
+import os
+from collections import OrderedDict
+
+DEFAULT_FILE_BUDGET = 4000   # Characters of one file's patch inlined in a report
+DEFAULT_TOTAL_BUDGET = 20000 # Characters of patches inlined in a whole report
+MAX_FULL_DIFF_CHARS = 60000  # Cap of one get_full_diff answer
+MAX_REPORTS = 32             # Reports kept for get_full_diff
+
+LOCK_FILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "uv.lock", "bun.lockb", "mix.lock", "flake.lock",
+}
+GENERATED_GLOBS = [
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js", "*.chunk.js", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+    "*.generated.*", "*.snap", "dist/*", "build/*", "*/dist/*", "*/build/*",
+]
+
+def collapse_reason(change) -> str:
+    """Why a change is reported as a diffstat only ('' if its patch may be shown)."""
+    path = change.path.replace(os.sep, "/")
+    if change.binary:
+        return "binary"
+    if path.rsplit("/", 1)[-1] in LOCK_FILES:
+        return "lockfile"
+    if any(fnmatch.fnmatchcase(path, g) for g in GENERATED_GLOBS):
+        return "generated"
+    return ""
+
+class DiffCompactor:
+    """Renders FileChange lists within per-file and total character budgets.
+
+    Lock, generated and binary files collapse to a diffstat line, and patches that do not
+    fit the budgets fall back to +N/-M summaries. Every report gets a stable handle (a hash
+    of its content) so the full hunks can be fetched later with full_diff().
+    """
+
+    def __init__(self, file_budget=DEFAULT_FILE_BUDGET, total_budget=DEFAULT_TOTAL_BUDGET, max_reports=MAX_REPORTS):
+        self.file_budget = file_budget
+        self.total_budget = total_budget
+        self.max_reports = max_reports
+        self._reports = OrderedDict()  # handle -> {path: FileChange}
+
+    def _handle(self, changes) -> str:
+        h = hashlib.blake2b(digest_size=5)
+        for c in changes:
+            h.update(f"{c.status}\0{c.old_path}\0{c.path}\0".encode("utf-8", "surrogateescape"))
+            h.update(c.patch.encode("utf-8", "surrogateescape"))
+        return "D" + h.hexdigest()
+
+    def _store(self, handle, changes):
+        self._reports[handle] = {c.path: c for c in changes if c.status not in ("A", "D")}
+        self._reports.move_to_end(handle)
+        while len(self._reports) > self.max_reports:
+            self._reports.popitem(last=False)
+
+    def render(self, changes, header=()) -> str:
+        """Report lines for changes ('header' lines such as [BULK] markers come first)."""
+        lines = list(header)
+        if not changes:
+            return "\n".join(lines) if lines else "NO_CHANGES"
+        handle = self._handle(changes)
+
+        # Inline the smallest patches first so the budget covers as many files as possible
+        inline, budget = set(), self.total_budget
+        candidates = [c for c in changes if c.patch and not collapse_reason(c) and len(c.patch) <= self.file_budget]
+        for c in sorted(candidates, key=lambda c: len(c.patch)):
+            if len(c.patch) <= budget:
+                inline.add(c.path)
+                budget -= len(c.patch)
+
+        for c in changes:
+            path = c.path.replace("/", os.sep)
+            tag, name = ("REN", f"{c.old_path} -> {path}") if c.status == "R" else ("MOD", path)
+            if c.status == "A":
+                lines.append(f"[NEW] {path}")
+            elif c.status == "D":
+                lines.append(f"[DEL] {path}")
+            elif c.path in inline:
+                lines.append(f"[{tag}] {name}:\n{c.patch}")
+            elif c.binary:
+                lines.append(f"[{tag}] {name} (binary)")
+            elif not c.patch:
+                lines.append(f"[{tag}] {name}")
+            else:
+                reason = collapse_reason(c) or ("diff too large" if len(c.patch) > self.file_budget else "report budget exhausted")
+                lines.append(f"[{tag}] {name} (+{c.added}/-{c.deleted}, {reason})")
+        if any(c.patch and c.path not in inline and c.status not in ("A", "D") for c in changes):
+            self._store(handle, changes)
+            lines.append(f"[DIFF {handle}] Some files are summarized: call get_full_diff(handle='{handle}', path=...) for their hunks.")
+        return "\n".join(lines)
+
+    def full_diff(self, handle, path=None) -> str:
+        report = self._reports.get(handle)
+        if report is None:
+            return f"ERROR: Unknown or expired diff handle '{handle}'. Use the handle of a recent RECENT_CHANGES report."
+        if path is not None:
+            path = path.replace(os.sep, "/").removeprefix("./")
+            change = report.get(path)
+            if change is None:
+                return f"ERROR: '{path}' is not part of diff {handle}. Files: {', '.join(sorted(report))}"
+            selected = [change]
+        else:
+            selected = list(report.values())
+        parts = []
+        for c in selected:
+            if c.binary:
+                parts.append(f"[{c.path}] binary file changed, no textual diff.")
+            elif c.patch:
+                parts.append(c.patch)
+        text = "\n".join(parts) or "No textual changes."
+        if len(text) > MAX_FULL_DIFF_CHARS:
+            text = text[:MAX_FULL_DIFF_CHARS] + f"\n... [TRUNCATED: {len(text) - MAX_FULL_DIFF_CHARS} more chars. Use read_file on the file instead.]"
+        return text
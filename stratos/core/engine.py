@@ -7,16 +7,28 @@ import signal
 import termios  # Added for terminal restoration
 from rich.prompt import Prompt
 from rich.console import Console
-from google import genai
 from stratos.utils.logger import ProjectLogger
 from stratos.core.sandbox import Sandbox
 from stratos.core.pool import AIPool
-from stratos.utils.config import load_config, get_env_var
+from stratos.core.mission_store import MissionStore
+from stratos.core.clients import CLIENTS
+from stratos.utils.config import load_config, get_env_var, CACHE_DIR, SEARCH_CACHE_FILE, POLICY_FILE, MISSION_STORE_FILE
 from stratos.ui.controllers.execution_controller import ExecutionController
 
-def run_stratos(project_name=None, project_desc=None):
+def run_stratos(project_name=None, project_desc=None, resume=False):
     config = load_config()
     console = Console()
+    checkpoint = None
+    if resume: # Continue from the last completed phase of <projects_path>/<project>/mission.sqlite3
+        store_path = os.path.join(config.get("projects_path", "projects"), project_name, MISSION_STORE_FILE)
+        if os.path.exists(store_path):
+            store = MissionStore(store_path)
+            checkpoint = store.load()
+            store.close()
+        if checkpoint is None:
+            console.print(f"[bold red]ERROR: No checkpoint to resume for project '{project_name}'.[/bold red]")
+            return
+        project_desc = checkpoint[0]["project"]["desc"]
     
     api_key = None
     if not config.get("use_adc"):
@@ -60,6 +72,18 @@ def run_stratos(project_name=None, project_desc=None):
     logger = ProjectLogger(config, project_path=sandbox_path)
     logger.sandbox = sandbox # Link for UI status
     sandbox.logger_instance = logger # Link for manual frames
+    sandbox.enable_search_index(os.path.join(session_root, "search_index.json"))
+    sandbox.enable_web_cache(CACHE_DIR / "web")
+    try: # User-wide policy, overridden by <project>/policy.toml (outside the agents' sandbox)
+        sandbox.load_policy([POLICY_FILE, os.path.join(session_root, "policy.toml")],
+                            log_path=os.path.join(session_root, "policy_log.jsonl"))
+    except Exception as e:
+        logger.warning(f"POLICY: could not load approval policy ({e}), using built-in defaults.")
+    sandbox.enable_search_cache(SEARCH_CACHE_FILE, ttl=config.get("search_cache_ttl", 86400))
+    if config.get("fs_watcher", True):
+        sandbox.start_watcher() # Incremental change tracking for snapshots and tree
+    if config.get("persistent_shell", True):
+        sandbox.enable_shell_sessions() # cd/export/venv activation persist between commands
     
     original_request = project_desc
     # ... preprocessing overwrites project_desc -> this will be our MVP SPEC
@@ -69,10 +93,10 @@ def run_stratos(project_name=None, project_desc=None):
     styles = get_styles(palette)
     
     # === PRE-PROCESSING: ENRICH USER REQUEST ===
-    if project_desc and project_name != "*":
+    if project_desc and project_name != "*" and checkpoint is None:
         try:
             with console.status("[bold blue]Analyzing request and generating MVP spec..."):
-                client = genai.Client(api_key=api_key)
+                client = CLIENTS.get(api_key)
                 enrichment_prompt = (
                     "You are a Product Manager AI. Transform this simple user request into a comprehensive MVP specification. "
                     "Focus on core features, user flow, and key functionality. Do not focus on specific implementation technology unless requested. "
@@ -142,6 +166,7 @@ def run_stratos(project_name=None, project_desc=None):
         nonlocal last_interrupt
         now = time.time()
         if now - last_interrupt < 3:
+            sandbox.terminate_all()
             save_metadata()
             restore_terminal_echo()
             os._exit(0)
@@ -159,6 +184,7 @@ def run_stratos(project_name=None, project_desc=None):
         
         def handle_interrupt(choice):
             if choice == "exit":
+                sandbox.terminate_all()
                 save_metadata()
                 restore_terminal_echo()
                 os._exit(0)
@@ -202,13 +228,19 @@ def run_stratos(project_name=None, project_desc=None):
 
     project_info = {"name": project_name, "desc": project_desc}
     pool = AIPool(sandbox, logger, api_key, project_info)
+    pool.blackboard.retrieval_k = config.get("retrieval_top_k", 6)
+    pool.enable_checkpoints(os.path.join(session_root, MISSION_STORE_FILE))
     pool.setup_default_pool()
     
     task = f"DEVELOP_PROJECT: {project_name}. SPECS: {project_desc}"
+    cursor = None
+    if checkpoint is not None:
+        cursor = pool.resume(checkpoint)
+        task = cursor["task"] or task
     
     def run_mission():
         try:
-            pool.broadcast_task(task)
+            pool.broadcast_task(task, resume=cursor)
             logger.success("MISSION_COMPLETED")
         except Exception as e:
             logger.error(f"ENGINE_CRASH: {str(e)}")
@@ -223,6 +255,11 @@ def run_stratos(project_name=None, project_desc=None):
     controller = ExecutionController(logger, sandbox, mission_thread, ui_active, styles, palette)
     controller.run()
     
+    sandbox.terminate_all()
+    sandbox.stop_watcher()
+    pool.close()
+    CLIENTS.close()
+    logger.debug(sandbox.policy.summary())
     save_metadata()
             
     console.print(f"\n[bold green]MISSION TERMINATED.[/bold green] Files: {sandbox_path}")
@@ -0,0 +1,149 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_OUTPUT_CAP = 32 * 1024 # Bytes kept per stream for the model-facing result
+KILL_GRACE = 2.0 # Seconds between SIGTERM and SIGKILL of the process group
+
+class OutputBuffer:
+    """Keeps the head and the tail of a stream within a byte cap."""
+
+    def __init__(self, cap=DEFAULT_OUTPUT_CAP):
+        self.head_cap = cap // 2
+        self.tail_cap = cap - self.head_cap
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.omitted = 0
+
+    def append(self, line: str):
+        size = len(line.encode("utf-8", "replace"))
+        if self.head_size + size <= self.head_cap and not self.tail:
+            self.head.append(line)
+            self.head_size += size
+            return
+        self.tail.append(line)
+        self.tail_size += size
+        while self.tail_size > self.tail_cap and len(self.tail) > 1:
+            dropped = self.tail.popleft()
+            dropped_size = len(dropped.encode("utf-8", "replace"))
+            self.tail_size -= dropped_size
+            self.omitted += dropped_size
+
+    def text(self) -> str:
+        out = "".join(self.head)
+        if self.omitted:
+            out += f"\n... [{self.omitted} bytes omitted] ...\n"
+        return out + "".join(self.tail)
+
+class CommandResult:
+    def __init__(self, returncode, stdout="", stderr="", wall_time=0.0, cpu_time=None, peak_rss_kb=None,
+                 timed_out=False, cancelled=False, timeout=None, cwd=None):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_rss_kb = peak_rss_kb
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.timeout = timeout
+        self.cwd = cwd # Working directory after the command (persistent shells only)
+        self.notes = []
+
+    def format(self) -> str:
+        """Model-facing report (same CODE_/STDOUT/STDERR layout as before, plus resource stats)."""
+        out = f"CODE_{self.returncode}\nSTDOUT: {self.stdout}\nSTDERR: {self.stderr}"
+        stats = [f"wall={self.wall_time:.2f}s"]
+        if self.cpu_time is not None: stats.append(f"cpu={self.cpu_time:.2f}s")
+        if self.peak_rss_kb is not None: stats.append(f"peak_rss={self.peak_rss_kb / 1024:.1f}MB")
+        out += f"\nSTATS: {' '.join(stats)}"
+        if self.timed_out:
+            out += f"\nTIMEOUT: command exceeded {self.timeout}s, its process group was killed."
+        if self.cancelled:
+            out += "\nCANCELLED: mission paused or stopped, the command's process group was killed."
+        for note in self.notes:
+            out += f"\nNOTE: {note}"
+        return out
+
+def _kill_group(proc, sig):
+    try: os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError): pass
+
+def terminate(proc, grace=KILL_GRACE):
+    """SIGTERM then SIGKILL the whole process group of proc.
+    Never reaps proc itself: run_command's wait4 loop owns that and sets returncode."""
+    _kill_group(proc, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        if proc.returncode is not None:
+            break
+        time.sleep(0.05)
+    _kill_group(proc, signal.SIGKILL)
+
+def run_command(command, cwd, timeout=DEFAULT_TIMEOUT, on_line=None, should_cancel=None,
+                output_cap=DEFAULT_OUTPUT_CAP, on_start=None, env=None) -> CommandResult:
+    """Runs a shell command in its own process group, streaming its output.
+
+    Each stdout/stderr line is passed to on_line(stream, line) as it arrives, while a
+    head+tail buffer bounds what ends up in the result. The whole process tree is killed
+    on timeout or as soon as should_cancel() returns True.
+    """
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        command, shell=True, cwd=cwd, env=env,
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        start_new_session=True
+    )
+    if on_start: on_start(proc)
+    buffers = {"stdout": OutputBuffer(output_cap), "stderr": OutputBuffer(output_cap)}
+
+    def pump(name, stream):
+        for raw in iter(stream.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            buffers[name].append(line)
+            if on_line:
+                try: on_line(name, line.rstrip("\n"))
+                except Exception: pass
+        stream.close()
+
+    readers = [threading.Thread(target=pump, args=(n, getattr(proc, n)), daemon=True) for n in buffers]
+    for t in readers: t.start()
+
+    timed_out = cancelled = False
+    status, usage = 0, None
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if not timed_out and not cancelled:
+            if timeout and time.monotonic() - start > timeout:
+                timed_out = True
+                threading.Thread(target=terminate, args=(proc,), daemon=True).start()
+            elif should_cancel and should_cancel():
+                cancelled = True
+                threading.Thread(target=terminate, args=(proc,), daemon=True).start()
+        time.sleep(0.02)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode < 0 and not (timed_out or cancelled) and should_cancel and should_cancel():
+        cancelled = True # Killed from outside (Sandbox.terminate_all) before the loop noticed
+
+    # Background children may still hold the pipes open: give them a moment, then kill the group
+    for t in readers: t.join(timeout=0.5)
+    if any(t.is_alive() for t in readers):
+        _kill_group(proc, signal.SIGKILL)
+        for t in readers: t.join(timeout=1)
+
+    return CommandResult(
+        proc.returncode,
+        stdout=buffers["stdout"].text(), stderr=buffers["stderr"].text(),
+        wall_time=time.monotonic() - start,
+        cpu_time=usage.ru_utime + usage.ru_stime if usage else None,
+        peak_rss_kb=usage.ru_maxrss if usage else None, # Max over the reaped tree; floored by the pre-exec fork
+        timed_out=timed_out, cancelled=cancelled, timeout=timeout
+    )
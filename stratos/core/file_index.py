@@ -0,0 +1,234 @@
+import os
+import re
+import threading
+
+# Directories and files nobody wants agents to walk, on top of .gitignore/.stratosignore
+DEFAULT_IGNORES = [
+    ".git/", "node_modules/", ".venv/", "venv/", "__pycache__/", ".mypy_cache/",
+    ".pytest_cache/", ".ruff_cache/", ".tox/", ".nox/", "*.egg-info/", "dist/", "build/",
+    ".next/", ".nuxt/", ".cache/", "coverage/", ".parcel-cache/", "target/",
+    "*.pyc", "*.pyo", ".DS_Store",
+]
+IGNORE_FILES = (".gitignore", ".stratosignore")
+
+def glob_to_regex(pattern: str) -> str:
+    """Translates a gitignore-style glob ('**', '*', '?', '[...]') into a regex."""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?"); i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("(?:/.*)?"); i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*"); i += 2
+        elif c == "*":
+            out.append("[^/]*"); i += 1
+        elif c == "?":
+            out.append("[^/]"); i += 1
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c)); i += 1
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"): body = "^" + body[1:]
+                out.append(f"[{body}]"); i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1])); i += 2
+        else:
+            out.append(re.escape(c)); i += 1
+    return "".join(out)
+
+def compile_glob(pattern: str):
+    """Compiles pattern to match relative '/'-separated paths at any depth (like Path.rglob)."""
+    return re.compile("(?:.*/)?" + glob_to_regex(pattern.lstrip("/")))
+
+class IgnoreRule:
+    __slots__ = ("regex", "negate", "dir_only", "anchored", "base")
+
+    def __init__(self, line, base=""):
+        self.negate = line.startswith("!")
+        if self.negate: line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # A slash anywhere but at the end anchors the pattern to the file's directory
+        self.anchored = "/" in line
+        self.regex = re.compile(glob_to_regex(line.lstrip("/")))
+        self.base = base
+
+    def matches(self, rel, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel.startswith(self.base + "/"):
+                return False
+            rel = rel[len(self.base) + 1:]
+        target = rel if self.anchored else rel.rsplit("/", 1)[-1]
+        return self.regex.fullmatch(target) is not None
+
+def parse_ignore_lines(lines, base=""):
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+class FileIndex:
+    """Ignore-aware, cached listing of the sandbox files.
+
+    Honors DEFAULT_IGNORES, the root .stratosignore and every .gitignore in the tree.
+    Ignored directories are pruned during the walk. The listing is cached and only
+    rebuilt after invalidate() or when a directory or ignore file mtime changed.
+    Paths are relative to the root and use os.sep.
+    """
+
+    def __init__(self, root_dir, extra_ignores=()):
+        self.root_dir = os.path.abspath(root_dir)
+        self.extra_ignores = list(extra_ignores)
+        self.validate_on_read = True # Watchers turn this off and call invalidate() themselves
+        self._lock = threading.RLock()
+        self._files = None
+        self._dirs = None
+        self._stamps = {}  # dir or ignore file rel path -> mtime_ns at build time
+        self._rules = {}   # dir rel path -> rules in effect inside that dir
+
+    # --- IGNORE RULES ---
+
+    def _load_rules(self, rel_dir, inherited):
+        rules = list(inherited)
+        names = IGNORE_FILES if not rel_dir else (".gitignore",)
+        for name in names:
+            path = os.path.join(self.root_dir, rel_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    rules.extend(parse_ignore_lines(f, rel_dir.replace(os.sep, "/")))
+            except OSError:
+                continue
+        return rules
+
+    def _rules_for(self, rel_dir):
+        rules = self._rules.get(rel_dir)
+        if rules is None:
+            if rel_dir:
+                parent = os.path.dirname(rel_dir)
+                rules = self._load_rules(rel_dir, self._rules_for(parent))
+            else:
+                base = parse_ignore_lines(DEFAULT_IGNORES + self.extra_ignores)
+                rules = self._load_rules("", base)
+            self._rules[rel_dir] = rules
+        return rules
+
+    def _match(self, rel, is_dir, rules):
+        posix = rel.replace(os.sep, "/")
+        ignored = False
+        for rule in rules:
+            if rule.negate == ignored and rule.matches(posix, is_dir):
+                ignored = not rule.negate
+        return ignored
+
+    def is_ignored(self, rel: str, is_dir: bool = False) -> bool:
+        """True if rel (or one of its parent directories) is excluded."""
+        with self._lock:
+            parts = rel.split(os.sep)
+            for i in range(1, len(parts)):
+                ancestor = os.sep.join(parts[:i])
+                if self._match(ancestor, True, self._rules_for(os.sep.join(parts[:i - 1]))):
+                    return True
+            return self._match(rel, is_dir, self._rules_for(os.sep.join(parts[:-1])))
+
+    # --- LISTING ---
+
+    def invalidate(self):
+        with self._lock:
+            self._files = None
+            self._dirs = None
+            self._rules = {}
+
+    def _is_stale(self):
+        for rel, mtime in self._stamps.items():
+            try:
+                if os.stat(os.path.join(self.root_dir, rel)).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                if mtime is not None:
+                    return True
+        return False
+
+    def _build(self):
+        self._rules = {}
+        files, dirs, stamps = [], [], {}
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            full = os.path.join(self.root_dir, rel_dir)
+            rules = self._rules_for(rel_dir)
+            try:
+                stamps[rel_dir] = os.stat(full).st_mtime_ns
+                with os.scandir(full) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for name in IGNORE_FILES if not rel_dir else (".gitignore",):
+                try: stamps[os.path.join(rel_dir, name)] = os.stat(os.path.join(full, name)).st_mtime_ns
+                except OSError: stamps[os.path.join(rel_dir, name)] = None
+            for entry in entries:
+                rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not self._match(rel, True, rules):
+                        dirs.append(rel)
+                        stack.append(rel)
+                elif entry.is_file(follow_symlinks=False):
+                    if not self._match(rel, False, rules):
+                        files.append(rel)
+        files.sort()
+        dirs.sort()
+        self._files, self._dirs, self._stamps = files, dirs, stamps
+
+    def _ensure(self):
+        with self._lock:
+            if self._files is None or (self.validate_on_read and self._is_stale()):
+                self._build()
+
+    def files(self) -> list[str]:
+        """Sorted list of every non-ignored file."""
+        self._ensure()
+        return self._files
+
+    def dirs(self) -> list[str]:
+        """Sorted list of every non-ignored directory (root excluded)."""
+        self._ensure()
+        return self._dirs
+
+    def files_under(self, rel_dir: str) -> list[str]:
+        if not rel_dir or rel_dir == ".":
+            return self.files()
+        prefix = rel_dir.rstrip(os.sep) + os.sep
+        return [f for f in self.files() if f.startswith(prefix)]
+
+    def glob(self, pattern: str) -> list[str]:
+        """Files matching pattern at any depth (same semantics as Path.rglob)."""
+        regex = compile_glob(pattern)
+        return [f for f in self.files() if regex.fullmatch(f.replace(os.sep, "/"))]
+
+    def tree(self) -> str:
+        """Indented directory tree of the indexed files."""
+        children = {"": ([], [])}
+        for d in self.dirs():
+            children[d] = ([], [])
+            children[os.path.dirname(d)][0].append(d)
+        for f in self.files():
+            children[os.path.dirname(f)][1].append(os.path.basename(f))
+        lines = []
+        stack = [("", 0)]
+        while stack:
+            rel_dir, depth = stack.pop()
+            indent = "  " * depth
+            lines.append(f"{indent}{os.path.basename(rel_dir or self.root_dir) or '.'}/") # Root: the project's name
+            subdirs, files = children[rel_dir]
+            for f in files:
+                lines.append(f"  {indent}{f}")
+            stack.extend((d, depth + 1) for d in reversed(subdirs))
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+GIT_TIMEOUT = 30
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+class FileChange:
+    """One changed path between two trees. status is A, D, M or R (rename, old_path set)."""
+    __slots__ = ("status", "path", "old_path", "added", "deleted", "binary", "patch")
+
+    def __init__(self, status, path, old_path=None, added=0, deleted=0, binary=False, patch=""):
+        self.status = status
+        self.path = path
+        self.old_path = old_path
+        self.added = added
+        self.deleted = deleted
+        self.binary = binary
+        self.patch = patch
+
+    def __repr__(self):
+        return f"FileChange({self.status}, {self.old_path + ' -> ' if self.old_path else ''}{self.path}, +{self.added}/-{self.deleted})"
+
+class GitDiffBackend:
+    """Change detection and diffs through git plumbing, in a private repository.
+
+    The sandbox is the work tree but objects and the index live in a separate git dir,
+    so the agents' own repository (if any) is never touched. sync() stages the given
+    paths and returns a tree id; changes() diffs two trees with rename detection.
+    """
+
+    def __init__(self, root_dir, git_dir=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self._owns_dir = git_dir is None
+        self.git_dir = git_dir or tempfile.mkdtemp(prefix="stratos-diff-")
+        self._lock = threading.Lock()
+        self.available = False
+        if shutil.which("git"):
+            try:
+                if not os.path.exists(os.path.join(self.git_dir, "HEAD")):
+                    self._git("init", "--bare", "--quiet", self.git_dir, with_tree=False)
+                self.available = True
+            except (OSError, subprocess.SubprocessError):
+                self.available = False
+
+    def _git(self, *args, input=None, with_tree=True) -> bytes:
+        env = {
+            **os.environ, "GIT_CONFIG_NOSYSTEM": "1", "GIT_TERMINAL_PROMPT": "0",
+            "GIT_INDEX_FILE": os.path.join(self.git_dir, "stratos-index"),
+        }
+        if with_tree:
+            env.update(GIT_DIR=self.git_dir, GIT_WORK_TREE=self.root_dir)
+        cmd = ["git", "-c", "core.autocrlf=false", "-c", "core.quotepath=false", "-c", "core.safecrlf=false", *args]
+        proc = subprocess.run(cmd, cwd=self.root_dir, env=env, input=input, capture_output=True, timeout=GIT_TIMEOUT)
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, proc.stdout, proc.stderr)
+        return proc.stdout
+
+    def status(self) -> list[str]:
+        """Paths (relative, '/'-separated) that differ between the private index and the work tree."""
+        out = self._git("status", "--porcelain=v2", "-z", "--untracked-files=all", "--no-renames")
+        paths, fields = [], out.split(b"\0")
+        for entry in fields:
+            if not entry:
+                continue
+            kind = entry[:1]
+            if kind == b"1" and entry[3:4] != b".": # Y column: work tree vs index
+                paths.append(entry.split(b" ", 8)[8].decode("utf-8", "surrogateescape"))
+            elif kind == b"?":
+                paths.append(entry[2:].decode("utf-8", "surrogateescape"))
+        return paths
+
+    def sync(self, paths) -> str:
+        """Stages the current content of paths (deleted ones are removed) and returns the tree id."""
+        with self._lock:
+            if paths:
+                data = b"\0".join(p.replace(os.sep, "/").encode("utf-8", "surrogateescape") for p in paths) + b"\0"
+                self._git("update-index", "--add", "--remove", "-z", "--stdin", input=data)
+            return self._git("write-tree").decode().strip()
+
+    def changes(self, old_tree, new_tree, patches=True) -> list[FileChange]:
+        """Structured changes from old_tree to new_tree (renames detected), with unified patches."""
+        if old_tree == new_tree:
+            return []
+        base = ["diff-tree", "-r", "-M", "--no-ext-diff", "--no-textconv", "--no-color", old_tree, new_tree]
+        status_fields = self._git(*base, "--name-status", "-z").split(b"\0")
+        numstat_fields = self._git(*base, "--numstat", "-z").split(b"\0")
+
+        changes, i = [], 0
+        while i < len(status_fields) and status_fields[i]:
+            code = status_fields[i].decode()
+            if code.startswith(("R", "C")):
+                old, new = status_fields[i + 1].decode("utf-8", "surrogateescape"), status_fields[i + 2].decode("utf-8", "surrogateescape")
+                changes.append(FileChange("R" if code[0] == "R" else "A", new, old if code[0] == "R" else None))
+                i += 3
+            else:
+                changes.append(FileChange(code[0], status_fields[i + 1].decode("utf-8", "surrogateescape")))
+                i += 2
+
+        j = 0
+        for change in changes:
+            added, deleted, rest = numstat_fields[j].split(b"\t", 2)
+            j += 3 if not rest else 1 # Renames: 'a\td\t' then old and new paths as separate fields
+            change.binary = added == b"-"
+            change.added = 0 if change.binary else int(added)
+            change.deleted = 0 if change.binary else int(deleted)
+
+        if patches and changes:
+            raw = self._git(*base, "-p", "--unified=3").decode("utf-8", "replace")
+            sections = raw.split("\ndiff --git ")
+            sections[0] = sections[0][len("diff --git "):] if sections[0].startswith("diff --git ") else sections[0]
+            for change, section in zip(changes, sections):
+                start = section.find("\n--- ")
+                change.patch = section[start + 1:].rstrip("\n") if start != -1 else ""
+        return changes
+
+    def close(self):
+        if self._owns_dir:
+            shutil.rmtree(self.git_dir, ignore_errors=True)
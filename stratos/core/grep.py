@@ -0,0 +1,128 @@
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .file_index import compile_glob
+
+DEFAULT_MAX_RESULTS = 200
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+DEFAULT_TIMEOUT = 15.0
+MAX_LINE_CHARS = 300
+SNIFF_SIZE = 8192 # A NUL byte in the first block marks the file as binary
+MAX_WORKERS = min(16, (os.cpu_count() or 1) + 4)
+
+class GrepResult:
+    """Aggregated matches of a grep run plus what was skipped or cut."""
+
+    def __init__(self):
+        self.matches = []  # (rel path, line number, line text)
+        self.total = 0
+        self.timed_out = False
+        self.skipped_binary = 0
+        self.skipped_large = 0
+
+    def format(self, max_results=DEFAULT_MAX_RESULTS) -> str:
+        if not self.matches:
+            text = "No matches found."
+        else:
+            lines = [f"{rel}:{n}:{line}" for rel, n, line in self.matches[:max_results]]
+            hidden = self.total - min(len(self.matches), max_results)
+            if hidden > 0:
+                lines.append(f"... [TRUNCATED: {hidden} more matches. Narrow the pattern or use include/exclude.]")
+            text = "\n".join(lines)
+        if self.timed_out:
+            text += "\n... [TIMEOUT: search stopped early, results are partial.]"
+        return text
+
+def _compile_globs(patterns):
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = [p.strip() for p in patterns.split(",")]
+    return [compile_glob(p) for p in patterns if p]
+
+def _search_file(full, regex, max_file_size, deadline, limit):
+    """Returns (status, [(line number, text)], match count); status is ok, timeout, binary, large or skip."""
+    try:
+        size = os.path.getsize(full)
+        if size == 0:
+            return "skip", [], 0
+        if size > max_file_size:
+            return "large", [], 0
+        with open(full, "rb") as f:
+            if b"\0" in f.read(SNIFF_SIZE):
+                return "binary", [], 0
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return "skip", [], 0
+
+    matches, count, status = [], 0, "ok"
+    try:
+        line_no, counted_to, pos, size = 1, 0, 0, len(buf)
+        ends_with_newline = buf[size - 1:size] == b"\n"
+        while pos < size:
+            m = regex.search(buf, pos)
+            if m is None or (m.start() == size and ends_with_newline):
+                break # Nothing, or an empty match after the final newline: not a line of the file
+            line_start = buf.rfind(b"\n", 0, m.start()) + 1
+            line_end = buf.find(b"\n", m.start())
+            if line_end == -1: line_end = size
+            pos = line_end + 1 # One hit per line, like the line-by-line search
+            line = buf[line_start:line_end]
+            if m.end() > line_end and not regex.search(line):
+                continue # Match spans lines: the next line gets its own search
+            count += 1
+            if len(matches) < limit:
+                line_no += buf[counted_to:line_start].count(b"\n")
+                counted_to = line_start
+                text = line.decode("utf-8", "replace").strip()
+                if len(text) > MAX_LINE_CHARS: text = text[:MAX_LINE_CHARS] + "..."
+                matches.append((line_no, text))
+            if time.monotonic() > deadline:
+                status = "timeout"
+                break
+    finally:
+        buf.close()
+    return status, matches, count
+
+def grep_files(root_dir, files, pattern, include=None, exclude=None, max_results=DEFAULT_MAX_RESULTS,
+               max_file_size=DEFAULT_MAX_FILE_SIZE, timeout=DEFAULT_TIMEOUT, workers=MAX_WORKERS) -> GrepResult:
+    """Searches a regex across files (paths relative to root_dir) on a thread pool.
+
+    Files are mmapped and scanned with a bytes regex; binaries (NUL sniff) and files
+    above max_file_size are skipped. Raises re.error for an invalid pattern.
+    """
+    re.compile(pattern) # Surface syntax errors with the str-pattern message
+    regex = re.compile(pattern.encode("utf-8"), re.MULTILINE)
+    includes, excludes = _compile_globs(include), _compile_globs(exclude)
+
+    candidates = []
+    for rel in files:
+        posix = rel.replace(os.sep, "/")
+        if includes and not any(g.fullmatch(posix) for g in includes): continue
+        if excludes and any(g.fullmatch(posix) for g in excludes): continue
+        candidates.append(rel)
+
+    result = GrepResult()
+    deadline = time.monotonic() + timeout
+
+    def task(rel):
+        if time.monotonic() > deadline:
+            return rel, "timeout", [], 0
+        return (rel,) + _search_file(os.path.join(root_dir, rel), regex, max_file_size, deadline, max_results)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # map() keeps the candidate order, so output is deterministic
+        for rel, status, matches, count in pool.map(task, candidates):
+            if status == "timeout":
+                result.timed_out = True
+            elif status == "binary":
+                result.skipped_binary += 1
+            elif status == "large":
+                result.skipped_large += 1
+            result.total += count
+            room = max_results - len(result.matches)
+            if room > 0:
+                result.matches.extend((rel, n, line) for n, line in matches[:room])
+    return result
@@ -0,0 +1,120 @@
+import json
+from google.genai import types
+from .context_budget import ESTIMATOR
+
+KEEP_RESULTS = 4             # Most recent tool results always sent verbatim
+MIN_ELIDED_CHARS = 2000      # Smaller results cost less than the re-read an elision may trigger
+MAX_TURN_TOKENS = 120_000    # Input ceiling of one model call (prefix + messages)
+ELIDED_MARKER = "[ELIDED "
+PREVIEW_CHARS = 120          # First line of an elided result kept in its stub
+
+def describe_call(call) -> str:
+    """'read_file(src/app.py)' style label of a function call."""
+    args = (call.args or {}) if call else {}
+    target = str(args.get("path") or args.get("command") or args.get("url") or args.get("pattern") or args.get("query") or "")
+    if len(target) > 80: target = target[:77] + "..."
+    return f"{call.name if call else 'tool'}({target})"
+
+def part_chars(part) -> int:
+    if part.text:
+        return len(part.text)
+    if part.function_call:
+        return len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}))
+    if part.function_response:
+        return len(part.function_response.name or "") + len(str((part.function_response.response or {}).get("result", "")))
+    return 0
+
+def messages_chars(messages) -> int:
+    return sum(part_chars(part) for message in messages for part in (message.parts or ()))
+
+class HistoryManager:
+    """Keeps the message list of one think_and_act call under control.
+
+    The last keep_results tool results stay verbatim; older ones above min_chars are
+    replaced in place by a short stub naming the call, so the agent knows what to re-read.
+    When the prefix plus the messages still exceed max_tokens, the kept results are elided
+    too and, last resort, the newest results are truncated. Elisions are permanent, which
+    keeps the sent prefix stable from one turn to the next.
+    """
+
+    def __init__(self, keep_results=KEEP_RESULTS, min_chars=MIN_ELIDED_CHARS, max_tokens=MAX_TURN_TOKENS, estimator=None):
+        self.keep_results = keep_results
+        self.min_chars = min_chars
+        self.max_tokens = max_tokens
+        self.estimator = estimator or ESTIMATOR
+        self.elided = 0
+        self.saved_chars = 0
+
+    def _results(self, messages):
+        """[(message index, part index, call)] of the live (not yet elided) tool results, oldest first."""
+        found = []
+        for i, message in enumerate(messages):
+            if message.role != "user" or not message.parts:
+                continue
+            calls = []
+            if i and messages[i - 1].parts:
+                calls = [p.function_call for p in messages[i - 1].parts if p.function_call]
+            for j, part in enumerate(message.parts):
+                response = part.function_response
+                if response is None or str((response.response or {}).get("result", "")).startswith(ELIDED_MARKER):
+                    continue
+                call = calls[j] if j < len(calls) and calls[j].name == response.name else types.FunctionCall(name=response.name)
+                found.append((i, j, call))
+        return found
+
+    def _replace(self, messages, i, j, result):
+        part = messages[i].parts[j]
+        before = part_chars(part)
+        response = types.FunctionResponse(id=part.function_response.id, name=part.function_response.name, response={"result": result})
+        parts = list(messages[i].parts)
+        parts[j] = types.Part(function_response=response)
+        messages[i] = types.Content(role=messages[i].role, parts=parts)
+        saved = before - part_chars(parts[j])
+        self.saved_chars += saved
+        return saved
+
+    def _elide(self, messages, i, j, call):
+        result = str(messages[i].parts[j].function_response.response.get("result", ""))
+        first = result.strip().splitlines()[0][:PREVIEW_CHARS] if result.strip() else ""
+        stub = f"{ELIDED_MARKER}{len(result) / 1024:.1f} KB result of {describe_call(call)}; re-read if needed] {first}".rstrip()
+        if len(stub) >= len(result):
+            return 0
+        self.elided += 1
+        return self._replace(messages, i, j, stub)
+
+    def prune(self, messages, model=None, reserved_tokens=0) -> int:
+        """Elides old tool results in place; returns the characters saved by this call."""
+        results = self._results(messages)
+        if not results:
+            return 0
+        saved = 0
+        split = max(0, len(results) - self.keep_results)
+        old, kept = results[:split], results[split:]
+        for i, j, call in old:
+            if part_chars(messages[i].parts[j]) > self.min_chars:
+                saved += self._elide(messages, i, j, call)
+
+        limit = int((self.max_tokens - reserved_tokens) * self.estimator.ratio(model))
+        size = messages_chars(messages)
+        if size <= limit:
+            return saved
+        # Over the ceiling: every result the model has already seen goes, oldest first
+        last = len(messages) - 1
+        for i, j, call in [r for r in old + kept if r[0] != last]:
+            if size <= limit:
+                return saved
+            if part_chars(messages[i].parts[j]) > PREVIEW_CHARS * 2:
+                cut = self._elide(messages, i, j, call)
+                saved, size = saved + cut, size - cut
+        # The newest results have not been seen yet: truncate the largest rather than drop them
+        for i, j, call in sorted([r for r in results if r[0] == last], key=lambda r: -part_chars(messages[r[0]].parts[r[1]])):
+            if size <= limit:
+                break
+            result = str(messages[i].parts[j].function_response.response.get("result", ""))
+            marker = f"\n... [TRUNCATED: {len(result) / 1024:.1f} KB result of {describe_call(call)} over the input ceiling; narrow the request]"
+            keep = max(0, len(result) - (size - limit) - len(marker))
+            if keep >= len(result):
+                continue
+            cut = self._replace(messages, i, j, result[:keep] + marker)
+            saved, size = saved + cut, size - cut
+        return saved
@@ -0,0 +1,87 @@
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+class LineIndex:
+    """Byte offset of every line start in a file, valid for one (mtime_ns, size)."""
+    __slots__ = ("mtime_ns", "size", "offsets")
+
+    def __init__(self, mtime_ns, size, offsets):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.offsets = offsets
+
+    @property
+    def total_lines(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, f, st):
+        offsets = array("Q")
+        if st.st_size:
+            offsets.append(0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                pos = buf.find(b"\n")
+                while pos != -1 and pos + 1 < st.st_size:
+                    offsets.append(pos + 1)
+                    pos = buf.find(b"\n", pos + 1)
+        return cls(st.st_mtime_ns, st.st_size, offsets)
+
+class LineIndexCache:
+    """LRU of per-file line indexes so ranged reads seek straight to the bytes they need.
+
+    Lines are split on '\\n' only (a trailing newline does not start a new line), and an
+    index is rebuilt as soon as the file's mtime or size changes.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # abs path -> LineIndex
+        self._lock = threading.Lock()
+
+    def _get(self, f, path):
+        st = os.fstat(f.fileno())
+        with self._lock:
+            index = self._entries.get(path)
+            if index and index.mtime_ns == st.st_mtime_ns and index.size == st.st_size:
+                self._entries.move_to_end(path)
+                return index
+        index = LineIndex.build(f, st)
+        with self._lock:
+            self._entries[path] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, path):
+        with self._lock:
+            self._entries.pop(str(path), None)
+
+    def count_lines(self, path) -> tuple[int, int]:
+        """Returns (total lines, size in bytes)."""
+        path = str(path)
+        with open(path, "rb") as f:
+            index = self._get(f, path)
+        return index.total_lines, index.size
+
+    def read_lines(self, path, start_line: int, end_line: int = None) -> tuple[list[str], int]:
+        """Returns the lines start_line..end_line (1-based, inclusive) and the total line count."""
+        path = str(path)
+        with open(path, "rb") as f:
+            index = self._get(f, path)
+            total = index.total_lines
+            start = max(0, start_line - 1)
+            end = total if end_line is None else min(total, end_line)
+            if start >= end:
+                return [], total
+            byte_start = index.offsets[start]
+            byte_end = index.offsets[end] if end < total else index.size
+            f.seek(byte_start)
+            data = f.read(byte_end - byte_start)
+        # Split like the offsets were counted: only on \n (splitlines() also breaks on \r, \f, \x85, ...)
+        lines = data.decode("utf-8").split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines], total # CRLF files
@@ -0,0 +1,53 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class MissionStore:
+    """Crash-safe mission checkpoints in a WAL-mode SQLite file (one per session root).
+
+    A checkpoint replaces the previous one in a single transaction: the mission cursor,
+    the Blackboard state and one row per agent (token counters).
+    A process killed mid-write leaves the last complete checkpoint readable.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL") # WAL keeps the last commit intact on crashes
+        self._db.execute("CREATE TABLE IF NOT EXISTS mission (key TEXT PRIMARY KEY, value TEXT, updated REAL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS agents (name TEXT PRIMARY KEY, state TEXT, updated REAL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self.saves = 0
+
+    def save(self, mission, blackboard, agents):
+        """Writes a checkpoint. mission and blackboard are JSON-able dicts, agents maps name -> dict."""
+        now = time.time()
+        rows = [("mission", json.dumps(mission), now), ("blackboard", json.dumps(blackboard), now)]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO mission VALUES (?, ?, ?)", rows)
+            self._db.executemany("INSERT OR REPLACE INTO agents VALUES (?, ?, ?)",
+                                 [(name, json.dumps(state), now) for name, state in agents.items()])
+        self.saves += 1
+
+    def load(self):
+        """Returns (mission, blackboard, agents) of the last checkpoint, or None if there is none."""
+        with self._lock:
+            found = dict(self._db.execute("SELECT key, value FROM mission").fetchall())
+            agents = {name: json.loads(state) for name, state in self._db.execute("SELECT name, state FROM agents")}
+        if "mission" not in found:
+            return None
+        return json.loads(found["mission"]), json.loads(found.get("blackboard", "{}")), agents
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM mission")
+            self._db.execute("DELETE FROM agents")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
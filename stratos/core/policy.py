@@ -0,0 +1,338 @@
+import fnmatch
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from collections import Counter
+try:
+    import tomllib
+except ImportError: # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+HAS_TOML = tomllib is not None
+
+ALLOW, ASK, DENY = "allow", "ask", "deny"
+DECISIONS = (ALLOW, ASK, DENY)
+READ_ONLY, MUTATING = "read_only", "mutating"
+
+# Absolutely destructive commands, blocked whatever the policy says
+DANGEROUS_PATTERNS = [
+    r"rm\s+-rf\s+/",       # rm -rf /
+    r"rm\s+-rf\s+~",       # rm -rf ~
+    r"rm\s+-rf\s+\.\.",    # rm -rf ..
+    r"mkfs",               # disk formatting
+    r"dd\s+if=",           # disk writing
+    r":\(\)\{ :\|:& \};:", # fork bomb
+    r">\s+/dev/sd",        # writing to raw device
+    r">\s+/dev/nvme",      # writing to raw device
+    r"chmod\s+777\s+/",    # system-wide permission change
+    r"chown\s+ root:root", # root ownership change
+    r"shutdown", r"reboot", r"init\s+0", r"init\s+6"
+]
+
+# Executables that never modify anything (given the argument checks in classify_segment)
+READ_ONLY_EXECUTABLES = {
+    "ls", "cat", "head", "tail", "grep", "egrep", "fgrep", "rg", "find", "pwd", "echo", "printf", "wc",
+    "which", "type", "tree", "stat", "file", "du", "df", "diff", "cmp", "sort", "uniq", "cut", "tr",
+    "less", "more", "date", "whoami", "uname", "id", "basename", "dirname", "realpath", "readlink",
+    "true", "false", "test", "[", "sed", "awk", "jq", "md5sum", "sha256sum", "nl", "column",
+}
+READ_ONLY_SUBCOMMANDS = {
+    "git": {"status", "log", "diff", "show", "rev-parse", "ls-files", "blame", "describe", "shortlog", "grep", "remote"},
+    "pip": {"list", "show", "freeze", "check"}, "pip3": {"list", "show", "freeze", "check"},
+    "npm": {"ls", "list", "view", "outdated", "explain"}, "cargo": {"tree", "metadata"},
+}
+# Read-only, but they run programs named in project config the agents can write
+# (git: core.fsmonitor, diff.external, filters; cargo: build.rustc-wrapper): never auto-allowed
+PROJECT_CONFIG_EXECUTABLES = {"git", "cargo"}
+VERSION_FLAGS = {"--version", "-V", "version", "--help", "-h"}
+SYSTEM_BIN_DIRS = ("/bin/", "/usr/bin/", "/usr/local/bin/")
+SEPARATORS = {"&&", "||", ";", "|", "&", "\n", "|&", ";;"}
+_SEPARATOR_CHARS = "();<>|&\n"
+
+def compile_patterns(patterns):
+    """One alternation with a named group per pattern, so a single search finds which one hit."""
+    if not patterns:
+        return None, []
+    return re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns))), list(patterns)
+
+def split_command(command: str):
+    """Splits a shell command into argv segments (one per pipeline/list element), or None if unparsable."""
+    lex = shlex.shlex(command, posix=True, punctuation_chars=_SEPARATOR_CHARS)
+    lex.whitespace = " \t\r"
+    lex.whitespace_split = True
+    try:
+        tokens = list(lex)
+    except ValueError:
+        return None
+    segments, current = [], []
+    for tok in tokens:
+        if tok in SEPARATORS or "(" in tok or ")" in tok:
+            if current: segments.append(current)
+            current = []
+        else:
+            current.append(tok)
+    if current: segments.append(current)
+    return segments
+
+_ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+
+def _command_words(argv):
+    """(executable without its directory, its arguments), skipping leading VAR=value words."""
+    i = next((k for k, word in enumerate(argv) if not _ASSIGNMENT_RE.match(word)), len(argv))
+    return (os.path.basename(argv[i]), argv[i + 1:]) if i < len(argv) else ("", [])
+
+def executable_of(argv) -> str:
+    return _command_words(argv)[0]
+
+_REDIRECT_RE = re.compile(r"^[<>&|]*>[<>&|]*$|^<>$")  # >, >>, >|, &>, >&, <>, ...
+_FD_TARGET_RE = re.compile(r"^(\d+-?|-)$")             # >&2, 2>&1, >&- duplicate or close descriptors
+_SED_ADDR = r"(?:\d+|\$|/(?:[^/\\]|\\.)*/)"
+_SED_SAFE_RE = re.compile(                             # Printing commands and s/// without the w/e flags
+    rf"^\s*(?:{_SED_ADDR}(?:\s*,\s*{_SED_ADDR})?\s*!?\s*)?"
+    r"(?:[pdqQ=nNPDhHgGxlz]\d*|s/(?:[^/\\]|\\.)*/(?:[^/\\]|\\.)*/[gpiIm0-9]*)?\s*$")
+FIND_ACTIONS = {"-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprint0", "-fprintf", "-fls"}
+
+def _short_flag(arg, letter) -> bool:
+    """'-o', '-nofile' and other clusters of single-letter options containing the letter."""
+    return arg.startswith("-") and not arg.startswith("--") and letter in arg[1:]
+
+def _operands(args):
+    return [a for a in args if not a.startswith("-") or a == "-"]
+
+def _sed_read_only(args) -> bool:
+    """True only for scripts made of known printing commands (no e/w/r commands, -i or script files)."""
+    scripts, operands, i = [], [], 0
+    while i < len(args):
+        a = args[i]
+        if a.startswith("-i") or a.startswith("--in-place") or a in ("-f", "--file") or a.startswith("--file="):
+            return False
+        if a in ("-e", "--expression"):
+            if i + 1 >= len(args): return False
+            scripts.append(args[i + 1])
+            i += 2
+            continue
+        if a.startswith("--expression="):
+            scripts.append(a.split("=", 1)[1])
+        elif not a.startswith("-") or a == "-":
+            operands.append(a)
+        i += 1
+    if not scripts and operands:
+        scripts.append(operands[0])
+    return all(_SED_SAFE_RE.match(cmd) for script in scripts for cmd in re.split(r"[;\n]", script))
+
+def _writes_output(exe, args) -> bool:
+    """Read-only executables whose options make them write files or run programs."""
+    if exe == "find": return bool(set(args) & FIND_ACTIONS)
+    if exe == "sed": return not _sed_read_only(args)
+    if exe in ("sort", "tree") and any(_short_flag(a, "o") or a.startswith("--output") for a in args): return True
+    if exe == "sort": return any(a.startswith("--compress-program") for a in args)
+    if exe == "uniq": return len(_operands(args)) > 1 # uniq INPUT OUTPUT
+    if exe == "rg": return any(a == "--pre" or a.startswith("--pre=") for a in args)
+    if exe == "date": return any(a in ("-s", "--set") or a.startswith("--set=") for a in args)
+    if exe in ("env", "awk"): return bool(args) # env CMD / awk system() can run anything
+    return False
+
+_UNRESOLVED_CHARS = "$~{`"  # Expanded by the shell: the argument's real target is unknown here
+_GLOB_RE = re.compile(r"[*?\[]")
+
+def _path_candidates(args):
+    """Every argument that may name a file, including values glued to options (--file=x, -fx/y)."""
+    for a in args:
+        if a.startswith("-") and a != "-":
+            if "=" in a: yield a.split("=", 1)[1]
+            if "/" in a: yield a[a.index("/"):]
+        else:
+            yield a
+
+def paths_inside(argv, root) -> bool:
+    """True if every argument that could be a path resolves (symlinks followed) inside root."""
+    root = os.path.realpath(root)
+    for arg in _path_candidates(_command_words(argv)[1]):
+        if arg in ("", "-", "/dev/null"):
+            continue
+        if any(c in arg for c in _UNRESOLVED_CHARS):
+            return False
+        glob = _GLOB_RE.search(arg)
+        if glob:
+            arg = arg[:arg.rfind("/", 0, glob.start()) + 1] or "." # Directory the pattern expands in
+        if os.path.commonpath([root, os.path.realpath(os.path.join(root, arg))]) != root:
+            return False
+    return True
+
+def classify_segment(argv) -> str:
+    exe, args = _command_words(argv)
+    word = next((w for w in argv if not _ASSIGNMENT_RE.match(w)), "")
+    if "/" in word and not word.startswith(SYSTEM_BIN_DIRS):
+        return MUTATING # ./cat, bin/ls: a program from the project, not the system tool
+    for i, tok in enumerate(argv):
+        if _REDIRECT_RE.match(tok):
+            target = argv[i + 1] if i + 1 < len(argv) else ""
+            if target == "/dev/null" or ("&" in tok and _FD_TARGET_RE.match(target)):
+                continue
+            return MUTATING
+    if exe in READ_ONLY_SUBCOMMANDS:
+        if any(a.startswith("--output") for a in args): return MUTATING # git diff/log --output=FILE
+        sub = next((a for a in args if not a.startswith("-")), "")
+        if exe == "git" and sub == "remote" and any(a not in ("-v", "--verbose") for a in args[args.index(sub) + 1:]):
+            return MUTATING # git remote add/remove/set-url ...
+        if sub in READ_ONLY_SUBCOMMANDS[exe] or (not sub and set(args) & VERSION_FLAGS):
+            return READ_ONLY
+        return MUTATING
+    if exe in READ_ONLY_EXECUTABLES:
+        return MUTATING if _writes_output(exe, args) else READ_ONLY
+    if args and all(a in VERSION_FLAGS for a in args):
+        return READ_ONLY # python --version, node -v style probes
+    return MUTATING
+
+def classify(command: str) -> str:
+    """READ_ONLY if every segment of the command is read-only, else MUTATING."""
+    if "`" in command or "$(" in command:
+        return MUTATING # Command substitution can run anything
+    segments = split_command(command)
+    if not segments:
+        return MUTATING
+    return READ_ONLY if all(classify_segment(s) == READ_ONLY for s in segments) else MUTATING
+
+class PolicyRule:
+    """One [[rules]] table: every given condition must match a command segment."""
+
+    def __init__(self, raw, index=0):
+        self.decision = raw.get("decision", ASK)
+        if self.decision not in DECISIONS:
+            raise ValueError(f"Invalid policy decision '{self.decision}' (expected allow, ask or deny)")
+        self.name = raw.get("name") or f"rule#{index}"
+        exe = raw.get("executable")
+        self.executables = {exe} if isinstance(exe, str) else set(exe or ())
+        argv = raw.get("argv")
+        self.argv_globs = [argv] if isinstance(argv, str) else list(argv or ())
+        self.cwd_glob = os.path.expanduser(raw["cwd"]) if raw.get("cwd") else None
+        self.command_class = raw.get("class")
+        self.regex = re.compile(raw["regex"]) if raw.get("regex") else None
+
+    def matches(self, argv, cls, cwd) -> bool:
+        if self.executables and executable_of(argv) not in self.executables: return False
+        joined = " ".join(argv)
+        if self.argv_globs and not any(fnmatch.fnmatchcase(joined, g) for g in self.argv_globs): return False
+        if self.cwd_glob and not fnmatch.fnmatchcase(str(cwd), self.cwd_glob): return False
+        if self.command_class and self.command_class != cls: return False
+        if self.regex and not self.regex.search(joined): return False
+        return True
+
+class PolicyDecision:
+    def __init__(self, decision, rule, command_class, reason=""):
+        self.decision = decision
+        self.rule = rule
+        self.command_class = command_class
+        self.reason = reason
+
+    def __repr__(self):
+        return f"PolicyDecision({self.decision}, rule={self.rule}, class={self.command_class})"
+
+class PolicyEngine:
+    """Declarative allow/ask/deny policy for system commands.
+
+    Config (TOML) keys: 'default' (decision when no rule matches, default 'ask'),
+    'read_only' (decision for read-only commands no rule matched, default 'allow'; it only
+    applies when every path argument stays inside cwd and the executable does not read
+    project config that can name programs, see PROJECT_CONFIG_EXECUTABLES),
+    'deny_patterns' (extra regexes blocked like DANGEROUS_PATTERNS) and [[rules]] with
+    decision/name/executable/argv/cwd/class/regex. Rules are checked per command segment,
+    first match wins, and the strictest segment decides the command (deny > ask > allow).
+    """
+
+    def __init__(self, config=None, log_path=None):
+        config = config or {}
+        self.default = config.get("default", ASK)
+        self.read_only = config.get("read_only", ALLOW)
+        for value in (self.default, self.read_only):
+            if value not in DECISIONS:
+                raise ValueError(f"Invalid policy decision '{value}' (expected allow, ask or deny)")
+        self.rules = [PolicyRule(r, i) for i, r in enumerate(config.get("rules", []), 1)]
+        self.sources = config.get("_sources", [])
+        self._danger_re, self._danger_patterns = compile_patterns(DANGEROUS_PATTERNS + list(config.get("deny_patterns", [])))
+        self.log_path = log_path
+        self.hits = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, paths, log_path=None):
+        """Merges TOML files in increasing priority: later files' rules are checked first and
+        their scalar settings win. Missing files are skipped."""
+        merged = {"rules": [], "deny_patterns": [], "_sources": []}
+        for path in paths:
+            if not path or not os.path.exists(path):
+                continue
+            if not HAS_TOML:
+                raise RuntimeError(f"Cannot read {path}: install 'tomli' (Python < 3.11) to use policy files.")
+            with open(path, "rb") as f:
+                raw = tomllib.load(f)
+            merged["rules"] = list(raw.get("rules", [])) + merged["rules"]
+            merged["deny_patterns"] += list(raw.get("deny_patterns", []))
+            for key in ("default", "read_only"):
+                if key in raw: merged[key] = raw[key]
+            merged["_sources"].append(str(path))
+        return cls(merged, log_path=log_path)
+
+    def dangerous_match(self, command: str):
+        """The forbidden pattern the command matches, or None."""
+        if self._danger_re is None:
+            return None
+        m = self._danger_re.search(command)
+        return self._danger_patterns[int(m.lastgroup[1:])] if m else None
+
+    def _decide_segment(self, argv, cwd):
+        cls = classify_segment(argv)
+        for rule in self.rules:
+            if rule.matches(argv, cls, cwd):
+                return rule.decision, rule.name, cls
+        if cls == READ_ONLY and executable_of(argv) not in PROJECT_CONFIG_EXECUTABLES and paths_inside(argv, cwd or os.getcwd()):
+            return self.read_only, "read_only", cls
+        return self.default, "default", cls
+
+    def evaluate(self, command: str, cwd="") -> PolicyDecision:
+        pattern = self.dangerous_match(command)
+        if pattern:
+            decision = PolicyDecision(DENY, "dangerous", MUTATING, f"matches forbidden pattern '{pattern}'")
+        else:
+            segments = split_command(command)
+            if not segments:
+                decision = PolicyDecision(self.default, "default", MUTATING, "unparsable command")
+            else:
+                substitution = "`" in command or "$(" in command
+                rank = {ALLOW: 0, ASK: 1, DENY: 2}
+                worst = None
+                for argv in segments:
+                    d, rule, cls = self._decide_segment(argv, cwd)
+                    if substitution and rule == "read_only":
+                        d, rule, cls = self.default, "default", MUTATING
+                    if worst is None or rank[d] > rank[worst[0]]:
+                        worst = (d, rule, cls, " ".join(argv))
+                d, rule, cls, segment = worst
+                decision = PolicyDecision(d, rule, classify(command), f"segment '{segment}' -> {rule}")
+        self._record(command, decision)
+        return decision
+
+    def _record(self, command, decision):
+        with self._lock:
+            self.hits[(decision.rule, decision.decision)] += 1
+            if not self.log_path:
+                return
+            entry = {"ts": time.time(), "command": command, "decision": decision.decision,
+                     "rule": decision.rule, "class": decision.command_class}
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError:
+                pass
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.hits:
+                return "POLICY: no command evaluated."
+            parts = [f"{rule}:{decision}={n}" for (rule, decision), n in self.hits.most_common()]
+        return "POLICY HITS: " + ", ".join(parts)
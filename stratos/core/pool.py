@@ -1,77 +1,304 @@
 import datetime
 import difflib
+import os
+import shutil
+import threading
+from types import MappingProxyType
+from .archiver import ARCHIVED_KEYS, GeminiSummarizer, RollingArchiver
+from .context_budget import ContextBudgeter, Section, format_usage, state_budget
+from .diff_compactor import DiffCompactor
+from .retrieval import DEFAULT_TOP_K
+from .git_diff import FileChange, GitDiffBackend
+from .mission_store import MissionStore
+
+PHASES = ("LEADERSHIP", "DESIGN", "EXPERTS", "IMPLEMENTATION", "QA", "FINAL_CHECK") # One broadcast_task iteration
+MAX_GENERATIONS = 64 # Baselines kept for lagging agent cursors
+MAX_TEAM_LOG_LINES = 8
+TEAM_LOG = "TEAM_LOG" # Version keys of the non-data parts of the board
+ARCHIVE = "COMPRESSED_ARCHIVE"
+
+class VersionConflict(Exception):
+    """A compare-and-set write found the key at another version than expected."""
+    def __init__(self, key, expected, actual):
+        super().__init__(f"{key} is at version {actual}, expected {expected}")
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+
+class BlackboardView:
+    """Consistent read-only view of the Blackboard at one version (no copy: writers copy on write)."""
+    __slots__ = ("version", "data", "versions", "team_log", "compressed_archive")
+
+    def __init__(self, version, data, versions, team_log, compressed_archive):
+        self.version = version
+        self.data = MappingProxyType(data)
+        self.versions = MappingProxyType(versions)
+        self.team_log = team_log
+        self.compressed_archive = compressed_archive
 
 class Blackboard:
+    """Shared state of the agents.
+
+    Every write bumps the board version and records it as the key's version; post() can
+    compare-and-set on it. data, versions and team_log are copied on write, never mutated,
+    so view() hands out consistent snapshots without copying. wait_for_change() blocks
+    until a newer version is published.
+    """
+
     def __init__(self, sandbox, logger):
         self.data = {
             "TODO_LIST": "1. INITIAL_ANALYSIS (Pending)",
             "MASTER_PLAN": "No plan defined yet."
         }
-        self.team_log = []
+        self.team_log = ()
+        self.version = 0
+        self.versions = {key: 0 for key in self.data} # key (or TEAM_LOG / ARCHIVE) -> version of its last write
         self.sandbox = sandbox
         self.logger = logger
-        self.compressed_archive = ""
-        self.last_snapshot = {}
+        self.blobs = sandbox.blob_store
+        self.compressed_archive = "" # Rolling summary of folded team logs and plans, see RollingArchiver
+        self.superseded = () # (key, old value) of replaced ARCHIVED_KEYS, waiting to be archived
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.last_snapshot = {} # path -> blob digest
+        self.last_generation = 0
+        self.diff_backend = None # Optional GitDiffBackend, see AIPool.enable_git_diff
+        self.last_tree = None # Git tree id of last_snapshot (git backend only)
+        self.compactor = DiffCompactor()
+        self.budgeter = ContextBudgeter()
+        self.retrieval_k = DEFAULT_TOP_K # Chunks retrieved per action (0 disables retrieval)
+        self.last_context_usage = {} # section -> (tokens used, tokens wanted) of the last assembled context
+        self.generations = {} # generation -> (snapshot, git tree id) still needed by an agent cursor
         self.last_cycle_errors = ""
 
-    def post(self, key, value):
-        self.data[key] = value
+    def _publish(self, *keys):
+        """Bumps the board version for keys and wakes the waiters (lock held)."""
+        self.version += 1
+        self.versions = {**self.versions, **{key: self.version for key in keys}}
+        self.changed.notify_all()
+        return self.version
+
+    def post(self, key, value, expected_version=None):
+        """Sets key and returns its new version. With expected_version, raises VersionConflict
+        unless the key is still at that version (0 for a key never written)."""
+        with self.lock:
+            if expected_version is not None and self.versions.get(key, 0) != expected_version:
+                raise VersionConflict(key, expected_version, self.versions.get(key, 0))
+            old = self.data.get(key)
+            # Version 0 is the initial placeholder ("No plan defined yet."), nothing worth archiving
+            if key in ARCHIVED_KEYS and old and old != value and self.versions.get(key, 0):
+                self.superseded += ((key, old),) # Folded into the archive by the RollingArchiver
+            self.data = {**self.data, key: value}
+            return self._publish(key)
+
+    def get(self, key, default=None):
+        """Returns (value, version) of key."""
+        with self.lock:
+            return self.data.get(key, default), self.versions.get(key, 0)
+
+    def update(self, key, fn, default=None, retries=8):
+        """Read-modify-write of key with fn(old value) -> new value, retried on concurrent writes."""
+        for _ in range(retries):
+            value, version = self.get(key, default)
+            try:
+                return self.post(key, fn(value), expected_version=version)
+            except VersionConflict:
+                continue
+        raise VersionConflict(key, version, self.versions.get(key, 0))
 
     def post_discussion(self, agent_name, message):
         now = datetime.datetime.now().strftime("%H:%M:%S")
-        self.team_log.append(f"[{now}] [{agent_name}] {message}")
+        with self.lock:
+            self.team_log += (f"[{now}] [{agent_name}] {message}",)
+            return self._publish(TEAM_LOG)
+
+    def fold_history(self, log_count, superseded_count, archive):
+        """Replaces the oldest log_count team log entries and superseded versions by the new archive."""
+        with self.lock:
+            self.team_log = self.team_log[log_count:]
+            self.superseded = self.superseded[superseded_count:]
+            self.compressed_archive = archive
+            return self._publish(TEAM_LOG, ARCHIVE)
+
+    def export_state(self) -> dict:
+        """JSON-able copy of the shared state (file baselines are rebuilt from disk on resume)."""
+        with self.lock:
+            return {
+                "data": self.data, "versions": self.versions, "version": self.version,
+                "team_log": list(self.team_log), "superseded": [list(s) for s in self.superseded],
+                "compressed_archive": self.compressed_archive, "last_cycle_errors": self.last_cycle_errors,
+            }
+
+    def restore_state(self, state):
+        with self.lock:
+            self.data = dict(state.get("data", self.data))
+            self.versions = dict(state.get("versions", {}))
+            self.team_log = tuple(state.get("team_log", ()))
+            self.superseded = tuple(tuple(s) for s in state.get("superseded", ()))
+            self.compressed_archive = state.get("compressed_archive", "")
+            self.last_cycle_errors = state.get("last_cycle_errors", "")
+            self.version = max(state.get("version", 0), self.version)
+            self._publish()
+
+    def view(self) -> BlackboardView:
+        with self.lock:
+            return BlackboardView(self.version, self.data, self.versions, self.team_log, self.compressed_archive)
+
+    def wait_for_change(self, since_version, keys=None, timeout=None):
+        """Blocks until a write newer than since_version (to one of keys, if given). Returns the
+        board version, or None on timeout."""
+        def newer():
+            if keys is None:
+                return self.version > since_version
+            return any(self.versions.get(k, 0) > since_version for k in keys)
+        with self.changed:
+            return self.version if self.changed.wait_for(newer, timeout) else None
+
+    def set_baseline(self, snapshot, generation, dirty=None):
+        """Makes snapshot the reference of the next compute_diff (dirty: paths changed since the last baseline)."""
+        with self.lock:
+            if self.diff_backend is not None:
+                try:
+                    self.last_tree = self.diff_backend.sync(self._relevant(snapshot, dirty if self.last_tree else None))
+                except Exception as e:
+                    self._disable_git(e)
+            self.last_snapshot = snapshot
+            self.last_generation = generation
+            self.generations[generation] = (snapshot, self.last_tree)
+            while len(self.generations) > MAX_GENERATIONS:
+                del self.generations[next(iter(self.generations))]
 
-    def compute_diff(self, new_snapshot):
-        self.logger.debug(f"COMPUTING_DIFF BETWEEN {len(self.last_snapshot)} AND {len(new_snapshot)} FILES")
-        diff_report = []
-        old_files = set(self.last_snapshot.keys())
+    def _base(self, since):
+        """Snapshot, tree and generation to diff from: the one of 'since' if still kept, else the latest baseline."""
+        with self.lock:
+            if since is None:
+                return self.last_snapshot, self.last_tree, self.last_generation
+            if since not in self.generations: # Collected past MAX_GENERATIONS: fall back to the oldest kept
+                since = next((g for g in self.generations if g >= since), self.last_generation)
+            snapshot, tree = self.generations.get(since, (self.last_snapshot, self.last_tree))
+            return snapshot, tree, since
+
+    def diff_for(self, agent):
+        """Diff of everything that changed since the agent's last turn (its generation cursor)."""
+        index = self.sandbox.snapshot_index
+        snapshot = self.sandbox.get_snapshot()
+        since = self._base(agent.seen_generation)[2]
+        return self.compute_diff(snapshot, dirty=index.changed_since(since), bulk=index.bulk_since(since), since=since)
+
+    def mark_seen(self, agent, generation=None):
+        """Moves the agent's cursor to generation (the latest baseline by default)."""
+        agent.seen_generation = self.last_generation if generation is None else generation
+
+    def collect_generations(self, cursors):
+        """Drops the generations every cursor has passed and the blobs only they referenced."""
+        live = [g for g in cursors if g is not None]
+        with self.lock:
+            oldest = min(live, default=self.last_generation)
+            for generation in [g for g in self.generations if g < oldest and g != self.last_generation]:
+                del self.generations[generation]
+            digests = set(self.last_snapshot.values())
+            for snapshot, _ in self.generations.values():
+                digests.update(snapshot.values())
+        return self.blobs.collect(digests)
+
+    def _relevant(self, new_snapshot, dirty, base=None):
+        paths = set(self.last_snapshot if base is None else base) | set(new_snapshot)
+        return sorted(paths & dirty if dirty is not None else paths)
+
+    def _disable_git(self, error):
+        self.logger.debug(f"GIT_DIFF_FALLBACK: {error}")
+        self.diff_backend.close()
+        self.diff_backend = None
+        self.last_tree = None
+
+    def _git_changes(self, base, base_tree, new_snapshot, dirty):
+        if dirty is None: # No index dirty set: let git status find what moved since the last sync
+            dirty = set(p.replace("/", os.sep) for p in self.diff_backend.status())
+            dirty |= {p for p in set(base) | set(self.last_snapshot) if base.get(p) != new_snapshot.get(p)}
+        new_tree = self.diff_backend.sync(self._relevant(new_snapshot, dirty, base))
+        return self.diff_backend.changes(base_tree, new_tree)
+
+    def _difflib_changes(self, base, new_snapshot, dirty):
+        old_files = set(base.keys())
         new_files = set(new_snapshot.keys())
-        for f in new_files - old_files:
-            diff_report.append(f"[NEW] {f}")
-        for f in old_files - new_files:
-            diff_report.append(f"[DEL] {f}")
+        if dirty is not None:
+            old_files &= dirty
+            new_files &= dirty
+        changes = [FileChange("A", f, added=self.blobs.get(new_snapshot[f]).count("\n") + 1) for f in new_files - old_files]
+        changes += [FileChange("D", f, deleted=self.blobs.get(base[f]).count("\n") + 1) for f in old_files - new_files]
         for f in old_files & new_files:
-            if self.last_snapshot[f] != new_snapshot[f]:
-                diff = difflib.unified_diff(
-                    self.last_snapshot[f].splitlines(),
-                    new_snapshot[f].splitlines(),
+            if base[f] != new_snapshot[f]:
+                lines = list(difflib.unified_diff(
+                    self.blobs.get(base[f]).splitlines(),
+                    self.blobs.get(new_snapshot[f]).splitlines(),
                     fromfile=f"a/{f}", tofile=f"b/{f}", lineterm=""
-                )
-                diff_report.append(f"[MOD] {f}:\n" + "\n".join(list(diff)))
-        return "\n".join(diff_report) if diff_report else "NO_CHANGES"
-
-    def get_all_context(self, current_diff=""):
-        real_structure = self.sandbox.get_structure_tree()
-        context = ""
-        if self.compressed_archive:
-            context += f"COMPRESSED_ARCHIVE:\n{self.compressed_archive}\n\n"
-        if self.last_cycle_errors:
-            context += f"POST_MORTEM_ANALYSIS:\n{self.last_cycle_errors}\n\n"
-            
-        # Avoid recursion by not calling get_all_context inside needs_compression
-        # We'll just estimate the size based on the current components
-        estimated_size = len(real_structure) + len(current_diff) + sum(len(str(v)) for v in self.data.values()) + sum(len(l) for l in self.team_log)
-        
-        if estimated_size > 60000:
-            self.logger.warning("Context size high. Compressing context...")
-            recent_logs = "\n".join(self.team_log[-3:])
-            real_structure = real_structure[:2000] + "\n... [TRUNCATED]"
-        else:
-            recent_logs = "\n".join(self.team_log[-8:])
-            
-        context += f"REAL_FILESYSTEM_STATE:\n{real_structure}\n\n"
-        if current_diff:
-            context += f"RECENT_CHANGES (DIFF):\n{current_diff}\n\n"
-        context += "ACTIVE_PROJECT_DATA (GLOBAL_BLACKBOARD):\n"
-        for k, v in self.data.items():
-            val = str(v)[:500] + "..." if len(str(v)) > 500 else v
-            context += f"  - {k}: {val}\n"
-        context += f"\nRECENT_TEAM_LOGS:\n{recent_logs}"
+                ))
+                added = sum(1 for l in lines if l.startswith("+") and not l.startswith("+++"))
+                deleted = sum(1 for l in lines if l.startswith("-") and not l.startswith("---"))
+                changes.append(FileChange("M", f, added=added, deleted=deleted, patch="\n".join(lines)))
+        return sorted(changes, key=lambda c: c.path)
+
+    def compute_diff(self, new_snapshot, dirty=None, bulk=None, since=None):
+        """Diffs new_snapshot against last_snapshot (or the snapshot of generation 'since').
+        If a dirty set is given, only those paths are compared.
+        Directories in bulk (dir -> event count) are reported as a single line instead of per file.
+        Uses the git backend when available (renames detected), difflib over the blob store otherwise.
+        The report is budgeted by the compactor; summarized hunks stay reachable through get_full_diff."""
+        base, base_tree, _ = self._base(since)
+        self.logger.debug(f"COMPUTING_DIFF BETWEEN {len(base)} AND {len(new_snapshot)} FILES")
+        changes = None
+        if self.diff_backend is not None and base_tree:
+            try:
+                changes = self._git_changes(base, base_tree, new_snapshot, dirty)
+            except Exception as e:
+                self._disable_git(e)
+        if changes is None:
+            changes = self._difflib_changes(base, new_snapshot, dirty)
+
+        header = [f"[BULK] {d}/ ({count} changes coalesced)" for d, count in (bulk or {}).items()]
+        prefixes = tuple(d + os.sep for d in (bulk or {}))
+        if prefixes:
+            changes = [c for c in changes if not (c.path.replace("/", os.sep).startswith(prefixes) and
+                       (not c.old_path or c.old_path.replace("/", os.sep).startswith(prefixes)))]
+        return self.compactor.render(changes, header=header)
+
+    def get_full_diff(self, handle, path=None):
+        """Full hunks of a file (or of every file) summarized in the diff report 'handle'."""
+        return self.compactor.full_diff(handle, path)
+
+    def get_all_context(self, current_diff="", agent=None, task=None):
+        """Assembles the STATE block within the token budget of the agent's model (see context_budget).
+        With a task, the workspace chunks most relevant to it and to the TODO_LIST are included."""
+        if agent is not None and not current_diff:
+            current_diff = self.diff_for(agent)
+        view = self.view()
+        relevant = ""
+        if task and self.retrieval_k:
+            relevant = self.sandbox.retrieve(f"{task}\n{view.data.get('TODO_LIST', '')}", k=self.retrieval_k)
+        model = getattr(agent, "model_id", None)
+        data = "\n".join(f"  - {k}: {str(v)[:500] + '...' if len(str(v)) > 500 else v}" for k, v in view.data.items())
+        team_log = view.team_log[-MAX_TEAM_LOG_LINES:]
+        sections = [
+            Section("archive", "COMPRESSED_ARCHIVE:", view.compressed_archive, priority=6, share=0.15),
+            Section("post_mortem", "POST_MORTEM_ANALYSIS:", self.last_cycle_errors, priority=1, share=0.15),
+            Section("tree", "REAL_FILESYSTEM_STATE:", self.sandbox.get_structure_tree(), priority=5, share=0.25),
+            Section("diff", "RECENT_CHANGES (DIFF):", current_diff, priority=2, share=0.4),
+            Section("relevant", "RELEVANT_CODE (best matches for the task, use read_file for more):", relevant, priority=3, share=0.2),
+            Section("data", "ACTIVE_PROJECT_DATA (GLOBAL_BLACKBOARD):", data, priority=0, share=0.15),
+            Section("team_log", "RECENT_TEAM_LOGS:", "\n".join(team_log), priority=4, share=0.1, keep="tail"),
+        ]
+        budget = state_budget(model)
+        context, usage = self.budgeter.assemble(sections, budget, model)
+        self.last_context_usage = usage
+        name = getattr(agent, "name", "-")
+        self.logger.debug(f"CONTEXT_BUDGET {name} {sum(u for u, _ in usage.values())}/{budget} tokens: {format_usage(usage)}")
+        trimmed = [n for n, (used, wanted) in usage.items() if used < wanted]
+        if trimmed:
+            self.logger.warning(f"Context budget reached. Trimmed: {', '.join(trimmed)}")
         return context
 
     def needs_compression(self, threshold=60000):
-        # This method is now deprecated as we estimate size directly in get_all_context
-        # to avoid infinite recursion.
+        # Deprecated: get_all_context now fits every section into a token budget itself.
         return False
 
 class AIPool:
@@ -83,11 +310,69 @@ class AIPool:
         self.agents = {}
         self.specialists = {}
         self.blackboard = Blackboard(sandbox, logger)
+        if shutil.which("git"):
+            self.blackboard.diff_backend = GitDiffBackend(sandbox.root_dir)
         self.models = {
             "HEAVY": "gemini-3.1-pro-preview", 
             "MEDIUM": "gemini-2.5-pro",        
             "LIGHT": "gemini-2.5-flash"        
         }
+        self.archiver = RollingArchiver(self.blackboard, GeminiSummarizer(api_key, self.models["LIGHT"], logger), logger)
+        self.store = None # Optional MissionStore (see enable_checkpoints)
+        self.cursor = {"task": None, "iteration": 0, "phase": None, "ready": False} # Last completed phase
+        self.specialist_specs = {} # role_name -> request_specialist kwargs, to recruit them again on resume
+
+    def log_token_usage(self):
+        """Logs cached vs uncached input tokens per agent (the prompt cache's savings)."""
+        for agent in self._all_agents():
+            stats = agent.token_stats()
+            self.logger.debug(f"TOKENS {agent.name}: input {stats['uncached_input']} uncached + {stats['cached_input']} cached, output {stats['output']}")
+
+    def close(self):
+        """Releases resources held outside the sandbox (private diff repository, prompt caches) and lets the last fold finish."""
+        self.log_token_usage()
+        for cache in {id(a.prompt_cache): a.prompt_cache for a in self._all_agents()}.values(): # Shared by the agents
+            cache.close()
+        self.archiver.close()
+        if self.blackboard.diff_backend is not None:
+            self.blackboard.diff_backend.close()
+        if self.store is not None:
+            self.store.close()
+
+    def enable_checkpoints(self, path):
+        """Checkpoints the mission into a SQLite file (e.g. <session_root>/mission.sqlite3) after every action."""
+        self.store = MissionStore(path)
+
+    def checkpoint(self):
+        if self.store is None:
+            return
+        try:
+            mission = {**self.cursor, "project": self.project_info, "specialists": self.specialist_specs}
+            self.store.save(mission, self.blackboard.export_state(), {a.name: a.export_state() for a in self._all_agents()})
+        except Exception as e:
+            self.logger.debug(f"CHECKPOINT_FAILED: {e}")
+
+    def _complete_phase(self, iteration, phase, ready=False):
+        self.cursor.update(iteration=iteration, phase=phase, ready=ready)
+        self.checkpoint()
+
+    def resume(self, checkpoint=None):
+        """Restores the last checkpoint (after setup_default_pool). Returns its mission cursor, None without one."""
+        checkpoint = checkpoint or (self.store.load() if self.store else None)
+        if checkpoint is None:
+            return None
+        mission, board, agents = checkpoint
+        for spec in mission.get("specialists", {}).values():
+            self.request_specialist(**spec)
+        self.blackboard.restore_state(board)
+        for agent in self._all_agents():
+            if agent.name in agents:
+                agent.restore_state(agents[agent.name])
+        self.cursor.update({k: mission[k] for k in ("task", "iteration", "phase", "ready") if k in mission})
+        return dict(self.cursor)
+
+    def _all_agents(self):
+        return list(self.agents.values()) + list(self.specialists.values())
 
     def request_specialist(self, **kwargs) -> str:
         role_name = kwargs.get('role_name')
@@ -101,44 +386,31 @@ class AIPool:
             return f"INFO: {role_name} already exists."
         
         from .agent import AIAgent
-        from google.genai import types
         self.logger.info(f"DYNAMIC_RECRUITMENT: {role_name}")
         
+        # Specialist must use the same protected tools as standard agents
         new_agent = AIAgent(
             f"EXPERT_{role_name}", role_description, self.sandbox, self.logger, 
             self.api_key, self.project_info, pool_callback=self.request_specialist,
-            model_id=model_id
+            model_id=model_id, extra_tools=self._pool_tools()
         )
         
-        # Specialist must use the same protected tools as standard agents
-        def tool_update_todo(todo_content):
-            self.blackboard.post("TODO_LIST", todo_content)
-            self.logger.set_todo(todo_content)
-            return f"SUCCESS: Global TODO_LIST updated."
-            
-        new_agent.tool_map["update_todo_list"] = tool_update_todo
-        
-        # Re-generate Function Declarations with the full (wrapped) tool_map
-        from google.genai import types
-        new_agent.tools = [types.FunctionDeclaration(
-            name=n,
-            description=f.__doc__ or "Execute action",
-            parameters=new_agent._get_tool_schema(n)
-        ) for n, f in new_agent.tool_map.items()]
-        
         self.specialists[role_name] = new_agent
+        self.specialist_specs[role_name] = {"role_name": role_name, "role_description": role_description, "weight": weight}
         self.blackboard.post_discussion("SYSTEM", f"New specialist joined: {role_name}")
         return f"SUCCESS: {role_name} is now available."
 
-    def setup_default_pool(self):
-        from .agent import AIAgent
-        
-        # Shared tool to update the TODO list on the blackboard
+    def _pool_tools(self):
+        """Tools every agent gets from the pool, on top of its own (the TODO list lives on the blackboard)."""
         def tool_update_todo(todo_content):
             self.blackboard.post("TODO_LIST", todo_content)
             self.logger.set_todo(todo_content)
             return f"SUCCESS: Global TODO_LIST updated."
+        return {"update_todo_list": tool_update_todo, "get_full_diff": self.blackboard.get_full_diff}
 
+    def setup_default_pool(self):
+        from .agent import AIAgent
+        
         roles = {
             "MANAGER": {"desc": "PROJECT_LEADER: Define tech stack, roadmap, and maintain the TODO_LIST. You are the boss.", "model": self.models["HEAVY"]},
             "ARCHITECT": {"desc": "SYSTEM_DESIGNER: Create file structures and specifications based on PM roadmap.", "model": self.models["MEDIUM"]},
@@ -150,33 +422,30 @@ class AIPool:
             agent = AIAgent(
                 f"AGENT_{role}", data["desc"], self.sandbox, self.logger, 
                 self.api_key, self.project_info, pool_callback=self.request_specialist,
-                model_id=data["model"]
+                model_id=data["model"], extra_tools=self._pool_tools()
             )
-            # Override or manually inject the blackboard tool
-            agent.tool_map["update_todo_list"] = tool_update_todo
-            # Regenerate tool definitions for the model
-            from google.genai import types
-            agent.tools = [types.FunctionDeclaration(
-                name=name,
-                description=func.__doc__ or "Execute action",
-                parameters=agent._get_tool_schema(name)
-            ) for name, func in agent.tool_map.items()]
-            
             self.agents[role] = agent
         self.sandbox.git_init()
 
     def _execute_agent_action(self, agent, task):
         self.logger.agent_takeover(agent.name, agent.role)
         self.logger.wait_if_paused() # CHECK BEFORE STARTING ACTION
-        if not self.blackboard.last_snapshot:
-            self.blackboard.last_snapshot = self.sandbox.get_snapshot()
-        current_state = self.sandbox.get_snapshot()
-        diff = self.blackboard.compute_diff(current_state)
+        index = self.sandbox.snapshot_index
+        if not self.blackboard.generations:
+            self.blackboard.set_baseline(self.sandbox.get_snapshot(), index.generation)
+        # The diff covers everything since this agent's own last turn, not just the previous action
         result = agent.think_and_act(
             task, 
-            context=self.blackboard.get_all_context(current_diff=diff)
+            context=self.blackboard.get_all_context(agent=agent, task=task)
         )
-        self.blackboard.last_snapshot = self.sandbox.get_snapshot()
+        new_state = self.sandbox.get_snapshot()
+        self.blackboard.set_baseline(new_state, index.generation, dirty=index.changed_since(self.blackboard.last_generation))
+        self.blackboard.mark_seen(agent)
+        # Baselines (and their blobs) that no agent cursor still points before are released
+        self.blackboard.collect_generations(a.seen_generation for a in self._all_agents())
+        # Old team logs and superseded plans are summarized off the critical path
+        self.archiver.schedule()
+        self.checkpoint()
         return result
 
     def _handle_interjection(self):
@@ -189,14 +458,24 @@ class AIPool:
             self.blackboard.post("USER_ORDER", order)
             self.logger.prompt_input = "" # Clear buffer
 
-    def broadcast_task(self, task):
+    def broadcast_task(self, task, resume=None):
+        """Runs the team workflow. resume: mission cursor of a checkpoint, its completed phases are skipped."""
         self.logger.section("HIERARCHICAL_TEAM_WORKFLOW")
         max_iterations = 6
-        iteration = 0
-        is_ready = False
+        iteration, done_phase, is_ready = 0, None, False
+        if resume:
+            iteration, done_phase, is_ready = resume["iteration"], resume["phase"], resume.get("ready", False)
+            if done_phase == "DOCS":
+                return "SUCCESS"
+            self.logger.info(f"RESUMING_MISSION: iteration {iteration}, after {done_phase or 'start'}")
+        self.cursor.update(task=task, iteration=iteration, phase=done_phase, ready=is_ready)
 
         while not is_ready and iteration < max_iterations:
-            iteration += 1
+            if done_phase in (None, PHASES[-1]):
+                iteration += 1
+                done_phase = None
+            skip = PHASES.index(done_phase) if done_phase else -1
+            pending = lambda phase: PHASES.index(phase) > skip
             self.logger.start_cycle(iteration)
             
             # Update tokens metric on dashboard
@@ -205,41 +484,54 @@ class AIPool:
             self.logger.update_tokens(total_tokens)
             
             # 1. PM Decision
-            pm_instruction = (
-                f"LEADERSHIP_PHASE: Analyze the goal '{task}' and current state. "
-                "1. Choose the language and tech stack. "
-                "2. Update the 'MASTER_PLAN' key on the blackboard. "
-                "3. Update the 'TODO_LIST' key with clear, actionable steps. "
-                "4. Assign specific focus for this cycle."
-            )
-            strategy = self._execute_agent_action(self.agents["MANAGER"], pm_instruction)
-            self.blackboard.post("MASTER_PLAN", strategy)
-            self._handle_interjection()
+            if pending("LEADERSHIP"):
+                pm_instruction = (
+                    f"LEADERSHIP_PHASE: Analyze the goal '{task}' and current state. "
+                    "1. Choose the language and tech stack. "
+                    "2. Update the 'MASTER_PLAN' key on the blackboard. "
+                    "3. Update the 'TODO_LIST' key with clear, actionable steps. "
+                    "4. Assign specific focus for this cycle."
+                )
+                strategy = self._execute_agent_action(self.agents["MANAGER"], pm_instruction)
+                self.blackboard.post("MASTER_PLAN", strategy)
+                self._handle_interjection()
+                self._complete_phase(iteration, "LEADERSHIP")
 
             # 2. Architect Design
-            plan = self._execute_agent_action(self.agents["ARCHITECT"], "DESIGN_STRATEGY: Follow PM's roadmap. Define files and logic.")
-            self.blackboard.post("DETAILED_SPECS", plan)
-            self._handle_interjection()
+            if pending("DESIGN"):
+                plan = self._execute_agent_action(self.agents["ARCHITECT"], "DESIGN_STRATEGY: Follow PM's roadmap. Define files and logic.")
+                self.blackboard.post("DETAILED_SPECS", plan)
+                self._handle_interjection()
+                self._complete_phase(iteration, "DESIGN")
 
             # 3. Execution
-            for name, specialist in list(self.specialists.items()):
-                self._execute_agent_action(specialist, f"EXPERT_CONTRIBUTION: {name}. Consult TODO_LIST.")
-                self._handle_interjection()
+            if pending("EXPERTS"):
+                for name, specialist in list(self.specialists.items()):
+                    self._execute_agent_action(specialist, f"EXPERT_CONTRIBUTION: {name}. Consult TODO_LIST.")
+                    self._handle_interjection()
+                self._complete_phase(iteration, "EXPERTS")
 
-            self._execute_agent_action(self.agents["CODER"], "IMPLEMENTATION: Execute current pending tasks in TODO_LIST.")
-            self._handle_interjection()
+            if pending("IMPLEMENTATION"):
+                self._execute_agent_action(self.agents["CODER"], "IMPLEMENTATION: Execute current pending tasks in TODO_LIST.")
+                self._handle_interjection()
+                self._complete_phase(iteration, "IMPLEMENTATION")
             
             # 4. Verification
-            self._execute_agent_action(self.agents["REVIEWER"], "QA_AND_TEST_RUN: Verify everything works.")
-            self._handle_interjection()
+            if pending("QA"):
+                self._execute_agent_action(self.agents["REVIEWER"], "QA_AND_TEST_RUN: Verify everything works.")
+                self._handle_interjection()
+                self._complete_phase(iteration, "QA")
             
             vote = self._execute_agent_action(self.agents["REVIEWER"], "FINAL_STATUS_CHECK")
             
             is_ready = "STATUS: READY" in vote.upper()
+            done_phase = PHASES[-1]
+            self._complete_phase(iteration, done_phase, ready=is_ready)
             if is_ready: break
 
         import threading
         doc_thread = threading.Thread(target=self._execute_agent_action, args=(self.agents["DOCUMENTATION"], "FINAL_DOCS"))
         doc_thread.start()
         doc_thread.join()
+        self._complete_phase(iteration, "DOCS", ready=is_ready)
         return "SUCCESS"
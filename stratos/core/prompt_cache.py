@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from google.genai import types
+from .context_budget import ESTIMATOR
+from .tools import TOOLS
+
+DEFAULT_CACHE_TTL = 3600    # Seconds a server-side cache lives
+REFRESH_MARGIN = 300        # Extend a cache this long before it expires
+MIN_CACHE_TOKENS = 1024     # Below this the API refuses to create a cache
+FAILURE_BACKOFF = 600       # Seconds before retrying a prefix whose cache could not be created
+
+class PromptCacheManager:
+    """Server-side context caches for the static prompt prefix (system instruction + tools).
+
+    One cache per (model, prefix hash): get() creates it on first use, reuses it, and
+    extends its TTL shortly before expiry. Any failure makes get() return None, and the
+    caller then sends the prefix inline.
+    """
+
+    def __init__(self, client, ttl=DEFAULT_CACHE_TTL, refresh_margin=REFRESH_MARGIN, min_tokens=MIN_CACHE_TOKENS, logger=None):
+        self.client = client
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.logger = logger
+        self._entries = {}  # key -> [cache name, expires at]
+        self._failed = {}   # key -> time of the failure
+        self._pending = {}  # key -> Event set when the thread creating/refreshing its cache is done
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "refreshed": 0, "failed": 0}
+
+    @staticmethod
+    def _prefix(system_instruction, tools) -> str:
+        return system_instruction + TOOLS.fingerprint(tools)
+
+    def _debug(self, message):
+        if self.logger: self.logger.debug(message)
+
+    def get(self, model, system_instruction, tools):
+        """Name of a live cache holding the prefix, or None to send it inline.
+
+        The create/update calls run outside the lock: one thread per key makes them while
+        the other callers of that key wait on its in-flight Event, other keys are not blocked.
+        """
+        prefix = self._prefix(system_instruction, tools)
+        key = (model, hashlib.sha256(prefix.encode()).hexdigest())
+        while True:
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] - now > self.refresh_margin:
+                    self.stats["reused"] += 1
+                    return entry[0]
+                if now - self._failed.get(key, -FAILURE_BACKOFF) < FAILURE_BACKOFF:
+                    return None
+                if entry is None and ESTIMATOR.estimate(prefix, model) < self.min_tokens:
+                    return None
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait() # Another agent is creating or refreshing this cache
+        try:
+            return self._renew(key, entry, model, system_instruction, tools, now)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def _renew(self, key, entry, model, system_instruction, tools, now):
+        """Extends entry's TTL, or creates the cache (the caller owns key's in-flight Event)."""
+        if entry is not None:
+            try:
+                self.client.caches.update(name=entry[0], config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s"))
+                with self._lock:
+                    entry[1] = now + self.ttl
+                    self.stats["refreshed"] += 1
+                return entry[0]
+            except Exception as e:
+                self._debug(f"PROMPT_CACHE_REFRESH_FAILED: {e}")
+                with self._lock:
+                    if self._entries.get(key) is entry: del self._entries[key]
+        try:
+            cache = self.client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                tools=[TOOLS.as_tool(tools)] if tools else None,
+                ttl=f"{self.ttl}s", display_name=f"stratos-{key[1][:12]}"))
+        except Exception as e:
+            with self._lock:
+                self._failed[key] = now
+                self.stats["failed"] += 1
+            self._debug(f"PROMPT_CACHE_DISABLED for {model}: {e}")
+            return None
+        with self._lock:
+            self._entries[key] = [cache.name, now + self.ttl]
+            self.stats["created"] += 1
+        return cache.name
+
+    def invalidate(self, name):
+        """Forgets a cache the API no longer knows (expired or deleted server-side)."""
+        with self._lock:
+            for key in [k for k, (n, _) in self._entries.items() if n == name]:
+                del self._entries[key]
+
+    def close(self):
+        """Deletes the caches created by this manager (they are billed while they live)."""
+        with self._lock:
+            names = [name for name, _ in self._entries.values()]
+            self._entries.clear()
+        for name in names:
+            try: self.client.caches.delete(name=name)
+            except Exception as e: self._debug(f"PROMPT_CACHE_DELETE_FAILED: {e}")
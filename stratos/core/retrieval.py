@@ -0,0 +1,160 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+CHUNK_LINES = 40          # Lines per chunk (chunks start on a definition line when one is close)
+MAX_INDEXED_CHARS = 512 * 1024 # Larger text files (data dumps, bundles) are not worth chunking
+DEFAULT_TOP_K = 6
+MAX_CHUNKS_PER_FILE = 2   # Keeps the top-k from being one file's chunks only
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_DEFINITION = re.compile(r"^(def |class |async def |function |export |func |fn |pub |public |private |interface |type |const |@)")
+STOP_WORDS = frozenset(
+    "the a an and or of to in on for is are be it this that with as by at from if else not self return "
+    "import none true false use using into when then each all any".split()
+)
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased identifiers plus their snake_case/camelCase parts (so 'parseConfig' matches 'config')."""
+    tokens = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        if lower in STOP_WORDS or len(lower) < 2:
+            continue
+        tokens.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) > 1 and p not in STOP_WORDS)
+    return tokens
+
+def chunk_lines(lines: list[str], size=CHUNK_LINES) -> list[tuple[int, int]]:
+    """(start, end) 0-based line ranges, cut before a definition line near the size limit."""
+    ranges, start, n = [], 0, len(lines)
+    while start < n:
+        end = min(n, start + size)
+        if end < n:
+            for i in range(end, start + size // 2, -1):
+                if _DEFINITION.match(lines[i]):
+                    end = i
+                    break
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+class Chunk:
+    __slots__ = ("path", "start", "end", "length", "terms")
+
+    def __init__(self, path, start, end, terms):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.terms = terms
+        self.length = sum(terms.values())
+
+class ChunkIndex:
+    """In-process BM25 index over line chunks of the workspace text files.
+
+    sync() takes a snapshot (path -> blob digest) and only re-chunks the files whose
+    digest changed, so it can run before every agent action at the cost of a dict walk.
+    """
+
+    def __init__(self, chunk_lines=CHUNK_LINES):
+        self.chunk_lines = chunk_lines
+        self.chunks = {}                  # id -> Chunk
+        self.postings = defaultdict(dict) # term -> {chunk id: term frequency}
+        self.file_chunks = {}             # path -> [chunk ids]
+        self.digests = {}                 # path -> digest indexed
+        self.total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, path):
+        for cid in self.file_chunks.pop(path, ()):
+            chunk = self.chunks.pop(cid)
+            self.total_length -= chunk.length
+            for term in chunk.terms:
+                postings = self.postings[term]
+                postings.pop(cid, None)
+                if not postings:
+                    del self.postings[term]
+        self.digests.pop(path, None)
+
+    def _add(self, path, text):
+        lines = text.splitlines()
+        path_terms = tokenize(path.replace("\\", "/").replace("/", " ").replace(".", " "))
+        ids = []
+        for start, end in chunk_lines(lines, self.chunk_lines):
+            terms = Counter(tokenize("\n".join(lines[start:end])))
+            terms.update(path_terms) # The file name is part of every chunk
+            if not terms:
+                continue
+            cid, self._next_id = self._next_id, self._next_id + 1
+            chunk = self.chunks[cid] = Chunk(path, start, end, terms)
+            self.total_length += chunk.length
+            for term, tf in terms.items():
+                self.postings[term][cid] = tf
+            ids.append(cid)
+        self.file_chunks[path] = ids
+
+    def update(self, path, text, digest=None):
+        """(Re)indexes one file."""
+        with self._lock:
+            self._remove(path)
+            if len(text) <= MAX_INDEXED_CHARS:
+                self._add(path, text)
+            self.digests[path] = digest
+
+    def remove(self, path):
+        with self._lock:
+            self._remove(path)
+
+    def sync(self, snapshot, blobs) -> int:
+        """Brings the index in line with a snapshot; returns the number of files (re)indexed or dropped."""
+        changed = 0
+        for path in [p for p in self.digests if p not in snapshot]:
+            self.remove(path)
+            changed += 1
+        for path, digest in snapshot.items():
+            if self.digests.get(path) != digest:
+                try:
+                    self.update(path, blobs.get(digest), digest)
+                except KeyError:
+                    continue
+                changed += 1
+        return changed
+
+    def search(self, query, k=DEFAULT_TOP_K, per_file=MAX_CHUNKS_PER_FILE) -> list[tuple[float, Chunk]]:
+        """Top-k (score, chunk) pairs for a free-text query, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self.chunks)
+            if not n or not terms:
+                return []
+            avgdl = self.total_length / n
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for cid, tf in postings.items():
+                    length = self.chunks[cid].length
+                    scores[cid] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            hits, per_path = [], Counter()
+            for cid, score in ranked:
+                chunk = self.chunks[cid]
+                if per_path[chunk.path] >= per_file:
+                    continue
+                per_path[chunk.path] += 1
+                hits.append((score, chunk))
+                if len(hits) == k:
+                    break
+            return hits
+
+    def __len__(self):
+        return len(self.chunks)
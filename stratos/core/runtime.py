@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+class AsyncRuntime:
+    """One process-wide asyncio loop on a daemon thread.
+
+    Async code (AIAgent.athink_and_act) runs there whoever calls it: blocking callers hand a
+    coroutine to run() and wait for its result, so any number of agents share the loop and
+    the async Gemini client's connections are never used from two loops.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="stratos-runtime", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine on the loop and blocks until it finishes. Interrupting the wait cancels it."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() called from the runtime loop: await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def submit(self, coro):
+        """Schedules a coroutine without waiting; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def close(self):
+        with self._lock:
+            loop, thread, self._loop = self._loop, self._thread, None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+RUNTIME = AsyncRuntime() # Shared by all agents of the process
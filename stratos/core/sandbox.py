@@ -1,17 +1,38 @@
 import os
 import shutil
-import subprocess
 import sys
 import fnmatch
 import json
+import threading
 from pathlib import Path
 from rich.prompt import Prompt, Confirm
+from .blobstore import BlobStore
+from .file_index import FileIndex, IGNORE_FILES
+from .grep import grep_files, DEFAULT_MAX_RESULTS, SNIFF_SIZE
+from .trigram import TrigramIndex
+from .retrieval import ChunkIndex, DEFAULT_TOP_K
+from .line_index import LineIndexCache
+from .snapshot import SnapshotIndex
+from .watcher import create_watcher
+from .executor import run_command, terminate, DEFAULT_TIMEOUT, DEFAULT_OUTPUT_CAP
+from .shell import ShellPool
+from .webclient import WebClient, html_to_markdown
+from .policy import PolicyEngine, PolicyDecision
+from .search_cache import SearchCache, DEFAULT_TTL as DEFAULT_SEARCH_TTL
 try:
     from duckduckgo_search import DDGS
     HAS_DDG = True
 except ImportError:
     HAS_DDG = False
 
+def ddg_search(query, max_results):
+    """Default search_web backend."""
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, max_results=max_results))
+
+MAX_FETCH_CHARS = 40000 # Characters of a fetched page returned to the model
+MAX_RETRIEVED_CHARS = 12000 # Excerpts returned by retrieve()
+
 class Sandbox:
     def __init__(self, root_dir):
         """Initializes the sandbox."""
@@ -22,6 +43,24 @@ class Sandbox:
         self.logger_instance = None
         self.ui_active_event = None # threading.Event from engine
         self.auto_approve = False # Toggle via UI to skip confirmations
+        self.blob_store = BlobStore()
+        self.file_index = FileIndex(self.root_dir) # Shared by glob/grep/tree/snapshot
+        self.snapshot_index = SnapshotIndex(self.root_dir, self.blob_store, self.file_index)
+        self.search_index = TrigramIndex() # In-memory until enable_search_index() gives it a file
+        self.line_index = LineIndexCache()
+        self.chunk_index = ChunkIndex() # BM25 over file chunks, synced from snapshots (see retrieve)
+        self._index_lock = threading.RLock() # Serializes index syncs: read-only tools run concurrently
+        self.watcher = None # Optional filesystem watcher (see start_watcher)
+        self._tree_cache = None
+        self.command_timeout = DEFAULT_TIMEOUT
+        self.command_output_cap = DEFAULT_OUTPUT_CAP # Bytes per stream returned to the model
+        self._running = set() # Popen objects of in-flight commands
+        self._cancelled = False # Set on exit: running and future commands are killed
+        self.web_client = WebClient() # Pooled connections; enable_web_cache() adds the disk cache
+        self.search_backend = None # callable(query, max_results) -> [{title, href, body}], DDG if None
+        self.search_cache = None # Optional SearchCache (see enable_search_cache)
+        self.policy = PolicyEngine() # Built-in defaults until load_policy()
+        self.shell_pool = None # Persistent shells (see enable_shell_sessions), else one process per command
 
     def _safe_path(self, path):
         target_path = Path(self.root_dir / path).resolve()
@@ -33,6 +72,17 @@ class Sandbox:
 
     # --- FILES & SEARCH ---
 
+    def _on_write(self, target):
+        """Write hook: lets the search caches drop their view of a file the sandbox just wrote."""
+        rel = os.path.relpath(target, self.root_dir)
+        if self.search_index is not None:
+            self.search_index.mark_dirty(rel)
+        self.line_index.invalidate(target)
+
+    def enable_search_index(self, index_path):
+        """Persists the trigram search index at index_path (e.g. next to the session metadata.json)."""
+        self.search_index = TrigramIndex(index_path)
+
     def write_file(self, path: str, content: str) -> str:
         """Writes content to a file. Overwrites if exists."""
         if self.logger_instance: self.logger_instance.debug(f"[FILE-WRITE] {path} ({len(content)} chars)")
@@ -41,6 +91,7 @@ class Sandbox:
             target.parent.mkdir(parents=True, exist_ok=True)
             with open(target, "w", encoding="utf-8") as f:
                 f.write(content)
+            self._on_write(target)
             return f"SUCCESS: {path} written."
         except Exception as e:
             if self.logger_instance: self.logger_instance.debug(f"[FILE-WRITE-ERR] {str(e)}")
@@ -54,47 +105,57 @@ class Sandbox:
             if self.logger_instance: self.logger_instance.debug(f"[FILE-READ-ERR] Not found: {path}")
             return f"ERROR: {path} not found."
         try:
-            lines = target.read_text(encoding="utf-8").splitlines()
-            if start_line is not None and end_line is not None:
-                start = max(0, int(start_line) - 1)
-                end = min(len(lines), int(end_line))
-                lines = lines[start:end]
+            if start_line is not None or end_line is not None:
+                # Ranged read: seek straight to the requested lines via the line-offset index
+                lines, _ = self.line_index.read_lines(
+                    target, int(start_line or 1), int(end_line) if end_line is not None else None
+                )
+            else:
+                lines = target.read_text(encoding="utf-8").splitlines()
             return "\n".join(lines)
         except Exception as e:
             if self.logger_instance: self.logger_instance.debug(f"[FILE-READ-ERR] {str(e)}")
             return f"ERROR: {str(e)}"
 
+    def file_info(self, path: str) -> str:
+        """Returns a file's total line count and size, to plan paged reads with read_file(start_line, end_line)."""
+        target = self._safe_path(path)
+        if not target.is_file():
+            return f"ERROR: {path} not found."
+        try:
+            lines, size = self.line_index.count_lines(target)
+            return f"{path}: {lines} lines, {size} bytes"
+        except Exception as e:
+            return f"ERROR: {str(e)}"
+
     def glob_search(self, pattern: str) -> list[str]:
         """Finds files matching a glob pattern (e.g., '**/*.py')."""
-        files = []
-        for p in self.root_dir.rglob(pattern):
-            if p.is_file() and ".git" not in p.parts:
-                files.append(str(p.relative_to(self.root_dir)))
-        return files
-
-    def grep_search(self, pattern: str, path: str = ".") -> str:
-        """Searches for a regex pattern in files (cross-platform)."""
+        return self._file_listing().glob(pattern)
+
+    def grep_search(self, pattern: str, path: str = ".", include: str = None, exclude: str = None, max_results: int = None) -> str:
+        """Searches for a regex pattern in files. Optional comma-separated include/exclude globs (e.g. '*.py')."""
         import re
         target = self._safe_path(path)
+        if target.is_file():
+            files = [os.path.relpath(target, self.root_dir)]
+        else:
+            listing = self._file_listing()
+            files = listing.files_under(os.path.relpath(target, self.root_dir))
+            if self.search_index is not None:
+                # Narrow the candidates with the trigram index (kept in sync incrementally)
+                with self._index_lock:
+                    self.search_index.update(self.root_dir, listing.files())
+                    self.search_index.save()
+                files = self.search_index.candidates(pattern, files)
         try:
-            regex = re.compile(pattern)
+            result = grep_files(self.root_dir, files, pattern, include=include, exclude=exclude,
+                                max_results=int(max_results or DEFAULT_MAX_RESULTS))
         except re.error as e:
             return f"ERROR: Invalid regex pattern - {str(e)}"
-        
-        results = []
-        search_paths = [target] if target.is_file() else target.rglob("*")
-        
-        for p in search_paths:
-            if p.is_file() and ".git" not in p.parts:
-                try:
-                    lines = p.read_text(encoding="utf-8").splitlines()
-                    for i, line in enumerate(lines):
-                        if regex.search(line):
-                            rel_path = p.relative_to(self.root_dir)
-                            results.append(f"{rel_path}:{i+1}:{line.strip()}")
-                except UnicodeDecodeError:
-                    pass # Skip binary files
-        return "\n".join(results) if results else "No matches found."
+        if self.logger_instance:
+            self.logger_instance.debug(f"[GREP] {pattern} -> {result.total} matches in {len(files)} files"
+                                       f" (binary skipped: {result.skipped_binary}, large skipped: {result.skipped_large})")
+        return result.format(int(max_results or DEFAULT_MAX_RESULTS))
 
     def smart_replace(self, path: str, old_text: str, new_text: str) -> str:
         """Replaces exact text within a file (like a surgical update)."""
@@ -108,6 +169,7 @@ class Sandbox:
                 return f"ERROR: 'old_text' not found in {path}."
             new_content = content.replace(old_text, new_text)
             target.write_text(new_content, encoding="utf-8")
+            self._on_write(target)
             return f"SUCCESS: {path} updated."
         except Exception as e:
             if self.logger_instance: self.logger_instance.debug(f"[REPLACE-ERR] {str(e)}")
@@ -117,27 +179,12 @@ class Sandbox:
 
     def _validate_command_safety(self, command: str) -> None:
         """Checks for dangerous command patterns."""
-        import re
         cmd = command.strip()
         
-        # Blacklist of absolute destructive commands
-        dangerous_patterns = [
-            r"rm\s+-rf\s+/",       # rm -rf /
-            r"rm\s+-rf\s+~",       # rm -rf ~
-            r"rm\s+-rf\s+\.\.",    # rm -rf ..
-            r"mkfs",               # disk formatting
-            r"dd\s+if=",           # disk writing
-            r":\(\)\{ :\|:& \};:", # fork bomb
-            r">\s+/dev/sd",        # writing to raw device
-            r">\s+/dev/nvme",      # writing to raw device
-            r"chmod\s+777\s+/",    # system-wide permission change
-            r"chown\s+ root:root", # root ownership change
-            r"shutdown", r"reboot", r"init\s+0", r"init\s+6"
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, cmd):
-                raise PermissionError(f"DANGEROUS COMMAND BLOCKED: '{cmd}' matches forbidden pattern '{pattern}'")
+        # Blacklist of absolute destructive commands (precompiled into one matcher by the policy)
+        pattern = self.policy.dangerous_match(cmd)
+        if pattern:
+            raise PermissionError(f"DANGEROUS COMMAND BLOCKED: '{cmd}' matches forbidden pattern '{pattern}'")
 
         # Prevent leaving the sandbox via cd
         # Note: This is a basic check. 'cd /' effects are limited because subprocess spawns a new shell,
@@ -145,26 +192,56 @@ class Sandbox:
         if "cd /" in cmd or "cd ~" in cmd or "cd .." in cmd:
              if self.logger_instance: self.logger_instance.warning(f"SUSPICIOUS NAVIGATION DETECTED in command: {cmd}")
 
-    def execute_command(self, command: str) -> str:
-        """Executes a bash command. Supports manual override/confirmation if needed."""
+    def command_cwd(self) -> str:
+        """Directory the next command runs in (the persistent shell may have cd'd into a subdirectory)."""
+        return self.shell_pool.cwd if self.shell_pool else str(self.root_dir)
+
+    def execute_command(self, command: str, isolated=False) -> str:
+        """Executes a bash command. Supports manual override/confirmation if needed.
+
+        isolated: run in a fresh process (in command_cwd()) instead of the persistent shell, so
+        functions, aliases and traps an earlier approved command defined there cannot run.
+        """
         if self.logger_instance:
-            self.logger_instance.debug(f"[EXEC-START] {command} (in {self.root_dir})")
+            self.logger_instance.debug(f"[EXEC-START] {command} (in {self.command_cwd()})")
             
+        started = []
         try:
             # 1. Safety Check
             self._validate_command_safety(command)
+            if self._cancelled:
+                return "CANCELLED: Stratos is shutting down, command not started."
             
-            # 2. Execution
-            result = subprocess.run(
-                command, shell=True, cwd=self.root_dir,
-                capture_output=True, text=True, timeout=60
-            )
+            # 2. Execution (streamed to the logger, killed with its whole group on timeout/pause/exit)
+            def on_line(stream, line):
+                if self.logger_instance: self.logger_instance.debug(f"[EXEC-{stream.upper()}] {line}")
+
+            def on_start(proc):
+                started.append(proc)
+                self._running.add(proc)
+
+            def should_cancel():
+                return self._cancelled or bool(self.logger_instance and self.logger_instance.paused)
+
+            if self.shell_pool and not isolated:
+                result = self.shell_pool.run(
+                    command, timeout=self.command_timeout, on_line=on_line,
+                    should_cancel=should_cancel, output_cap=self.command_output_cap
+                )
+                if result.notes and self.logger_instance:
+                    for note in result.notes: self.logger_instance.warning(f"SHELL: {note}")
+            else:
+                result = run_command(
+                    command, cwd=self.command_cwd(), timeout=self.command_timeout, on_line=on_line,
+                    should_cancel=should_cancel, output_cap=self.command_output_cap,
+                    on_start=on_start
+                )
             
-            output = f"CODE_{result.returncode}\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+            output = result.format()
             
             if self.logger_instance:
                 if result.returncode == 0:
-                    self.logger_instance.debug(f"[EXEC-SUCCESS] Return Code: 0")
+                    self.logger_instance.debug(f"[EXEC-SUCCESS] Return Code: 0 ({result.wall_time:.2f}s)")
                 else:
                     self.logger_instance.debug(f"[EXEC-FAIL] Return Code: {result.returncode}\nSTDERR: {result.stderr[:200]}...")
             
@@ -173,6 +250,36 @@ class Sandbox:
             if self.logger_instance:
                 self.logger_instance.debug(f"[EXEC-CRASH] {str(e)}")
             return f"CRASH: {str(e)}"
+        finally:
+            for proc in started: self._running.discard(proc)
+
+    def enable_shell_sessions(self, size=2):
+        """Runs commands in persistent PTY shells so cd/export/source survive between calls."""
+        self.shell_pool = ShellPool(self.root_dir, size=size)
+
+    def terminate_all(self):
+        """Kills every running command's process group (mission exit)."""
+        self._cancelled = True
+        if self.shell_pool:
+            self.shell_pool.close()
+        self.web_client.close()
+        for proc in list(self._running):
+            if proc.returncode is None:
+                terminate(proc, grace=0.5)
+        self._running.clear()
+
+    def load_policy(self, paths, log_path=None):
+        """Loads the approval policy from TOML files (later files override earlier ones)."""
+        self.policy = PolicyEngine.load(paths, log_path=log_path)
+        if self.logger_instance and self.policy.sources:
+            self.logger_instance.debug(f"[POLICY] Loaded {', '.join(self.policy.sources)} ({len(self.policy.rules)} rules)")
+
+    def check_command_policy(self, agent_name, command) -> PolicyDecision:
+        """Decides allow/ask/deny for a command before any human prompt."""
+        decision = self.policy.evaluate(command, cwd=self.command_cwd())
+        if self.logger_instance:
+            self.logger_instance.debug(f"[POLICY] {decision.decision.upper()} ({decision.rule}, {decision.command_class}) for {agent_name}: {command}")
+        return decision
 
     def request_command_approval(self, agent_name, command) -> tuple[bool, str]:
         """Specific UI logic for command approval. Returns (is_allowed, modified_command_or_order)."""
@@ -200,23 +307,46 @@ class Sandbox:
         # Fallback
         return False, "User denied (No UI available)."
 
+    def enable_web_cache(self, cache_dir):
+        """Revalidates web_fetch responses against an on-disk ETag/Last-Modified cache."""
+        self.web_client.close()
+        self.web_client = WebClient(cache_dir)
+
     def web_fetch(self, url: str) -> str:
-        """Fetches the content of a URL (HTML/Text)."""
-        cmd = f"curl -L -s '{url}'"
-        return self.execute_command(cmd)
+        """Fetches the content of a URL (HTML pages are converted to markdown text)."""
+        if self.logger_instance:
+            self.logger_instance.debug(f"[FETCH] {url}")
+        try:
+            resp = self.web_client.fetch(url)
+        except Exception as e:
+            return f"ERROR: {type(e).__name__}: {e}"
+        text = html_to_markdown(resp.text) if resp.content_type in ("text/html", "application/xhtml+xml") else resp.text
+        if "\0" in text[:SNIFF_SIZE]:
+            text = f"[binary content: {len(resp.body)} bytes not shown]"
+        truncated = resp.truncated
+        if len(text) > MAX_FETCH_CHARS:
+            text, truncated = text[:MAX_FETCH_CHARS], True
+        header = f"URL: {resp.url}\nSTATUS: {resp.status}{' (cached)' if resp.from_cache else ''}\nCONTENT-TYPE: {resp.content_type or 'unknown'}"
+        return f"{header}\n\n{text}" + ("\n... [TRUNCATED: content too long]" if truncated else "")
+
+    def enable_search_cache(self, path, ttl=DEFAULT_SEARCH_TTL):
+        """Serves repeated search_web queries from a persistent TTL cache."""
+        self.search_cache = SearchCache(path, ttl)
 
     def search_web(self, query: str) -> str:
         """Searches the web for information using DuckDuckGo."""
         if self.logger_instance: self.logger_instance.debug(f"[WEB-SEARCH] Query: {query}")
         
-        if not HAS_DDG:
+        backend = self.search_backend or (ddg_search if HAS_DDG else None)
+        if backend is None:
             return "ERROR: 'duckduckgo-search' library is missing. Install it with 'pip install duckduckgo-search' to use this feature."
             
         try:
-            results = []
-            with DDGS() as ddgs:
-                for r in ddgs.text(query, max_results=5):
-                    results.append(r)
+            if self.search_cache:
+                results, cached = self.search_cache.get_or_fetch(query, backend, max_results=5)
+                if cached and self.logger_instance: self.logger_instance.debug(f"[WEB-SEARCH] Cache hit: {query}")
+            else:
+                results = backend(query, 5)
             
             if not results:
                 return "No results found."
@@ -294,23 +424,95 @@ class Sandbox:
         """Updates the global team TODO_LIST."""
         return f"SUCCESS: TODO_LIST updated."
 
+    # --- CHANGE TRACKING ---
+
+    def start_watcher(self):
+        """Attaches a filesystem watcher so snapshots only re-stat what changed."""
+        with self._index_lock:
+            return self._start_watcher()
+
+    def _start_watcher(self):
+        if self.watcher is None:
+            self.watcher = create_watcher(self.root_dir, ignore=self.file_index.is_ignored)
+            self.watcher.start()
+            self.file_index.validate_on_read = False # The watcher now drives invalidation
+            # Events are queued from here on; index everything that already exists
+            self.snapshot_index.refresh()
+            self._tree_cache = None
+            if self.logger_instance: self.logger_instance.debug(f"[WATCHER] {type(self.watcher).__name__} on {self.root_dir}")
+        return self.watcher
+
+    def stop_watcher(self):
+        with self._index_lock:
+            self._stop_watcher()
+
+    def _stop_watcher(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+            self._tree_cache = None
+            self.file_index.validate_on_read = True
+
+    def _sync_index(self):
+        """Brings the snapshot index up to date (incrementally when a watcher is attached)."""
+        with self._index_lock:
+            return self._sync_index_locked()
+
+    def _sync_index_locked(self):
+        if self.watcher is None:
+            return self.snapshot_index.refresh()
+        changes = self.watcher.drain()
+        warning = self.watcher.take_warning()
+        if warning and self.logger_instance:
+            self.logger_instance.warning(f"[WATCHER] {warning}")
+        if not changes:
+            return set()
+        if changes.bulk and self.logger_instance:
+            self.logger_instance.debug(f"[WATCHER] Bulk changes coalesced: {changes.bulk}")
+        if any(os.path.basename(p) in IGNORE_FILES for p in changes.paths):
+            # Ignore rules changed: the whole listing has to be re-evaluated
+            self.file_index.invalidate()
+            self._tree_cache = None
+            return self.snapshot_index.refresh()
+        if changes.structural:
+            self.file_index.invalidate()
+            self._tree_cache = None
+        return self.snapshot_index.refresh(changes)
+
+    def _file_listing(self) -> FileIndex:
+        """The shared file index, synced with pending watcher events."""
+        if self.watcher is not None:
+            self._sync_index()
+        return self.file_index
+
     def get_structure_tree(self) -> str:
         """Returns the project structure as a tree."""
-        tree = []
-        for root, dirs, files in os.walk(self.root_dir):
-            if ".git" in root: continue
-            rel = Path(root).relative_to(self.root_dir)
-            indent = "  " * len(rel.parts)
-            tree.append(f"{indent}{os.path.basename(root) or '.'}/")
-            for f in files:
-                tree.append(f"  {indent}{f}")
-        return "\n".join(tree)
+        with self._index_lock:
+            if self.watcher is not None:
+                self._sync_index()
+                if self._tree_cache is None:
+                    self._tree_cache = self.file_index.tree()
+                return self._tree_cache
+            return self.file_index.tree()
 
     def get_snapshot(self) -> dict:
-        """Captures all file contents."""
-        snap = {}
-        for p in self.root_dir.rglob("*"):
-            if p.is_file() and ".git" not in p.parts:
-                try: snap[str(p.relative_to(self.root_dir))] = p.read_text(encoding="utf-8")
-                except: pass
-        return snap
+        """Captures the workspace as a path -> content hash map (contents live in blob_store)."""
+        with self._index_lock:
+            self._sync_index()
+            return self.snapshot_index.snapshot()
+
+    def retrieve(self, query: str, k: int = DEFAULT_TOP_K, max_chars: int = MAX_RETRIEVED_CHARS) -> str:
+        """Returns the k file chunks most relevant to query (BM25), as numbered excerpts."""
+        with self._index_lock: # A concurrent retrieve must not sync an older snapshot over this one
+            snapshot = self.get_snapshot()
+            self.chunk_index.sync(snapshot, self.blob_store)
+        parts, size = [], 0
+        for score, chunk in self.chunk_index.search(query, k):
+            lines = self.blob_store.get(snapshot[chunk.path]).splitlines()[chunk.start:chunk.end]
+            block = f"--- {chunk.path}:{chunk.start + 1}-{chunk.end} (score {score:.1f})\n" + "\n".join(
+                f"{chunk.start + i + 1:>5}| {line}" for i, line in enumerate(lines))
+            if size + len(block) > max_chars:
+                break
+            parts.append(block)
+            size += len(block)
+        return "\n".join(parts)
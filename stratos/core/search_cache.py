@@ -0,0 +1,113 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_TTL = 24 * 3600 # Seconds a cached result set stays fresh
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change what a search returns."""
+    return " ".join(query.lower().split()).strip(" ?!.")
+
+class SearchCache:
+    """Persistent (SQLite) web search cache with a TTL and in-flight request coalescing.
+
+    Concurrent lookups of the same normalized query share one backend call. The file
+    can be shared by several processes (missions); hit/miss counters live in the file.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = str(path)
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, query TEXT, results TEXT, created REAL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future
+
+    def _key(self, query, max_results):
+        return f"{max_results}:{normalize_query(query)}"
+
+    def _count(self, name):
+        self._db.execute("INSERT INTO counters VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, query, max_results=5):
+        """Fresh cached results or None."""
+        with self._lock:
+            row = self._db.execute("SELECT results, created FROM results WHERE key = ?",
+                                   (self._key(query, max_results),)).fetchone()
+        if row and time.time() - row[1] < self.ttl:
+            return json.loads(row[0])
+        return None
+
+    def get_or_fetch(self, query, fetch, max_results=5):
+        """Returns (results, cached). fetch(query, max_results) is called at most once per key at a time."""
+        key = self._key(query, max_results)
+        with self._lock:
+            row = self._db.execute("SELECT results, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] < self.ttl:
+                self._count("hits")
+                self._db.commit()
+                return json.loads(row[0]), True
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self._count("misses")
+            else:
+                self._count("coalesced")
+            self._db.commit()
+        if not owner:
+            return future.result(), True
+
+        try:
+            results = fetch(query, max_results)
+        except BaseException as e:
+            with self._lock: del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if results: # Empty answers are often transient (rate limits), do not pin them
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                 (key, normalize_query(query), json.dumps(results), time.time()))
+                self._db.commit()
+            del self._inflight[key]
+        future.set_result(results)
+        return results, False
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+            self._db.commit()
+        return cur.rowcount
+
+    def clear(self) -> int:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM results")
+            self._db.execute("DELETE FROM counters")
+            self._db.commit()
+            self._db.execute("VACUUM")
+        return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, fresh = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(created >= ?), 0) FROM results", (time.time() - self.ttl,)
+            ).fetchone()
+            counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": total, "fresh": fresh, "expired": total - fresh,
+            "hits": counters.get("hits", 0), "misses": counters.get("misses", 0),
+            "coalesced": counters.get("coalesced", 0),
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "ttl": self.ttl,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
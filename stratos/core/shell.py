@@ -0,0 +1,279 @@
+import os
+import pty
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import tempfile
+import termios
+import threading
+import time
+import uuid
+from .executor import OutputBuffer, CommandResult, DEFAULT_TIMEOUT, DEFAULT_OUTPUT_CAP, KILL_GRACE
+
+SHELL_ENV = {"TERM": "dumb", "PAGER": "cat", "GIT_PAGER": "cat", "MANPAGER": "cat", "GIT_TERMINAL_PROMPT": "0"}
+RSS_SAMPLE_INTERVAL = 0.05 # Seconds between peak RSS samples of the command's processes
+
+class ShellSession:
+    """A long-lived bash whose stdout is a PTY, so state (cd, export, source) survives between commands.
+
+    Each command is written to a script that the shell sources, followed by a sentinel line
+    carrying the exit code and $PWD. stderr goes through a pipe and is fenced the same way.
+    """
+
+    def __init__(self, root_dir, shell=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.proc = None
+        self._master = None
+        self._stderr_sink = None
+        self._stderr_done = threading.Event()
+        self._stderr_marker = None
+        self._tmpdir = tempfile.mkdtemp(prefix="stratos-shell-")
+        self.restarts = -1
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        master, slave = pty.openpty()
+        attrs = termios.tcgetattr(slave)
+        attrs[1] &= ~termios.OPOST # No \n -> \r\n translation
+        attrs[3] &= ~(termios.ECHO | termios.ICANON)
+        termios.tcsetattr(slave, termios.TCSANOW, attrs)
+        args = [self.shell, "--noprofile", "--norc"] if self.shell.endswith("bash") else [self.shell]
+        self.proc = subprocess.Popen(
+            args, cwd=self.root_dir, env={**os.environ, **SHELL_ENV},
+            stdin=slave, stdout=slave, stderr=subprocess.PIPE, start_new_session=True
+        )
+        os.close(slave)
+        self._master = master
+        threading.Thread(target=self._pump_stderr, args=(self.proc.stderr,), daemon=True).start()
+        self.restarts += 1
+
+    def close(self):
+        if self.proc is not None:
+            self._kill(grace=0.2)
+            self.proc = None
+        if self._master is not None:
+            try: os.close(self._master)
+            except OSError: pass
+            self._master = None
+
+    def interrupt(self):
+        """Kills the shell's process group without touching session state (safe from any thread)."""
+        proc = self.proc
+        if proc is not None:
+            try: os.killpg(proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError): pass
+
+    def destroy(self):
+        self.close()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def _kill(self, grace=KILL_GRACE):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try: os.killpg(self.proc.pid, sig)
+            except (ProcessLookupError, PermissionError): pass
+            try:
+                self.proc.wait(timeout=grace)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+
+    def _pump_stderr(self, stream):
+        for raw in iter(stream.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            if self._stderr_marker and line.rstrip("\n") == self._stderr_marker:
+                self._stderr_done.set()
+            elif self._stderr_sink:
+                self._stderr_sink(line)
+        if self.proc is not None and self.proc.stderr is stream:
+            self._stderr_done.set() # Ignore the EOF of a previous, already replaced shell
+
+    def _child_cpu(self):
+        """Cumulative CPU seconds of the shell's reaped children (cutime + cstime)."""
+        try:
+            with open(f"/proc/{self.proc.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[13]) + int(fields[14])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _group_peak_rss(self):
+        """Largest VmHWM (KB) among the shell's process group, the shell itself excluded.
+
+        The shell is never reaped, so its getrusage is of no use: the command's processes are
+        sampled while they run instead, and ones that live less than RSS_SAMPLE_INTERVAL can be missed.
+        """
+        peak = None
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit() or int(entry) == self.proc.pid:
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[2]) != self.proc.pid:
+                        continue
+                with open(f"/proc/{entry}/status") as f:
+                    for line in f:
+                        if line.startswith("VmHWM:"):
+                            peak = max(peak or 0, int(line.split()[1]))
+                            break
+            except (OSError, ValueError, IndexError):
+                continue # Exited in the meantime
+        return peak
+
+    def run(self, command, timeout=DEFAULT_TIMEOUT, on_line=None, should_cancel=None,
+            output_cap=DEFAULT_OUTPUT_CAP) -> CommandResult:
+        """Runs command in the session. The session is killed (and restarted on the next call)
+        on timeout, cancellation or if the command makes the shell exit."""
+        if not self.alive:
+            self.close()
+            self.start()
+        start = time.monotonic()
+        marker = f"__STRATOS_{uuid.uuid4().hex}__"
+        script = os.path.join(self._tmpdir, "cmd.sh")
+        with open(script, "w") as f:
+            f.write(command + "\n")
+
+        out, err = OutputBuffer(output_cap), OutputBuffer(output_cap)
+        def emit(name, buf, line):
+            buf.append(line)
+            if on_line:
+                try: on_line(name, line.rstrip("\n"))
+                except Exception: pass
+
+        self._stderr_marker = marker
+        self._stderr_done.clear()
+        self._stderr_sink = lambda line: emit("stderr", err, line)
+        cpu_before = self._child_cpu()
+        os.write(self._master, (
+            f". {shlex.quote(script)} < /dev/null; __stratos_rc=$?; "
+            f"printf '\\n%s %d %s\\n' '{marker}' \"$__stratos_rc\" \"$PWD\"; printf '%s\\n' '{marker}' >&2\n"
+        ).encode())
+
+        pending, held = b"", None
+        returncode, cwd = None, None
+        timed_out = cancelled = False
+        peak_rss, sampled = None, 0.0
+        while returncode is None:
+            if time.monotonic() - sampled >= RSS_SAMPLE_INTERVAL:
+                sampled = time.monotonic()
+                rss = self._group_peak_rss()
+                if rss is not None: peak_rss = max(peak_rss or 0, rss)
+            if timeout and time.monotonic() - start > timeout:
+                timed_out = True
+            elif should_cancel and should_cancel():
+                cancelled = True
+            if timed_out or cancelled:
+                self._kill()
+                returncode = self.proc.returncode
+                break
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(self._master, 65536)
+            except OSError:
+                chunk = b""
+            if not chunk: # Shell exited (e.g. 'exit 3')
+                returncode = self.proc.wait()
+                break
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for raw in lines:
+                line = raw.decode("utf-8", "replace")
+                if line.startswith(marker + " "):
+                    rc, _, cwd = line[len(marker) + 1:].partition(" ")
+                    returncode = int(rc)
+                    if held == "\n": held = None # The newline printed before the marker
+                    break
+                if held is not None:
+                    emit("stdout", out, held)
+                held = line + "\n"
+        if held is not None:
+            emit("stdout", out, held)
+
+        if self.alive:
+            self._stderr_done.wait(timeout=2)
+            cpu_after = self._child_cpu()
+        else:
+            self._stderr_done.wait(timeout=0.5)
+            cpu_after = None
+        self._stderr_sink = self._stderr_marker = None
+
+        result = CommandResult(
+            returncode, stdout=out.text(), stderr=err.text(), wall_time=time.monotonic() - start,
+            cpu_time=cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None,
+            peak_rss_kb=peak_rss, timed_out=timed_out, cancelled=cancelled, timeout=timeout, cwd=cwd
+        )
+        if not self.alive:
+            result.notes.append("the shell session ended; the next command starts in a fresh shell (cwd and environment reset).")
+        return result
+
+class ShellPool:
+    """Fixed-size pool of ShellSessions for one sandbox; dead sessions are restarted on checkout.
+
+    The most recently released session is handed out first, so sequential callers keep
+    seeing the same shell state; extra sessions only appear under concurrency.
+    """
+
+    def __init__(self, root_dir, size=2, shell=None):
+        self.root_dir = os.path.realpath(root_dir)
+        self.cwd = self.root_dir # Working directory the last command left its session in
+        self.size = size
+        self.shell = shell
+        self._idle = []
+        self._all = []
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self) -> ShellSession:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Shell pool is closed.")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._all) < self.size:
+                    session = ShellSession(self.root_dir, self.shell)
+                    self._all.append(session)
+                    return session
+                self._cond.wait()
+
+    def release(self, session: ShellSession):
+        with self._cond:
+            if self._closed:
+                session.destroy()
+            else:
+                self._idle.append(session)
+            self._cond.notify()
+
+    def run(self, command, **kwargs) -> CommandResult:
+        """Runs command in an idle session; a cwd that left root_dir is reset to it."""
+        session = self.acquire()
+        try:
+            result = session.run(command, **kwargs)
+            cwd = os.path.realpath(result.cwd) if result.cwd and session.alive else self.root_dir
+            if os.path.commonpath([self.root_dir, cwd]) != self.root_dir:
+                session.run(f"cd {shlex.quote(self.root_dir)}", timeout=5)
+                result.notes.append(f"the shell left the sandbox ({result.cwd}); its cwd was reset to the project root.")
+                cwd = self.root_dir
+            self.cwd = cwd
+            return result
+        finally:
+            self.release(session)
+
+    def close(self):
+        """Destroys idle sessions and kills busy ones (they are destroyed when released)."""
+        with self._cond:
+            self._closed = True
+            idle, busy = self._idle, [s for s in self._all if s not in self._idle]
+            self._all, self._idle = [], []
+            self._cond.notify_all()
+        for session in busy:
+            session.interrupt()
+        for session in idle:
+            session.destroy()
@@ -0,0 +1,142 @@
+import os
+import time
+from pathlib import Path
+from .blobstore import BlobStore, blob_digest
+from .file_index import FileIndex
+
+# Files modified this close to a scan are re-hashed on the next refresh, because a
+# second write within the same timestamp tick would otherwise go unnoticed.
+RACY_WINDOW_NS = 2_000_000_000
+
+class SnapshotEntry:
+    __slots__ = ("mtime_ns", "size", "inode", "digest", "generation", "racy", "is_text")
+
+    def __init__(self, mtime_ns, size, inode, digest, generation, racy=False, is_text=True):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.inode = inode
+        self.digest = digest
+        self.generation = generation
+        self.racy = racy
+        self.is_text = is_text
+
+    def stat_key(self):
+        return (self.mtime_ns, self.size, self.inode)
+
+class SnapshotIndex:
+    """Persistent stat-indexed view of the sandbox files.
+
+    Each refresh re-stats the tree but only re-reads and re-hashes the files whose
+    (mtime_ns, size, inode) changed. Every effective change bumps a generation counter,
+    so callers can ask for the dirty set since any generation they have already seen.
+    Text contents live in a content-addressed BlobStore; snapshots are path -> digest maps.
+    The file listing (and its ignore rules) comes from the shared FileIndex.
+    """
+
+    def __init__(self, root_dir, blob_store=None, file_index=None):
+        self.root_dir = Path(root_dir)
+        self.blobs = blob_store if blob_store is not None else BlobStore()
+        self.file_index = file_index if file_index is not None else FileIndex(root_dir)
+        self.entries = {}   # rel path -> SnapshotEntry
+        self.deleted = {}   # rel path -> generation of deletion
+        self.bulk = {}      # top-level dir -> (generation, coalesced event count)
+        self.generation = 0
+
+    def _walk(self, rel_dir=""):
+        for rel in self.file_index.files_under(rel_dir):
+            try: yield rel, os.stat(os.path.join(self.root_dir, rel), follow_symlinks=False)
+            except OSError: continue
+
+    def _walk_paths(self, paths):
+        """Stats only the given paths; directories among them are walked recursively."""
+        for rel in paths:
+            full = os.path.join(self.root_dir, rel)
+            try: st = os.stat(full, follow_symlinks=False)
+            except OSError: continue
+            is_dir = os.path.isdir(full) and not os.path.islink(full)
+            if self.file_index.is_ignored(rel, is_dir):
+                continue
+            if is_dir:
+                yield from self._walk(rel)
+            elif os.path.isfile(full):
+                yield rel, st
+
+    def refresh(self, changes=None) -> set[str]:
+        """Re-stats the tree and returns the set of paths whose content changed.
+
+        With a watcher ChangeSet, only the reported paths (and bulk directories) are
+        re-stated instead of the whole tree.
+        """
+        if changes is not None and not changes.overflow:
+            scopes = changes.paths | set(changes.bulk)
+            if not scopes:
+                return set()
+            def in_scope(rel):
+                parts = rel.split(os.sep)
+                return any(os.sep.join(parts[:i]) in scopes for i in range(1, len(parts) + 1))
+            dirty = self._apply(self._walk_paths(scopes), in_scope)
+            for top, count in changes.bulk.items():
+                if any(p.startswith(top + os.sep) for p in dirty):
+                    self.bulk[top] = (self.generation, count)
+            return dirty
+        return self._apply(self._walk(), lambda rel: True)
+
+    def _apply(self, stats, in_scope):
+        scan_ns = time.time_ns()
+        generation = self.generation + 1
+        dirty = set()
+        seen = set()
+
+        for rel, st in stats:
+            seen.add(rel)
+            stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            entry = self.entries.get(rel)
+            if entry and not entry.racy and entry.stat_key() == stat_key:
+                continue
+            try:
+                with open(os.path.join(self.root_dir, rel), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest = blob_digest(data)
+            racy = scan_ns - st.st_mtime_ns < RACY_WINDOW_NS
+            if entry and entry.digest == digest:
+                # Touched but identical: only refresh the stat key
+                entry.mtime_ns, entry.size, entry.inode = stat_key
+                entry.racy = racy
+                continue
+            try:
+                self.blobs.put(data.decode("utf-8"), digest)
+                is_text = True
+            except UnicodeDecodeError:
+                is_text = False
+            self.entries[rel] = SnapshotEntry(*stat_key, digest, generation, racy, is_text)
+            self.deleted.pop(rel, None)
+            dirty.add(rel)
+
+        for rel in [r for r in self.entries if r not in seen and in_scope(r)]:
+            del self.entries[rel]
+            self.deleted[rel] = generation
+            dirty.add(rel)
+
+        if dirty:
+            self.generation = generation
+        return dirty
+
+    def changed_since(self, generation: int) -> set[str]:
+        """Returns the paths created, modified or deleted after the given generation."""
+        dirty = {p for p, e in self.entries.items() if e.generation > generation}
+        dirty.update(p for p, g in self.deleted.items() if g > generation)
+        return dirty
+
+    def bulk_since(self, generation: int) -> dict:
+        """Returns the directories reported as bulk changes after the given generation."""
+        return {d: count for d, (g, count) in self.bulk.items() if g > generation}
+
+    def snapshot(self) -> dict:
+        """Returns the current path -> digest map of the text files."""
+        return {p: e.digest for p, e in self.entries.items() if e.is_text}
+
+    def read(self, path: str) -> str:
+        """Returns the indexed content of a text file."""
+        return self.blobs.get(self.entries[path].digest)
@@ -0,0 +1,80 @@
+import json
+import threading
+from google.genai import types
+
+DEFAULT_DESCRIPTION = "Execute action"
+DEFAULT_SCHEMA = {"type": "OBJECT", "properties": {}}
+
+TOOL_SCHEMAS = {
+    "write_file": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "content": {"type": "STRING"}}, "required": ["path", "content"]},
+    "read_file": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "start_line": {"type": "INTEGER"}, "end_line": {"type": "INTEGER"}}, "required": ["path"]},
+    "smart_replace": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}, "old_text": {"type": "STRING"}, "new_text": {"type": "STRING"}}, "required": ["path", "old_text", "new_text"]},
+    "execute_command": {"type": "OBJECT", "properties": {"command": {"type": "STRING"}}, "required": ["command"]},
+    "grep_search": {"type": "OBJECT", "properties": {"pattern": {"type": "STRING"}, "path": {"type": "STRING"}, "include": {"type": "STRING"}, "exclude": {"type": "STRING"}, "max_results": {"type": "INTEGER"}}, "required": ["pattern"]},
+    "glob_search": {"type": "OBJECT", "properties": {"pattern": {"type": "STRING"}}, "required": ["pattern"]},
+    "file_info": {"type": "OBJECT", "properties": {"path": {"type": "STRING"}}, "required": ["path"]},
+    "search_web": {"type": "OBJECT", "properties": {"query": {"type": "STRING"}}, "required": ["query"]},
+    "web_fetch": {"type": "OBJECT", "properties": {"url": {"type": "STRING"}}, "required": ["url"]},
+    "ask_user": {"type": "OBJECT", "properties": {"question": {"type": "STRING"}}, "required": ["question"]},
+    "request_confirmation": {"type": "OBJECT", "properties": {"action": {"type": "STRING"}}, "required": ["action"]},
+    "git_commit": {"type": "OBJECT", "properties": {"message": {"type": "STRING"}}, "required": ["message"]},
+    "get_full_diff": {"type": "OBJECT", "properties": {"handle": {"type": "STRING"}, "path": {"type": "STRING"}}, "required": ["handle"]},
+    "update_todo_list": {"type": "OBJECT", "properties": {"todo_content": {"type": "STRING"}}, "required": ["todo_content"]},
+    "report_status": {"type": "OBJECT", "properties": {"message": {"type": "STRING"}}, "required": ["message"]},
+    "request_specialist": {"type": "OBJECT", "properties": {"role_name": {"type": "STRING"}, "role_description": {"type": "STRING"}, "weight": {"type": "STRING", "enum": ["HEAVY", "MEDIUM", "LIGHT"]}}, "required": ["role_name", "role_description"]},
+}
+
+class ToolRegistry:
+    """Builds each FunctionDeclaration once per (name, description) for the whole process.
+
+    tools() returns the same tuple to every agent whose tool map has the same names and
+    docstrings, so per-list work (the JSON fingerprint hashed by the prompt cache, the
+    types.Tool sent when there is no cache) is also done once.
+    """
+
+    def __init__(self):
+        self._declarations = {} # (name, description) -> FunctionDeclaration
+        self._lists = {}        # ((name, description), ...) -> tuple of declarations
+        self._derived = {}      # id(tuple) -> (tuple, fingerprint, types.Tool)
+        self._lock = threading.Lock()
+
+    def declaration(self, name, description=DEFAULT_DESCRIPTION):
+        key = (name, description)
+        with self._lock:
+            found = self._declarations.get(key)
+            if found is None:
+                found = self._declarations[key] = types.FunctionDeclaration(
+                    name=name, description=description, parameters=TOOL_SCHEMAS.get(name, DEFAULT_SCHEMA))
+            return found
+
+    def tools(self, tool_map) -> tuple:
+        """Shared, immutable declaration list for a name -> function map."""
+        key = tuple((name, func.__doc__ or DEFAULT_DESCRIPTION) for name, func in tool_map.items())
+        with self._lock:
+            found = self._lists.get(key)
+        if found is None:
+            found = tuple(self.declaration(name, description) for name, description in key)
+            with self._lock:
+                found = self._lists.setdefault(key, found)
+        return found
+
+    def _derive(self, tools):
+        entry = self._derived.get(id(tools))
+        if entry is not None and entry[0] is tools:
+            return entry
+        fingerprint = "".join(json.dumps(t.model_dump(mode="json", exclude_none=True), sort_keys=True) for t in tools)
+        entry = (tools, fingerprint, types.Tool(function_declarations=list(tools)))
+        with self._lock:
+            if any(shared is tools for shared in self._lists.values()):
+                self._derived[id(tools)] = entry # The registry keeps the tuple alive, so its id stays unique
+        return entry
+
+    def fingerprint(self, tools) -> str:
+        """Canonical JSON of a declaration list."""
+        return self._derive(tools)[1]
+
+    def as_tool(self, tools):
+        """types.Tool wrapping a declaration list."""
+        return self._derive(tools)[2]
+
+TOOLS = ToolRegistry() # Shared by all agents of the process
@@ -0,0 +1,183 @@
+import base64
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError: # Python 3.10
+    import sre_parse
+    import sre_constants
+from .grep import DEFAULT_MAX_FILE_SIZE, SNIFF_SIZE
+
+INDEX_VERSION = 1
+RACY_WINDOW_NS = 2_000_000_000
+# Each trigram is stored as NUL + 3 bytes. Indexed text never contains NUL (binary
+# files are skipped), so a membership test is a plain substring search.
+_TRIGRAM_RE = re.compile(rb"(?=([^\0]{3}))", re.S)
+
+def extract_trigrams(data: bytes) -> bytes:
+    """Returns the sorted, NUL-prefixed set of lowercase trigrams of data."""
+    tris = set(_TRIGRAM_RE.findall(data.lower()))
+    return b"".join(b"\0" + t for t in sorted(tris))
+
+def _literal_runs(items, runs):
+    """Appends to runs the literal strings (3+ chars) that every match of items must contain."""
+    current = []
+    def flush():
+        if len(current) >= 3:
+            runs.append("".join(current))
+        current.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            current.append(chr(av))
+        elif op is sre_constants.AT:
+            continue # Zero-width anchors keep literals adjacent
+        elif op is sre_constants.SUBPATTERN:
+            flush()
+            inner = av[-1]
+            if not (len(inner.data) == 1 and inner.data[0][0] is sre_constants.BRANCH):
+                _literal_runs(inner.data, runs)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            flush()
+            _literal_runs(list(av[2]), runs)
+        else:
+            flush()
+    flush()
+
+def required_trigrams(pattern: str):
+    """Returns alternatives (lists of trigram sets, any of which must be fully present in
+    a matching file), or None if the pattern cannot narrow the search."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    data = parsed.data
+    branches = [data]
+    if len(data) == 1 and data[0][0] is sre_constants.BRANCH:
+        branches = data[0][1][1]
+    alternatives = []
+    for branch in branches:
+        runs = []
+        _literal_runs(list(branch), runs)
+        tris = set()
+        for run in runs:
+            raw = run.lower().encode("utf-8")
+            tris.update(raw[i:i + 3] for i in range(len(raw) - 2))
+        if not tris:
+            return None # One unconstrained branch matches anywhere
+        alternatives.append({b"\0" + t for t in tris})
+    return alternatives or None
+
+class TrigramIndex:
+    """Trigram index narrowing the candidate files of a regex before grep evaluates it.
+
+    Entries are refreshed incrementally from file stats (and write hooks via mark_dirty)
+    and persisted as JSON when a path is given.
+    """
+
+    def __init__(self, path=None, max_file_size=DEFAULT_MAX_FILE_SIZE):
+        self.path = path
+        self.max_file_size = max_file_size
+        self._files = {}  # rel -> [mtime_ns, size, trigram blob or None if not indexable, racy]
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        if raw.get("version") != INDEX_VERSION:
+            return
+        for rel, (mtime, size, blob) in raw.get("files", {}).items():
+            tris = zlib.decompress(base64.b64decode(blob)) if blob is not None else None
+            self._files[rel] = [mtime, size, tris, False]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock: # Concurrent grep_search calls: one writer at a time, each with its own temp file
+            if not self._dirty:
+                return
+            files = {
+                rel: [m, s, base64.b64encode(zlib.compress(t)).decode("ascii") if t is not None else None]
+                for rel, (m, s, t, _) in self._files.items()
+            }
+            fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"version": INDEX_VERSION, "files": files}, f)
+                os.replace(tmp, self.path)
+            except BaseException:
+                try: os.unlink(tmp)
+                except OSError: pass
+                raise
+            self._dirty = False
+
+    def mark_dirty(self, rel: str):
+        """Write hook: forces rel to be re-indexed on the next update."""
+        with self._lock:
+            if self._files.pop(rel, None) is not None:
+                self._dirty = True
+
+    def _index_file(self, full, size):
+        if size > self.max_file_size:
+            return None
+        try:
+            with open(full, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b"\0" in data[:SNIFF_SIZE]:
+            return None
+        return extract_trigrams(data)
+
+    def update(self, root_dir, files) -> int:
+        """Re-indexes the files whose stat changed and forgets those no longer listed.
+        files must be the complete listing. Returns the number of entries touched."""
+        now = time.time_ns()
+        reindexed = 0
+        live = set(files)
+        with self._lock:
+            for rel in files:
+                full = os.path.join(root_dir, rel)
+                try: st = os.stat(full)
+                except OSError: continue
+                entry = self._files.get(rel)
+                if entry and not entry[3] and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                    continue
+                racy = now - st.st_mtime_ns < RACY_WINDOW_NS
+                self._files[rel] = [st.st_mtime_ns, st.st_size, self._index_file(full, st.st_size), racy]
+                reindexed += 1
+            for rel in [r for r in self._files if r not in live]:
+                del self._files[rel]
+                reindexed += 1
+            if reindexed:
+                self._dirty = True
+        return reindexed
+
+    def candidates(self, pattern: str, files) -> list[str]:
+        """Filters files down to those that may match pattern (order preserved)."""
+        alternatives = required_trigrams(pattern)
+        if alternatives is None:
+            return list(files)
+        out = []
+        with self._lock:
+            for rel in files:
+                entry = self._files.get(rel)
+                blob = entry[2] if entry else None
+                if blob is None or any(all(t in blob for t in alt) for alt in alternatives):
+                    out.append(rel)
+        return out
+
+    def __len__(self):
+        return len(self._files)
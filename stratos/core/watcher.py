@@ -0,0 +1,309 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# More events than this under one top-level directory in a single drain are
+# collapsed into a bulk marker (e.g. 'npm install' filling node_modules).
+BULK_THRESHOLD = 200
+SKIP_DIRS = {".git"}
+
+def _skip_vcs(rel, is_dir):
+    return is_dir and os.path.basename(rel) in SKIP_DIRS
+
+class ChangeSet:
+    """Paths changed since the last drain, relative to the watched root."""
+
+    def __init__(self, created=None, modified=None, deleted=None, bulk=None, overflow=False):
+        self.created = created or set()
+        self.modified = modified or set()
+        self.deleted = deleted or set()
+        self.bulk = bulk or {}  # top-level dir -> number of coalesced events
+        self.overflow = overflow  # events were lost: callers must rescan everything
+
+    @property
+    def paths(self) -> set[str]:
+        return self.created | self.modified | self.deleted
+
+    @property
+    def structural(self) -> bool:
+        """True if files or directories appeared or disappeared."""
+        return bool(self.created or self.deleted or self.bulk or self.overflow)
+
+    def __bool__(self):
+        return bool(self.paths or self.bulk or self.overflow)
+
+    def __repr__(self):
+        return (f"ChangeSet(created={len(self.created)}, modified={len(self.modified)}, "
+                f"deleted={len(self.deleted)}, bulk={self.bulk}, overflow={self.overflow})")
+
+class BaseWatcher:
+    """Accumulates change events and hands them out as coalesced ChangeSets."""
+
+    def __init__(self, root_dir, bulk_threshold=BULK_THRESHOLD, ignore=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.bulk_threshold = bulk_threshold
+        self.ignore = ignore or _skip_vcs # (rel, is_dir) -> bool, e.g. FileIndex.is_ignored
+        self._lock = threading.Lock()
+        self._warning = None
+        self._reset()
+
+    def _reset(self):
+        self._created, self._modified, self._deleted = set(), set(), set()
+        self._overflow = False
+
+    def take_warning(self):
+        """A problem to report once (e.g. directories that could not be watched), or None."""
+        with self._lock:
+            warning, self._warning = self._warning, None
+        return warning
+
+    def _record(self, kind, rel):
+        with self._lock:
+            if kind == "created":
+                if rel in self._deleted:
+                    self._deleted.discard(rel)
+                    self._modified.add(rel)
+                else:
+                    self._created.add(rel)
+            elif kind == "modified":
+                if rel not in self._created:
+                    self._modified.add(rel)
+            elif kind == "deleted":
+                self._modified.discard(rel)
+                if rel in self._created:
+                    self._created.discard(rel)
+                else:
+                    self._deleted.add(rel)
+
+    def _poll(self):
+        """Collects pending events. Implemented by subclasses."""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def drain(self) -> ChangeSet:
+        """Returns everything that changed since the previous drain."""
+        self._poll()
+        with self._lock:
+            changes = ChangeSet(self._created, self._modified, self._deleted, overflow=self._overflow)
+            self._reset()
+        if changes.overflow:
+            return changes
+
+        # Coalesce bursts: group by top-level directory
+        groups = {}
+        for rel in changes.paths:
+            top = rel.split(os.sep, 1)[0]
+            if top != rel:
+                groups.setdefault(top, []).append(rel)
+        for top, members in groups.items():
+            if len(members) > self.bulk_threshold:
+                changes.bulk[top] = len(members)
+                for rel in members:
+                    changes.created.discard(rel)
+                    changes.modified.discard(rel)
+                    changes.deleted.discard(rel)
+        return changes
+
+class InotifyWatcher(BaseWatcher):
+    """Linux inotify watcher (via ctypes) with recursive directory watches."""
+
+    def __init__(self, root_dir, bulk_threshold=BULK_THRESHOLD, ignore=None):
+        super().__init__(root_dir, bulk_threshold, ignore)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}  # wd -> rel dir ("" for root)
+        self.unwatched = set() # Dirs inotify refused (e.g. ENOSPC): every drain rescans until they are watched
+        self._read_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._watch_tree("", report=False)
+
+    def _watch_tree(self, rel_dir, report=True):
+        """Watches rel_dir and its subdirectories; optionally reports their files as created."""
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.root_dir, rel)
+            wd = self._add_watch(self._fd, os.fsencode(full), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                with self._lock:
+                    if rel not in self.unwatched:
+                        self._warning = (f"cannot watch '{rel or '.'}' ({os.strerror(err) if err else 'inotify_add_watch failed'}), "
+                                         "falling back to full rescans (raise fs.inotify.max_user_watches?)")
+                    self.unwatched.add(rel)
+                    self._overflow = True # Changes below rel are invisible: the next drain rescans everything
+                continue
+            self._watches[wd] = rel
+            try:
+                with os.scandir(full) as it:
+                    for entry in it:
+                        child = os.path.join(rel, entry.name) if rel else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.ignore(child, True):
+                                stack.append(child)
+                        elif report and not self.ignore(child, False):
+                            self._record("created", child)
+            except OSError:
+                continue
+
+    def _unwatch_tree(self, rel_dir):
+        """Drops the watches of a directory that was moved away or deleted."""
+        prefix = rel_dir + os.sep
+        for wd, rel in list(self._watches.items()):
+            if rel == rel_dir or rel.startswith(prefix):
+                self._rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _poll(self):
+        with self._read_lock:
+            if self.unwatched:
+                # Retry the refused directories. Until the drain after a retry, changes there were unseen: rescan
+                with self._lock:
+                    retry, self.unwatched = self.unwatched, set()
+                    self._overflow = True
+                for rel in retry:
+                    if os.path.isdir(os.path.join(self.root_dir, rel)):
+                        self._watch_tree(rel, report=False)
+            while True:
+                try:
+                    buf = os.read(self._fd, 65536)
+                except (BlockingIOError, OSError):
+                    return
+                if not buf:
+                    return
+                self._parse(buf)
+
+    def _parse(self, buf):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                with self._lock: self._overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            parent = self._watches.get(wd)
+            if parent is None or not name:
+                continue
+            rel = os.path.join(parent, name) if parent else name
+            if self.ignore(rel, bool(mask & IN_ISDIR)):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._record("created", rel)
+                    self._watch_tree(rel)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._record("deleted", rel)
+                    self._unwatch_tree(rel)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self._record("created", rel)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._record("deleted", rel)
+            elif mask & (IN_MODIFY | IN_CLOSE_WRITE):
+                self._record("modified", rel)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            if ready:
+                self._poll()
+
+    def start(self):
+        """Processes events in the background so new directories are watched immediately."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        try: os.close(self._fd)
+        except OSError: pass
+        self._fd = -1
+
+class PollingWatcher(BaseWatcher):
+    """Portable fallback: diffs a stat map of the tree on every drain (no file reads)."""
+
+    def __init__(self, root_dir, bulk_threshold=BULK_THRESHOLD, ignore=None):
+        super().__init__(root_dir, bulk_threshold, ignore)
+        self._stats = self._scan()
+
+    def _scan(self):
+        stats = {}
+        stack = [self.root_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        rel = os.path.relpath(entry.path, self.root_dir)
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.ignore(rel, True):
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and not self.ignore(rel, False):
+                            try: st = entry.stat(follow_symlinks=False)
+                            except OSError: continue
+                            stats[rel] = (st.st_mtime_ns, st.st_size, st.st_ino)
+            except OSError:
+                continue
+        return stats
+
+    def _poll(self):
+        current = self._scan()
+        for rel, key in current.items():
+            old = self._stats.get(rel)
+            if old is None: self._record("created", rel)
+            elif old != key: self._record("modified", rel)
+        for rel in self._stats.keys() - current.keys():
+            self._record("deleted", rel)
+        self._stats = current
+
+def create_watcher(root_dir, bulk_threshold=BULK_THRESHOLD, ignore=None):
+    """Returns an inotify watcher on Linux, or the polling fallback elsewhere."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root_dir, bulk_threshold, ignore)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root_dir, bulk_threshold, ignore)
@@ -0,0 +1,287 @@
+import hashlib
+import http.client
+import json
+import os
+import re
+import ssl
+import tempfile
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+DEFAULT_TIMEOUT = 20
+MAX_RESPONSE_SIZE = 5 * 1024 * 1024 # Bytes read from the wire (after decompression)
+MAX_REDIRECTS = 5
+MAX_IDLE_PER_HOST = 4
+USER_AGENT = "Mozilla/5.0 (compatible; StratosCLI/1.0)"
+
+class WebResponse:
+    def __init__(self, url, status, headers, body, from_cache=False, truncated=False):
+        self.url = url
+        self.status = status
+        self.headers = headers # Lowercased names
+        self.body = body
+        self.from_cache = from_cache
+        self.truncated = truncated
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def text(self) -> str:
+        m = re.search(r"charset=([\w-]+)", self.headers.get("content-type", ""), re.I)
+        try: return self.body.decode(m.group(1) if m else "utf-8", "replace")
+        except LookupError: return self.body.decode("utf-8", "replace")
+
+class ConnectionPool:
+    """Idle keep-alive connections keyed by (scheme, host, port, proxy)."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+        self.created = 0
+
+    def _proxy_for(self, scheme, host):
+        proxy = getproxies().get(scheme)
+        if not proxy or proxy_bypass(host):
+            return None
+        parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        return parts.hostname, parts.port or 8080
+
+    def get(self, scheme, host, port):
+        proxy = self._proxy_for(scheme, host)
+        key = (scheme, host, port, proxy)
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return key, conns.pop()
+        self.created += 1
+        if proxy and scheme == "https":
+            conn = http.client.HTTPSConnection(*proxy, timeout=self.timeout, context=self._ssl)
+            conn.set_tunnel(host, port)
+        elif proxy:
+            conn = http.client.HTTPConnection(*proxy, timeout=self.timeout)
+        elif scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return key, conn
+
+    def put(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < MAX_IDLE_PER_HOST:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns: conn.close()
+
+class WebCache:
+    """On-disk response cache revalidated with ETag / Last-Modified."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = str(cache_dir)
+        self._lock = threading.Lock() # A body and its metadata are swapped in (and read) together
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with self._lock:
+                with open(meta_path, "r") as f: meta = json.load(f)
+                with open(body_path, "rb") as f: body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def put(self, url, headers, body):
+        """Writes each file to a unique temp file first: concurrent fetches of a URL never share one."""
+        meta_path, body_path = self._paths(url)
+        directory = os.path.dirname(meta_path)
+        os.makedirs(directory, exist_ok=True)
+        meta = {"url": url, "headers": headers, "stored_at": time.time()}
+        staged = []
+        try:
+            for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode("utf-8"))):
+                fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                staged.append(tmp)
+                with os.fdopen(fd, "wb") as f: f.write(data)
+            with self._lock:
+                os.replace(staged[0], body_path)
+                os.replace(staged[1], meta_path)
+            staged.clear()
+        finally:
+            for tmp in staged:
+                try: os.unlink(tmp)
+                except OSError: pass
+
+class WebClient:
+    """Pooled HTTP(S) client with redirects, gzip, a size cap and a conditional disk cache."""
+
+    def __init__(self, cache_dir=None, timeout=DEFAULT_TIMEOUT, max_size=MAX_RESPONSE_SIZE):
+        self.pool = ConnectionPool(timeout)
+        self.cache = WebCache(cache_dir) if cache_dir else None
+        self.max_size = max_size
+
+    def _read_body(self, resp):
+        """Reads (and decompresses) at most max_size bytes; returns (body, truncated)."""
+        encoding = resp.getheader("Content-Encoding", "").lower()
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS) \
+            if encoding in ("gzip", "deflate") else None
+        chunks, size = [], 0
+        while size <= self.max_size:
+            raw = resp.read(65536)
+            if not raw:
+                break
+            data = decoder.decompress(raw, self.max_size + 1 - size) if decoder else raw
+            chunks.append(data)
+            size += len(data)
+        body = b"".join(chunks)
+        return body[:self.max_size], size > self.max_size
+
+    def _request(self, url, headers):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query: path += f"?{parts.query}"
+        for attempt in range(2): # A reused keep-alive connection may have been closed by the server
+            key, conn = self.pool.get(parts.scheme, parts.hostname, port)
+            target = url if key[3] and parts.scheme == "http" else path
+            try:
+                conn.request("GET", target, headers={"Host": parts.netloc, **headers})
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if attempt: raise
+                continue
+            except BaseException: # Timeout, TLS error...: the connection state is unknown, never reuse it
+                conn.close()
+                raise
+            try:
+                body, truncated = self._read_body(resp)
+            except BaseException: # Half-read response left on the socket
+                conn.close()
+                raise
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if truncated or resp.will_close:
+                conn.close()
+            else:
+                self.pool.put(key, conn)
+            return resp.status, resp_headers, body, truncated
+
+    def fetch(self, url) -> WebResponse:
+        for _ in range(MAX_REDIRECTS + 1):
+            if urlsplit(url).scheme not in ("http", "https"):
+                raise ValueError(f"Unsupported URL scheme: {url}")
+            headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate", "Accept": "*/*"}
+            meta, cached_body = self.cache.get(url) if self.cache else (None, None)
+            if meta:
+                if meta["headers"].get("etag"): headers["If-None-Match"] = meta["headers"]["etag"]
+                if meta["headers"].get("last-modified"): headers["If-Modified-Since"] = meta["headers"]["last-modified"]
+            status, resp_headers, body, truncated = self._request(url, headers)
+            if status in (301, 302, 303, 307, 308) and "location" in resp_headers:
+                url = urljoin(url, resp_headers["location"])
+                continue
+            if status == 304 and meta:
+                return WebResponse(url, 200, meta["headers"], cached_body, from_cache=True)
+            cacheable = status == 200 and not truncated and "no-store" not in resp_headers.get("cache-control", "")
+            if self.cache and cacheable and ("etag" in resp_headers or "last-modified" in resp_headers):
+                kept = {k: resp_headers[k] for k in ("content-type", "etag", "last-modified") if k in resp_headers}
+                self.cache.put(url, kept, body)
+            return WebResponse(url, status, resp_headers, body, truncated=truncated)
+        raise ValueError(f"Too many redirects (>{MAX_REDIRECTS})")
+
+    def close(self):
+        self.pool.close()
+
+class _MarkdownExtractor(HTMLParser):
+    SKIP = {"script", "style", "noscript", "svg", "template", "iframe", "head", "nav", "footer", "form", "button"}
+    BLOCK = {"p", "div", "section", "article", "main", "header", "ul", "ol", "table", "tr", "br", "hr",
+             "blockquote", "dl", "dt", "dd", "figure", "figcaption"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.title = ""
+        self._skip = 0
+        self._in_title = False
+        self._pre = 0
+        self._href = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in self.SKIP:
+            self._skip += 1
+            return
+        if self._skip:
+            return
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.out.append("\n\n" + "#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self.out.append("\n- ")
+        elif tag == "pre":
+            self._pre += 1
+            self.out.append("\n```\n")
+        elif tag == "code" and not self._pre:
+            self.out.append("`")
+        elif tag in ("td", "th"):
+            self.out.append(" | ")
+        elif tag == "a":
+            self._href = dict(attrs).get("href")
+            self.out.append("[")
+        elif tag in self.BLOCK:
+            self.out.append("\n\n" if tag != "br" else "\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+            return
+        if self._skip:
+            return
+        if tag == "pre":
+            self._pre = max(0, self._pre - 1)
+            self.out.append("\n```\n")
+        elif tag == "code" and not self._pre:
+            self.out.append("`")
+        elif tag == "a":
+            href, self._href = self._href, None
+            self.out.append(f"]({href})" if href and not href.startswith(("#", "javascript:")) else "]")
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6") or tag in self.BLOCK:
+            self.out.append("\n\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._skip:
+            return
+        self.out.append(data if self._pre else re.sub(r"\s+", " ", data))
+
+def html_to_markdown(html: str) -> str:
+    """Readable markdown-ish text of an HTML page (scripts, styles and navigation dropped)."""
+    parser = _MarkdownExtractor()
+    parser.feed(html)
+    parser.close()
+    text = "".join(parser.out)
+    text = re.sub(r"\[\s*\]\([^)]*\)|\[\s*\]", "", text) # Empty links (icons)
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    title = parser.title.strip()
+    return f"# {title}\n\n{text}" if title and not text.startswith("# ") else text
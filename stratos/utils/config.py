@@ -6,6 +6,10 @@ from pathlib import Path
 STRATOS_HOME = Path.home() / ".config" / "stratos"
 CONFIG_FILE = STRATOS_HOME / "config.json"
 ENV_FILE = STRATOS_HOME / ".env"
+POLICY_FILE = STRATOS_HOME / "policy.toml"
+CACHE_DIR = STRATOS_HOME / "cache"
+SEARCH_CACHE_FILE = CACHE_DIR / "search.sqlite3"
+MISSION_STORE_FILE = "mission.sqlite3" # Per project, next to metadata.json
 
 DEFAULT_CONFIG = {
     "projects_path": str(Path.home() / "StratosProjects"),
@@ -13,7 +17,11 @@ DEFAULT_CONFIG = {
     "show_thoughts": True,
     "debug_mode": False,
     "display_mode": "dashboard",
-    "show_results": True
+    "show_results": True,
+    "fs_watcher": True,
+    "persistent_shell": True,
+    "search_cache_ttl": 86400,
+    "retrieval_top_k": 6
 }
 
 def ensure_home():
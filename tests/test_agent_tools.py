@@ -0,0 +1,60 @@
+import unittest
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock
+from google.genai import types
+from stratos.core.agent import AIAgent
+from stratos.core.sandbox import Sandbox
+
+class TestParallelTools(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.agent = AIAgent("AGENT_CODER", "ENGINEER", Sandbox(self.test_dir), MagicMock(show_results=False), "key",
+                             {"name": "demo", "desc": "demo app"})
+        self.events = []
+        self.lock = threading.Lock()
+
+        def slow_read(path):
+            with self.lock: self.events.append(("start", path))
+            time.sleep(0.2)
+            with self.lock: self.events.append(("end", path))
+            return f"content of {path}"
+
+        def write(path, content):
+            with self.lock: self.events.append(("write", path))
+            return "SUCCESS"
+
+        self.agent.tool_map.update(read_file=slow_read, write_file=write)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_tools(self, *specs):
+        return asyncio.run(self.agent._run_tools([types.FunctionCall(name=name, args=args) for name, args in specs]))
+
+    def test_reads_run_concurrently_in_order(self):
+        started = time.monotonic()
+        results = self.run_tools(*[("read_file", {"path": f"f{i}"}) for i in range(4)])
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(results, [f"content of f{i}" for i in range(4)])
+
+    def test_mutating_call_is_a_barrier(self):
+        results = self.run_tools(
+            ("read_file", {"path": "a"}), ("read_file", {"path": "b"}),
+            ("write_file", {"path": "c", "content": "x"}),
+            ("read_file", {"path": "c"}))
+        self.assertEqual(results, ["content of a", "content of b", "SUCCESS", "content of c"])
+        write = self.events.index(("write", "c"))
+        self.assertEqual(set(self.events[:write]), {("start", "a"), ("start", "b"), ("end", "a"), ("end", "b")})
+        self.assertEqual(self.events[write + 1:], [("start", "c"), ("end", "c")])
+
+    def test_errors_stay_in_place(self):
+        self.agent.tool_map["glob_search"] = MagicMock(side_effect=ValueError("bad pattern"))
+        results = self.run_tools(("glob_search", {"pattern": "["}), ("read_file", {"path": "a"}), ("nope", {}))
+        self.assertEqual(results, ["ERROR: bad pattern", "content of a", "ERROR: Unknown tool"])
+
+if __name__ == '__main__':
+    unittest.main()
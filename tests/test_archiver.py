@@ -0,0 +1,70 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from stratos.core.archiver import RollingArchiver, extractive_summarizer
+from stratos.core.pool import Blackboard
+from stratos.core.blobstore import BlobStore
+
+class TestRollingArchiver(unittest.TestCase):
+    def setUp(self):
+        sandbox = MagicMock()
+        sandbox.blob_store = BlobStore()
+        sandbox.get_structure_tree.return_value = "root/"
+        self.blackboard = Blackboard(sandbox, MagicMock())
+
+    def test_extractive_summarizer(self):
+        summary = extractive_summarizer("- old", ["first line\nsecond", "", "next"], limit=100)
+        self.assertEqual(summary, "- old\n- first line\n- next")
+        self.assertLessEqual(len(extractive_summarizer("", [f"entry {i}" for i in range(100)], limit=50)), 50)
+
+    def test_folds_old_logs_and_superseded_plans(self):
+        archiver = RollingArchiver(self.blackboard, keep_logs=4, fold_batch=4)
+        self.blackboard.post("MASTER_PLAN", "Plan A: flask")
+        self.blackboard.post("MASTER_PLAN", "Plan B: fastapi")
+        for i in range(10):
+            self.blackboard.post_discussion("CODER", f"step {i}")
+        self.assertTrue(archiver.schedule())
+        archiver.wait()
+        archive = self.blackboard.compressed_archive
+        self.assertIn("[SUPERSEDED MASTER_PLAN] Plan A: flask", archive)
+        self.assertIn("step 5", archive)
+        self.assertNotIn("step 6", archive)
+        self.assertEqual(len(self.blackboard.team_log), 4)
+        self.assertEqual(self.blackboard.superseded, ())
+        self.assertIn("COMPRESSED_ARCHIVE:", self.blackboard.get_all_context())
+        self.assertFalse(archiver.schedule()) # Nothing left to fold
+
+    def test_initial_plan_is_not_superseded(self):
+        self.blackboard.post("MASTER_PLAN", "Plan A: flask")
+        self.assertEqual(self.blackboard.superseded, ())
+        self.blackboard.post("MASTER_PLAN", "Plan B: fastapi")
+        self.assertEqual(self.blackboard.superseded, (("MASTER_PLAN", "Plan A: flask"),))
+
+    def test_runs_in_background_and_keeps_new_entries(self):
+        release = threading.Event()
+        def slow_summarizer(archive, entries, limit):
+            release.wait(5)
+            return f"{len(entries)} entries"
+        archiver = RollingArchiver(self.blackboard, slow_summarizer, keep_logs=2, fold_batch=2)
+        for i in range(5):
+            self.blackboard.post_discussion("CODER", f"step {i}")
+        self.assertTrue(archiver.schedule()) # Returns while the summarizer is still blocked
+        self.assertFalse(archiver.schedule()) # One fold at a time
+        self.blackboard.post_discussion("REVIEWER", "late entry")
+        release.set()
+        archiver.wait()
+        self.assertEqual(self.blackboard.compressed_archive, "3 entries")
+        self.assertEqual(len(self.blackboard.team_log), 3)
+        self.assertIn("late entry", self.blackboard.team_log[-1])
+
+    def test_summarizer_failure_keeps_history(self):
+        archiver = RollingArchiver(self.blackboard, MagicMock(side_effect=RuntimeError("down")), keep_logs=1, fold_batch=1)
+        for i in range(3):
+            self.blackboard.post_discussion("CODER", f"step {i}")
+        archiver.schedule()
+        archiver.wait()
+        self.assertEqual(len(self.blackboard.team_log), 3)
+        self.assertEqual(self.blackboard.compressed_archive, "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import threading
+from stratos.core.blobstore import BlobStore, HAS_ZSTD
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.store = BlobStore(compression="zlib", hot_size=2)
+
+    def test_roundtrip(self):
+        text = "def main():\n    pass\n" * 100
+        digest = self.store.put(text)
+        self.assertEqual(self.store.get(digest), text)
+
+    def test_deduplication(self):
+        a = self.store.put("same content")
+        b = self.store.put("same content")
+        self.assertEqual(a, b)
+        self.assertEqual(len(self.store), 1)
+
+    def test_large_blobs_compressed(self):
+        text = "x" * 10000
+        self.store.put(text)
+        self.assertLess(self.store.stats()["stored_bytes"], len(text))
+
+    def test_hot_cache_bounded(self):
+        digests = [self.store.put(f"blob {i}" * 200) for i in range(5)]
+        for d in digests:
+            self.store.get(d)
+        self.assertEqual(self.store.stats()["hot_blobs"], 2)
+
+    def test_collect(self):
+        keep = self.store.put("keep")
+        drop = self.store.put("drop")
+        self.assertEqual(self.store.collect([keep]), 1)
+        self.assertIn(keep, self.store)
+        self.assertNotIn(drop, self.store)
+        with self.assertRaises(KeyError):
+            self.store.get(drop)
+
+    def test_unknown_compression_falls_back(self):
+        store = BlobStore(compression="zstd")
+        self.assertIn(store.compression, ("zstd", "zlib"))
+        self.assertEqual(store.get(store.put("y" * 2000)), "y" * 2000)
+
+    @unittest.skipUnless(HAS_ZSTD, "zstandard not installed")
+    def test_concurrent_gets_zstd(self):
+        store = BlobStore(compression="zstd", hot_size=0)
+        texts = [f"line {i}\n" * (200 + i) for i in range(16)]
+        digests = [store.put(t) for t in texts]
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(50):
+                    for digest, text in zip(digests, texts):
+                        if store.get(digest) != text:
+                            errors.append(digest)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(errors, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+from types import SimpleNamespace
+from stratos.core.context_budget import ContextBudgeter, Section, TokenEstimator, state_budget, MAX_STATE_TOKENS, MIN_STATE_TOKENS
+from stratos.core.pool import Blackboard
+from stratos.core.blobstore import BlobStore
+
+class TestTokenEstimator(unittest.TestCase):
+    def test_calibration(self):
+        estimator = TokenEstimator()
+        self.assertEqual(estimator.estimate("x" * 400), 100)
+        estimator.observe("m", 3000, 1000)
+        self.assertEqual(estimator.ratio("m"), 3.0)
+        estimator.observe("m", 4000, 1000)
+        self.assertAlmostEqual(estimator.ratio("m"), 3.3)
+        self.assertEqual(estimator.ratio("other"), 4.0) # Calibrated per model
+        estimator.observe("m", 100, 0) # Ignored
+        self.assertAlmostEqual(estimator.ratio("m"), 3.3)
+
+    def test_state_budget(self):
+        self.assertEqual(state_budget("gemini-2.5-flash"), MAX_STATE_TOKENS)
+        self.assertGreaterEqual(state_budget("unknown"), MIN_STATE_TOKENS)
+
+class TestContextBudgeter(unittest.TestCase):
+    def setUp(self):
+        self.budgeter = ContextBudgeter(TokenEstimator(chars_per_token=1.0))
+
+    def test_everything_fits(self):
+        text, usage = self.budgeter.assemble([Section("a", "A:", "alpha", 0), Section("b", "B:", "", 1)], 100)
+        self.assertEqual(text, "A:\nalpha")
+        self.assertEqual(list(usage), ["a"])
+
+    def test_priority_and_leftover(self):
+        sections = [
+            Section("tree", "TREE:", "\n".join(f"dir/file_{i}.py" for i in range(50)), priority=2, share=0.2),
+            Section("plan", "PLAN:", "p" * 50, priority=0, share=0.2),
+            Section("log", "LOG:", "\n".join(f"entry {i}" for i in range(30)), priority=1, share=0.2, keep="tail"),
+        ]
+        text, usage = self.budgeter.assemble(sections, 300)
+        self.assertEqual(usage["plan"][0], usage["plan"][1]) # Highest priority kept whole
+        self.assertIn("entry 29", text) # Tail sections keep the newest lines
+        self.assertNotIn("entry 0\n", text)
+        self.assertIn("dir/file_0.py", text) # Head sections keep the first lines
+        self.assertIn("[TRUNCATED]", text)
+        self.assertLessEqual(sum(u for u, _ in usage.values()), 300)
+        self.assertLess(text.index("TREE:"), text.index("PLAN:")) # Output order is the given order
+
+class TestBlackboardBudget(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = MagicMock()
+        self.sandbox.blob_store = BlobStore()
+        self.logger = MagicMock()
+        self.blackboard = Blackboard(self.sandbox, self.logger)
+
+    def test_large_tree_trimmed_and_reported(self):
+        self.sandbox.get_structure_tree.return_value = "\n".join(f"src/module_{i}.py" for i in range(20000))
+        self.blackboard.post("MASTER_PLAN", "Build it")
+        agent = SimpleNamespace(name="AGENT_CODER", model_id="gemini-2.5-flash", seen_generation=None)
+        context = self.blackboard.get_all_context(current_diff="[NEW] a.py", agent=agent)
+        self.assertIn("MASTER_PLAN: Build it", context)
+        self.assertIn("[NEW] a.py", context)
+        self.assertIn("[TRUNCATED]", context)
+        used, wanted = self.blackboard.last_context_usage["tree"]
+        self.assertLess(used, wanted)
+        self.assertTrue(any("CONTEXT_BUDGET AGENT_CODER" in str(c) for c in self.logger.debug.call_args_list))
+
+if __name__ == "__main__":
+    unittest.main()
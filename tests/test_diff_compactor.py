@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import MagicMock
+from stratos.core.diff_compactor import DiffCompactor, collapse_reason
+from stratos.core.git_diff import FileChange
+from stratos.core.pool import Blackboard
+from stratos.core.blobstore import BlobStore
+
+def patch_of(path, lines):
+    return f"--- a/{path}\n+++ b/{path}\n@@ -1,{lines} +1,{lines} @@\n" + "".join(f"-old {i}\n+new {i}\n" for i in range(lines))
+
+def change(path, lines, **kwargs):
+    return FileChange("M", path, added=lines, deleted=lines, patch=patch_of(path, lines), **kwargs)
+
+class TestDiffCompactor(unittest.TestCase):
+    def test_collapse_reason(self):
+        self.assertEqual(collapse_reason(change("web/package-lock.json", 1)), "lockfile")
+        self.assertEqual(collapse_reason(change("dist/app.js", 1)), "generated")
+        self.assertEqual(collapse_reason(change("static/app.min.js", 1)), "generated")
+        self.assertEqual(collapse_reason(FileChange("M", "logo.png", binary=True)), "binary")
+        self.assertEqual(collapse_reason(change("src/app.py", 1)), "")
+
+    def test_small_report_inlined_without_handle(self):
+        report = DiffCompactor().render([change("a.py", 2)])
+        self.assertIn("[MOD] a.py:\n--- a/a.py", report)
+        self.assertNotIn("get_full_diff", report)
+
+    def test_budgets(self):
+        compactor = DiffCompactor(file_budget=500, total_budget=250)
+        changes = [change("big.py", 100), change("m1.py", 5), change("m2.py", 5), change("m3.py", 5), change("yarn.lock", 3)]
+        report = compactor.render(changes)
+        self.assertIn("[MOD] big.py (+100/-100, diff too large)", report)
+        self.assertIn("[MOD] yarn.lock (+3/-3, lockfile)", report)
+        self.assertEqual(report.count("report budget exhausted"), 1) # Two of the three 5-line patches fit
+        self.assertIn("get_full_diff(handle=", report)
+
+    def test_stable_handle_and_full_diff(self):
+        compactor = DiffCompactor(file_budget=100)
+        changes = [change("big.py", 20), change("small.py", 1)]
+        first, second = compactor.render(changes), compactor.render(changes)
+        self.assertEqual(first, second)
+        handle = first.rsplit("[DIFF ", 1)[1].split("]")[0]
+        self.assertIn("+new 19", compactor.full_diff(handle, "big.py"))
+        self.assertIn("+new 0", compactor.full_diff(handle, "./small.py"))
+        self.assertIn("not part of diff", compactor.full_diff(handle, "other.py"))
+        self.assertIn("Unknown or expired", compactor.full_diff("Dmissing"))
+
+    def test_reports_expire(self):
+        compactor = DiffCompactor(file_budget=10, max_reports=2)
+        handles = [compactor.render([change(f"f{i}.py", 3)]).rsplit("[DIFF ", 1)[1].split("]")[0] for i in range(3)]
+        self.assertIn("Unknown or expired", compactor.full_diff(handles[0]))
+        self.assertIn("+new 2", compactor.full_diff(handles[2]))
+
+class TestBlackboardCompaction(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = MagicMock()
+        self.sandbox.blob_store = BlobStore()
+        self.blackboard = Blackboard(self.sandbox, MagicMock())
+
+    def _snap(self, files):
+        return {path: self.sandbox.blob_store.put(content) for path, content in files.items()}
+
+    def test_lockfile_collapsed_and_fetchable(self):
+        self.blackboard.last_snapshot = self._snap({"poetry.lock": "a = 1\n", "main.py": "x = 1\n"})
+        report = self.blackboard.compute_diff(self._snap({"poetry.lock": "a = 2\nb = 3\n", "main.py": "x = 2\n"}))
+        self.assertIn("[MOD] poetry.lock (+2/-1, lockfile)", report)
+        self.assertIn("[MOD] main.py:", report)
+        handle = report.rsplit("[DIFF ", 1)[1].split("]")[0]
+        self.assertIn("+b = 3", self.blackboard.get_full_diff(handle, "poetry.lock"))
+
+if __name__ == "__main__":
+    unittest.main()
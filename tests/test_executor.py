@@ -0,0 +1,99 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from stratos.core.executor import OutputBuffer, run_command
+from stratos.core.sandbox import Sandbox
+
+class TestOutputBuffer(unittest.TestCase):
+    def test_small_output_kept(self):
+        buf = OutputBuffer(cap=100)
+        for i in range(3): buf.append(f"line {i}\n")
+        self.assertEqual(buf.text(), "line 0\nline 1\nline 2\n")
+
+    def test_head_and_tail_kept(self):
+        buf = OutputBuffer(cap=40)
+        for i in range(100): buf.append(f"line {i:03}\n")
+        text = buf.text()
+        self.assertTrue(text.startswith("line 000\n"))
+        self.assertTrue(text.endswith("line 099\n"))
+        self.assertIn("bytes omitted", text)
+        self.assertLess(len(text), 120)
+
+class TestRunCommand(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _alive(self, pid):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z" # Orphans may linger as zombies
+        except OSError:
+            return False
+
+    def test_streams_lines_and_reports_stats(self):
+        seen = []
+        result = run_command("echo out; echo err >&2", self.test_dir, on_line=lambda s, l: seen.append((s, l)))
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(sorted(seen), [("stderr", "err"), ("stdout", "out")])
+        report = result.format()
+        self.assertTrue(report.startswith("CODE_0\nSTDOUT: out\n"))
+        self.assertIn("STATS: wall=", report)
+        self.assertIn("peak_rss=", report)
+
+    def test_output_capped(self):
+        result = run_command("seq 1 100000", self.test_dir, output_cap=1024)
+        self.assertLess(len(result.stdout), 1200)
+        self.assertTrue(result.stdout.rstrip().endswith("100000"))
+
+    def test_timeout_kills_process_group(self):
+        marker = os.path.join(self.test_dir, "child.pid")
+        start = time.monotonic()
+        result = run_command(f"sleep 30 & echo $! > {marker}; wait", self.test_dir, timeout=0.5)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertTrue(result.timed_out)
+        self.assertIn("TIMEOUT", result.format())
+        with open(marker) as f:
+            child = int(f.read())
+        time.sleep(0.2)
+        self.assertFalse(self._alive(child))
+
+    def test_cancel(self):
+        flag = threading.Event()
+        threading.Timer(0.3, flag.set).start()
+        result = run_command("sleep 30", self.test_dir, should_cancel=flag.is_set)
+        self.assertTrue(result.cancelled)
+        self.assertNotEqual(result.returncode, 0)
+
+    def test_background_child_does_not_hang(self):
+        start = time.monotonic()
+        result = run_command("sleep 30 & echo started", self.test_dir, timeout=20)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertIn("started", result.stdout)
+
+class TestSandboxExecution(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_terminate_all(self):
+        out = {}
+        t = threading.Thread(target=lambda: out.setdefault("res", self.sandbox.execute_command("sleep 30")))
+        t.start()
+        time.sleep(0.3)
+        self.sandbox.terminate_all()
+        t.join(timeout=10)
+        self.assertFalse(t.is_alive())
+        self.assertIn("CANCELLED", out["res"])
+        self.assertIn("CANCELLED", self.sandbox.execute_command("echo late"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import os
+import shutil
+import tempfile
+from stratos.core.file_index import FileIndex, glob_to_regex
+from stratos.core.sandbox import Sandbox
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.index = FileIndex(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, rel, content="x"):
+        path = os.path.join(self.test_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_default_ignores_pruned(self):
+        self._write("src/app.js")
+        self._write("node_modules/react/index.js")
+        self._write(".venv/bin/python")
+        self._write("src/__pycache__/app.cpython-311.pyc")
+        self._write(".git/HEAD")
+        self.assertEqual(self.index.files(), [os.path.join("src", "app.js")])
+        self.assertNotIn("node_modules", self.index.dirs())
+
+    def test_gitignore_and_negation(self):
+        self._write(".gitignore", "*.log\n!keep.log\n/secrets/\n")
+        self._write("debug.log")
+        self._write("keep.log")
+        self._write("secrets/key.txt")
+        self._write("nested/secrets/readme.md")
+        files = self.index.files()
+        self.assertNotIn("debug.log", files)
+        self.assertIn("keep.log", files)
+        self.assertNotIn(os.path.join("secrets", "key.txt"), files)
+        self.assertIn(os.path.join("nested", "secrets", "readme.md"), files)
+
+    def test_nested_gitignore(self):
+        self._write("pkg/.gitignore", "generated/\n")
+        self._write("pkg/generated/out.py")
+        self._write("generated/top.py")
+        files = self.index.files()
+        self.assertNotIn(os.path.join("pkg", "generated", "out.py"), files)
+        self.assertIn(os.path.join("generated", "top.py"), files)
+
+    def test_stratosignore(self):
+        self._write(".stratosignore", "fixtures/\n")
+        self._write("fixtures/big.json")
+        self._write("main.py")
+        self.assertNotIn(os.path.join("fixtures", "big.json"), self.index.files())
+        self.assertTrue(self.index.is_ignored(os.path.join("fixtures", "big.json")))
+
+    def test_cache_revalidated_on_new_file(self):
+        self._write("a.py")
+        self.assertEqual(self.index.files(), ["a.py"])
+        self._write("b.py")
+        self.assertEqual(self.index.files(), ["a.py", "b.py"])
+
+    def test_cache_kept_without_validation(self):
+        self._write("a.py")
+        self.index.files()
+        self.index.validate_on_read = False
+        self._write("b.py")
+        self.assertEqual(self.index.files(), ["a.py"])
+        self.index.invalidate()
+        self.assertEqual(self.index.files(), ["a.py", "b.py"])
+
+    def test_glob_matches_rglob_semantics(self):
+        self._write("main.py")
+        self._write("src/util.py")
+        self._write("src/deep/mod.py")
+        self._write("README.md")
+        self.assertEqual(len(self.index.glob("*.py")), 3)
+        self.assertEqual(len(self.index.glob("**/*.py")), 3)
+        self.assertEqual(self.index.glob("deep/*.py"), [os.path.join("src", "deep", "mod.py")])
+
+    def test_glob_to_regex(self):
+        import re
+        self.assertTrue(re.fullmatch(glob_to_regex("a/**/b"), "a/b"))
+        self.assertTrue(re.fullmatch(glob_to_regex("a/**/b"), "a/x/y/b"))
+        self.assertFalse(re.fullmatch(glob_to_regex("*.py"), "src/a.py"))
+
+class TestSandboxUsesIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.sandbox.write_file("src/app.py", "TOKEN = 1")
+        self.sandbox.write_file("node_modules/lib/index.js", "TOKEN = 2")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_tools_skip_ignored_dirs(self):
+        self.assertEqual(self.sandbox.glob_search("*"), [os.path.join("src", "app.py")])
+        self.assertNotIn("node_modules", self.sandbox.grep_search("TOKEN"))
+        self.assertNotIn("node_modules", self.sandbox.get_structure_tree())
+        self.assertEqual(self.sandbox.get_structure_tree().splitlines()[:3],
+                         [f"{os.path.basename(self.sandbox.root_dir)}/", "  src/", "    app.py"])
+        self.assertEqual(list(self.sandbox.get_snapshot()), [os.path.join("src", "app.py")])
+
+if __name__ == "__main__":
+    unittest.main()
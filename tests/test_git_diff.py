@@ -0,0 +1,104 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import MagicMock
+from stratos.core.git_diff import GitDiffBackend, EMPTY_TREE
+from stratos.core.pool import Blackboard
+from stratos.core.sandbox import Sandbox
+
+@unittest.skipUnless(shutil.which("git"), "git not installed")
+class TestGitDiffBackend(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self._write("a.txt", "one\ntwo\nthree\n")
+        self._write("long.txt", "".join(f"row {i}\n" for i in range(40)))
+        self.backend = GitDiffBackend(self.test_dir)
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, rel, content):
+        with open(os.path.join(self.test_dir, rel), "w") as f:
+            f.write(content)
+
+    def test_changes_with_rename(self):
+        base = self.backend.sync(["a.txt", "long.txt"])
+        os.rename(os.path.join(self.test_dir, "long.txt"), os.path.join(self.test_dir, "moved.txt"))
+        self._write("a.txt", "one\nTWO\nthree\n")
+        self._write("new.txt", "fresh\n")
+        tree = self.backend.sync(["a.txt", "long.txt", "moved.txt", "new.txt"])
+        changes = {c.path: c for c in self.backend.changes(base, tree)}
+        self.assertEqual(changes["a.txt"].status, "M")
+        self.assertEqual((changes["a.txt"].added, changes["a.txt"].deleted), (1, 1))
+        self.assertIn("-two\n+TWO", changes["a.txt"].patch)
+        self.assertTrue(changes["a.txt"].patch.startswith("--- a/a.txt"))
+        self.assertEqual((changes["moved.txt"].status, changes["moved.txt"].old_path), ("R", "long.txt"))
+        self.assertEqual(changes["new.txt"].status, "A")
+        self.assertNotIn("long.txt", changes)
+
+    def test_status_and_unchanged_trees(self):
+        tree = self.backend.sync(["a.txt", "long.txt"])
+        self.assertEqual(self.backend.status(), [])
+        self._write("a.txt", "changed\n")
+        self.assertEqual(self.backend.status(), ["a.txt"])
+        self.assertEqual(self.backend.changes(tree, tree), [])
+        self.assertEqual(len(self.backend.changes(EMPTY_TREE, tree, patches=False)), 2)
+
+    def test_agents_repository_untouched(self):
+        subprocess.run(["git", "init", "-q"], cwd=self.test_dir, check=True)
+        self.backend.sync(["a.txt"])
+        out = subprocess.run(["git", "status", "--porcelain"], cwd=self.test_dir, capture_output=True, text=True).stdout
+        self.assertIn("?? a.txt", out) # Nothing staged in the project's own index
+
+@unittest.skipUnless(shutil.which("git"), "git not installed")
+class TestBlackboardGitBackend(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.sandbox.write_file("main.py", "print('v1')\n")
+        self.sandbox.write_file("util.py", "".join(f"x{i} = {i}\n" for i in range(30)))
+        self.blackboard = Blackboard(self.sandbox, MagicMock())
+        self.blackboard.diff_backend = self.backend = GitDiffBackend(self.test_dir)
+        self.index = self.sandbox.snapshot_index
+        self.blackboard.set_baseline(self.sandbox.get_snapshot(), self.index.generation)
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.test_dir)
+
+    def _diff(self):
+        snapshot = self.sandbox.get_snapshot()
+        return self.blackboard.compute_diff(snapshot, dirty=self.index.changed_since(self.blackboard.last_generation))
+
+    def test_report(self):
+        self.sandbox.write_file("main.py", "print('v2')\n")
+        os.rename(os.path.join(self.test_dir, "util.py"), os.path.join(self.test_dir, "helpers.py"))
+        report = self._diff()
+        self.assertIn("[MOD] main.py:\n--- a/main.py", report)
+        self.assertIn("+print('v2')", report)
+        self.assertIn("[REN] util.py -> helpers.py", report)
+
+    def test_baseline_moves_forward(self):
+        self.sandbox.write_file("main.py", "print('v2')\n")
+        self._diff()
+        self.blackboard.set_baseline(self.sandbox.get_snapshot(), self.index.generation,
+                                     dirty=self.index.changed_since(self.blackboard.last_generation))
+        self.assertEqual(self._diff(), "NO_CHANGES")
+
+    def test_status_without_dirty_set(self):
+        self.sandbox.write_file("main.py", "print('v4')\n")
+        report = self.blackboard.compute_diff(self.sandbox.get_snapshot())
+        self.assertIn("+print('v4')", report)
+        self.assertNotIn("util.py", report)
+
+    def test_falls_back_to_difflib(self):
+        self.blackboard.diff_backend.changes = MagicMock(side_effect=subprocess.CalledProcessError(1, "git"))
+        self.sandbox.write_file("main.py", "print('v3')\n")
+        self.assertIn("+print('v3')", self._diff())
+        self.assertIsNone(self.blackboard.diff_backend)
+
+if __name__ == "__main__":
+    unittest.main()
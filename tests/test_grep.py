@@ -0,0 +1,79 @@
+import unittest
+import os
+import shutil
+import tempfile
+from stratos.core.grep import grep_files
+
+class TestGrepEngine(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self._write("a.py", "import os\ndef main():\n    return os.getcwd()\n")
+        self._write("b.txt", "nothing here\nmain entry\n")
+        self._write("img.png", b"\x89PNG\x00\x00main", mode="wb")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, rel, content, mode="w"):
+        with open(os.path.join(self.test_dir, rel), mode) as f:
+            f.write(content)
+
+    def _grep(self, pattern, files=("a.py", "b.txt", "img.png"), **kwargs):
+        return grep_files(self.test_dir, list(files), pattern, **kwargs)
+
+    def test_line_numbers(self):
+        result = self._grep("main")
+        self.assertEqual(result.matches, [("a.py", 2, "def main():"), ("b.txt", 2, "main entry")])
+
+    def test_binary_skipped(self):
+        result = self._grep("main")
+        self.assertEqual(result.skipped_binary, 1)
+
+    def test_anchors_are_per_line(self):
+        result = self._grep(r"^\s+return")
+        self.assertEqual(result.matches, [("a.py", 3, "return os.getcwd()")])
+
+    def test_no_cross_line_matches(self):
+        self.assertEqual(self._grep(r"os\s+def").matches, [])
+
+    def test_line_spanning_match_does_not_hide_later_lines(self):
+        self._write("c.py", "x = 1\n    return x\nfoo;\nbar\n")
+        self.assertEqual(self._grep(r"\s+return", files=("c.py",)).matches, [("c.py", 2, "return x")])
+        self.assertEqual(self._grep(r"[^;]*bar", files=("c.py",)).matches, [("c.py", 4, "bar")])
+        self.assertEqual(self._grep(r"\s*bar", files=("c.py",)).matches, [("c.py", 4, "bar")])
+
+    def test_empty_match_after_final_newline(self):
+        self._write("d.txt", "x\n\ny\n")
+        self.assertEqual(self._grep(r"^$", files=("d.txt",)).matches, [("d.txt", 2, "")])
+        self._write("e.txt", "x\ny")
+        self.assertEqual(self._grep(r"y$", files=("e.txt",)).matches, [("e.txt", 2, "y")])
+        self.assertEqual(self._grep(r"^$", files=("e.txt",)).matches, [])
+
+    def test_include_exclude(self):
+        self.assertEqual([m[0] for m in self._grep("main", include="*.py").matches], ["a.py"])
+        self.assertEqual([m[0] for m in self._grep("main", exclude="*.py").matches], ["b.txt"])
+
+    def test_result_cap(self):
+        self._write("many.txt", "hit\n" * 50)
+        result = self._grep("hit", files=["many.txt"], max_results=10)
+        self.assertEqual(len(result.matches), 10)
+        self.assertEqual(result.total, 50)
+        self.assertIn("[TRUNCATED: 40 more matches", result.format(10))
+
+    def test_max_file_size(self):
+        result = self._grep("main", max_file_size=10)
+        self.assertEqual(result.matches, [])
+        self.assertEqual(result.skipped_large, 2)
+
+    def test_deadline(self):
+        result = self._grep("main", timeout=-1)
+        self.assertTrue(result.timed_out)
+        self.assertIn("TIMEOUT", result.format())
+
+    def test_invalid_regex(self):
+        import re
+        with self.assertRaises(re.error):
+            self._grep("(unclosed")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from google.genai import types
+from stratos.core.context_budget import TokenEstimator
+from stratos.core.history import HistoryManager, ELIDED_MARKER, messages_chars
+
+def turn(name, path, result):
+    """(model call, tool response) message pair."""
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args={"path": path}))])
+    response = types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(name=name, response={"result": result}))])
+    return [call, response]
+
+def results(messages):
+    return [p.function_response.response["result"] for m in messages for p in m.parts if p.function_response]
+
+class TestHistoryManager(unittest.TestCase):
+    def setUp(self):
+        self.messages = [types.Content(role="user", parts=[types.Part(text="STATE:\n\nTASK: fix it")])]
+        for n in range(6):
+            self.messages += turn("read_file", f"src/mod{n}.py", f"module {n}\n" + "x = 1\n" * 1000)
+        self.manager = HistoryManager(keep_results=2, min_chars=2000, estimator=TokenEstimator())
+
+    def test_old_results_become_stubs(self):
+        saved = self.manager.prune(self.messages)
+        found = results(self.messages)
+        self.assertTrue(all(r.startswith(ELIDED_MARKER) for r in found[:4]))
+        self.assertFalse(any(r.startswith(ELIDED_MARKER) for r in found[4:]))
+        self.assertIn("5.9 KB result of read_file(src/mod0.py); re-read if needed] module 0", found[0])
+        self.assertEqual(self.manager.elided, 4)
+        self.assertGreater(saved, 20000)
+
+    def test_prune_is_stable(self):
+        self.manager.prune(self.messages)
+        before = [m.model_dump() for m in self.messages]
+        self.assertEqual(self.manager.prune(self.messages), 0)
+        self.assertEqual([m.model_dump() for m in self.messages], before)
+
+    def test_small_results_stay(self):
+        messages = self.messages[:1]
+        for n in range(6):
+            messages += turn("file_info", f"f{n}.py", "12 lines")
+        self.manager.prune(messages)
+        self.assertEqual(results(messages), ["12 lines"] * 6)
+
+    def test_ceiling_elides_recent_and_truncates_newest(self):
+        self.messages += turn("read_file", "big.log", "log line\n" * 20000)
+        manager = HistoryManager(keep_results=4, max_tokens=10000, estimator=TokenEstimator())
+        manager.prune(self.messages, reserved_tokens=2000)
+        self.assertLessEqual(messages_chars(self.messages), 8000 * 4)
+        found = results(self.messages)
+        self.assertTrue(all(r.startswith(ELIDED_MARKER) for r in found[:-1]))
+        self.assertTrue(found[-1].startswith("log line"))
+        self.assertIn("[TRUNCATED: 175.8 KB result of read_file(big.log)", found[-1])
+
+if __name__ == '__main__':
+    unittest.main()
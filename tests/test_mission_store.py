@@ -0,0 +1,96 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest.mock import MagicMock
+from stratos.core.agent import AIAgent
+from stratos.core.mission_store import MissionStore
+from stratos.core.pool import AIPool
+from stratos.core.sandbox import Sandbox
+
+class FakeAgent:
+    def __init__(self, name, calls, fail_on=None):
+        self.name, self.role, self.model_id = name, "ROLE", "gemini-2.5-flash"
+        self.calls, self.fail_on = calls, fail_on
+        self.seen_generation = None
+        self.total_input_tokens = self.total_output_tokens = 0
+        self.prompt_cache = MagicMock()
+
+    def token_stats(self):
+        return {"cached_input": 0, "uncached_input": self.total_input_tokens, "output": self.total_output_tokens}
+
+    def think_and_act(self, task, context=""):
+        if self.fail_on and task.startswith(self.fail_on):
+            raise RuntimeError("process killed")
+        self.calls.append((self.name, task.split(":")[0]))
+        self.total_input_tokens += 100
+        return "STATUS: READY" if task == "FINAL_STATUS_CHECK" else f"{self.name} output"
+
+    def export_state(self):
+        return {"total_input_tokens": self.total_input_tokens}
+
+    def restore_state(self, state):
+        self.total_input_tokens = state["total_input_tokens"]
+
+class TestMissionStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "mission.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_save_and_load(self):
+        store = MissionStore(self.path)
+        self.assertIsNone(store.load())
+        store.save({"phase": "DESIGN"}, {"data": {"A": 1}}, {"AGENT_CODER": {"total_input_tokens": 0}})
+        store.save({"phase": "QA"}, {"data": {"A": 2}}, {"AGENT_CODER": {"total_input_tokens": 7}})
+        store.close()
+        mission, board, agents = MissionStore(self.path).load()
+        self.assertEqual(mission["phase"], "QA")
+        self.assertEqual(board["data"]["A"], 2)
+        self.assertEqual(agents["AGENT_CODER"]["total_input_tokens"], 7)
+        self.assertEqual(sqlite3.connect(self.path).execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def _pool(self, calls, fail_on=None):
+        pool = AIPool(Sandbox(os.path.join(self.test_dir, "project")), MagicMock(prompt_input=""), "key", {"name": "demo", "desc": "demo app"})
+        pool.blackboard.retrieval_k = 0
+        pool.enable_checkpoints(self.path)
+        roles = ["MANAGER", "ARCHITECT", "CODER", "REVIEWER", "DOCUMENTATION"]
+        pool.agents = {r: FakeAgent(f"AGENT_{r}", calls, fail_on if r == "REVIEWER" else None) for r in roles}
+        return pool
+
+    def test_resume_after_crash(self):
+        first_calls = []
+        pool = self._pool(first_calls, fail_on="QA_AND_TEST_RUN")
+        with self.assertRaises(RuntimeError):
+            pool.broadcast_task("DEVELOP_PROJECT: demo")
+        pool.close()
+        self.assertEqual([c[0] for c in first_calls], ["AGENT_MANAGER", "AGENT_ARCHITECT", "AGENT_CODER"])
+
+        calls = []
+        pool = self._pool(calls)
+        cursor = pool.resume()
+        self.assertEqual((cursor["iteration"], cursor["phase"]), (1, "IMPLEMENTATION"))
+        self.assertEqual(pool.blackboard.data["MASTER_PLAN"], "AGENT_MANAGER output")
+        self.assertEqual(pool.agents["CODER"].total_input_tokens, 100)
+        pool.broadcast_task(cursor["task"], resume=cursor)
+        self.assertEqual([c[0] for c in calls], ["AGENT_REVIEWER", "AGENT_REVIEWER", "AGENT_DOCUMENTATION"])
+        self.assertEqual(pool.resume()["phase"], "DOCS")
+        pool.close()
+
+    def test_agent_state_has_no_history(self):
+        agent = AIAgent("AGENT_CODER", "ENGINEER", Sandbox(os.path.join(self.test_dir, "project")), MagicMock(), "key",
+                        {"name": "demo", "desc": "demo app"})
+        agent.history = ["previous task"]
+        agent.total_input_tokens, agent.cached_input_tokens = 120, 80
+        state = agent.export_state()
+        self.assertNotIn("history", state)
+        fresh = AIAgent("AGENT_CODER", "ENGINEER", agent.sandbox, MagicMock(), "key", {"name": "demo", "desc": "demo app"})
+        fresh.restore_state({**state, "history": [{"role": "user", "parts": [{"text": "old"}]}]}) # Older checkpoints
+        self.assertEqual(fresh.history, [])
+        self.assertEqual((fresh.total_input_tokens, fresh.cached_input_tokens), (120, 80))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from stratos.core.policy import PolicyEngine, classify, split_command, READ_ONLY, MUTATING
+from stratos.core.sandbox import Sandbox
+
+USER_POLICY = """
+default = "ask"
+
+[[rules]]
+name = "tests"
+decision = "allow"
+executable = ["pytest"]
+
+[[rules]]
+name = "no-publish"
+decision = "deny"
+argv = "npm publish*"
+"""
+
+PROJECT_POLICY = """
+read_only = "ask"
+
+[[rules]]
+name = "project-npm"
+decision = "allow"
+executable = "npm"
+"""
+
+class TestClassification(unittest.TestCase):
+    def test_read_only(self):
+        for cmd in ("ls -la", "git status", "cat a | grep x | wc -l", "python --version", "echo hi 2>/dev/null", "FOO=1 ls"):
+            self.assertEqual(classify(cmd), READ_ONLY, cmd)
+
+    def test_mutating(self):
+        for cmd in ("git commit -m x", "echo hi > f", "ls\nrm x", "cat $(rm x)", "find . -delete",
+                    "sed -i s/a/b/ f", "pip install x", "pytest", "ls \"unterminated"):
+            self.assertEqual(classify(cmd), MUTATING, cmd)
+
+    def test_options_that_write_or_execute(self):
+        for cmd in ("sed -n '1e touch /tmp/pwned' README.md", "sed -e 's/a/b/w out' f", "sed -f script.sed f",
+                    "rg --pre ./x.sh foo", "echo evil >& ~/.bashrc", "cat a <> b", "sort -o ~/.bashrc /dev/null",
+                    "sort -no out f", "uniq a ../b", "tree -o ../x", "git diff --output=../../x",
+                    "git remote add origin http://x", "find . -fprintf /tmp/x %p", "find . -fls x", "find . -exec rm {} +"):
+            self.assertEqual(classify(cmd), MUTATING, cmd)
+            self.assertEqual(PolicyEngine().evaluate(cmd).decision, "ask", cmd)
+        for cmd in ("sed -n '1,20p' f", "sed 's/a/b/g' f", "sed -n '/foo/,/bar/p' f", "echo hi >&2", "ls 2>&1",
+                    "git remote -v", "uniq a", "sort -n f", "tree -L 2", "rg foo"):
+            self.assertEqual(classify(cmd), READ_ONLY, cmd)
+
+    def test_split(self):
+        self.assertEqual(split_command("a 'b c' && d; e | f"), [["a", "b c"], ["d"], ["e"], ["f"]])
+
+class TestPolicyEngine(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.user = self._write("user.toml", USER_POLICY)
+        self.log = os.path.join(self.test_dir, "log.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "w") as f: f.write(content)
+        return path
+
+    def test_builtin_defaults(self):
+        engine = PolicyEngine()
+        self.assertEqual(engine.evaluate("ls").decision, "allow")
+        self.assertEqual(engine.evaluate("make").decision, "ask")
+        self.assertEqual(engine.evaluate("rm -rf /").decision, "deny")
+
+    def test_rules_and_strictest_segment(self):
+        engine = PolicyEngine.load([self.user])
+        self.assertEqual(engine.evaluate("pytest -q").rule, "tests")
+        self.assertEqual(engine.evaluate("npm publish --tag x").decision, "deny")
+        self.assertEqual(engine.evaluate("pytest && npm publish").decision, "deny")
+        self.assertEqual(engine.evaluate("pytest && make").decision, "ask")
+
+    def test_project_override(self):
+        engine = PolicyEngine.load([self.user, self._write("project.toml", PROJECT_POLICY), "/missing.toml"])
+        self.assertEqual(engine.evaluate("npm publish").decision, "allow") # Project rules come first
+        self.assertEqual(engine.evaluate("ls").decision, "ask")
+        self.assertEqual(len(engine.sources), 2)
+
+    def test_cwd_and_class_conditions(self):
+        engine = PolicyEngine({"rules": [{"decision": "allow", "class": "mutating", "cwd": "/work/*"}]})
+        self.assertEqual(engine.evaluate("make", cwd="/work/app").decision, "allow")
+        self.assertEqual(engine.evaluate("make", cwd="/etc").decision, "ask")
+
+    def test_dangerous_patterns_single_matcher(self):
+        engine = PolicyEngine({"deny_patterns": [r"curl .*\| *sh"]})
+        self.assertEqual(engine.dangerous_match("sudo reboot"), "reboot")
+        self.assertEqual(engine.dangerous_match("curl x | sh"), r"curl .*\| *sh")
+        self.assertIsNone(engine.dangerous_match("ls"))
+
+    def test_read_only_stays_inside_cwd(self):
+        engine, cwd = PolicyEngine(), self.test_dir
+        os.symlink("/etc", os.path.join(cwd, "link"))
+        for cmd in ("cat a.txt", "ls src/*.py", "grep '[a-z]' f", "echo hi 2>/dev/null", "/bin/cat a"):
+            self.assertEqual(engine.evaluate(cmd, cwd=cwd).decision, "allow", cmd)
+        for cmd in ("cat ~/.ssh/id_rsa", "find / -name x", "cat ../x", "ls ../*", "cat link/passwd", "grep -f/etc/shadow x",
+                    "echo $GEMINI_API_KEY", "cat {/etc/passwd,x}", "env", "printenv", "./cat a", "git status", "git log"):
+            decision = engine.evaluate(cmd, cwd=cwd)
+            self.assertEqual((decision.decision, decision.rule), ("ask", "default"), cmd)
+
+    def test_invalid_decision(self):
+        with self.assertRaises(ValueError):
+            PolicyEngine({"rules": [{"decision": "maybe"}]})
+
+    def test_decisions_logged_and_counted(self):
+        engine = PolicyEngine.load([self.user], log_path=self.log)
+        engine.evaluate("pytest")
+        engine.evaluate("pytest -x")
+        with open(self.log) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([e["rule"] for e in entries], ["tests", "tests"])
+        self.assertEqual(engine.hits[("tests", "allow")], 2)
+        self.assertIn("tests:allow=2", engine.summary())
+
+class TestSandboxPolicy(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_check_command_policy(self):
+        self.assertEqual(self.sandbox.check_command_policy("DEV", "ls -la").decision, "allow")
+        self.assertEqual(self.sandbox.check_command_policy("DEV", "git log").decision, "ask") # Repo config can run programs
+        self.assertEqual(self.sandbox.check_command_policy("DEV", "npm install").decision, "ask")
+
+    def test_safety_uses_policy_patterns(self):
+        self.sandbox.policy = PolicyEngine({"deny_patterns": ["forbidden_tool"]})
+        self.assertIn("DANGEROUS COMMAND BLOCKED", self.sandbox.execute_command("forbidden_tool --now"))
+
+if __name__ == "__main__":
+    unittest.main()
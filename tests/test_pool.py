@@ -1,38 +1,62 @@
 import unittest
+import shutil
+import tempfile
+from types import SimpleNamespace
 from unittest.mock import MagicMock
-from stratos.core.pool import Blackboard
+import threading
+from stratos.core.pool import Blackboard, VersionConflict, TEAM_LOG
+from stratos.core.blobstore import BlobStore
+from stratos.core.sandbox import Sandbox
 
 class TestBlackboard(unittest.TestCase):
     def setUp(self):
         self.sandbox = MagicMock()
         self.sandbox.get_structure_tree.return_value = "root/"
+        self.sandbox.blob_store = BlobStore()
         self.logger = MagicMock()
         self.blackboard = Blackboard(self.sandbox, self.logger)
 
+    def _snap(self, files):
+        return {path: self.sandbox.blob_store.put(content) for path, content in files.items()}
+
     def test_post_and_get(self):
         self.blackboard.post("PLAN", "Step 1")
         self.assertEqual(self.blackboard.data["PLAN"], "Step 1")
 
     def test_compute_diff_new_file(self):
-        self.blackboard.last_snapshot = {"old.txt": "content"}
-        new_snapshot = {"old.txt": "content", "new.txt": "fresh"}
+        self.blackboard.last_snapshot = self._snap({"old.txt": "content"})
+        new_snapshot = self._snap({"old.txt": "content", "new.txt": "fresh"})
         diff = self.blackboard.compute_diff(new_snapshot)
         self.assertIn("[NEW] new.txt", diff)
 
     def test_compute_diff_modified_file(self):
-        self.blackboard.last_snapshot = {"file.txt": "line1\nline2"}
-        new_snapshot = {"file.txt": "line1\nchanged"}
+        self.blackboard.last_snapshot = self._snap({"file.txt": "line1\nline2"})
+        new_snapshot = self._snap({"file.txt": "line1\nchanged"})
         diff = self.blackboard.compute_diff(new_snapshot)
         self.assertIn("[MOD] file.txt", diff)
         self.assertIn("-line2", diff)
         self.assertIn("+changed", diff)
 
     def test_compute_diff_no_changes(self):
-        snap = {"a.py": "code"}
+        snap = self._snap({"a.py": "code"})
         self.blackboard.last_snapshot = snap
         diff = self.blackboard.compute_diff(snap)
         self.assertEqual(diff, "NO_CHANGES")
 
+    def test_compute_diff_dirty_set(self):
+        self.blackboard.last_snapshot = self._snap({"a.py": "old", "b.py": "old"})
+        new_snapshot = self._snap({"a.py": "new", "b.py": "new"})
+        diff = self.blackboard.compute_diff(new_snapshot, dirty={"a.py"})
+        self.assertIn("[MOD] a.py", diff)
+        self.assertNotIn("b.py", diff)
+
+    def test_compute_diff_bulk_marker(self):
+        new_snapshot = self._snap({"node_modules/a.js": "a", "node_modules/b.js": "b", "main.js": "m"})
+        diff = self.blackboard.compute_diff(new_snapshot, bulk={"node_modules": 2})
+        self.assertIn("[BULK] node_modules/ (2 changes coalesced)", diff)
+        self.assertIn("[NEW] main.js", diff)
+        self.assertNotIn("a.js", diff)
+
     def test_context_truncation(self):
         # Fill team log with many entries
         for i in range(100):
@@ -43,5 +67,96 @@ class TestBlackboard(unittest.TestCase):
         self.assertIn("Message 99", context)
         self.assertNotIn("Message 0", context)
 
+class TestBlackboardVersions(unittest.TestCase):
+    def setUp(self):
+        sandbox = MagicMock()
+        sandbox.blob_store = BlobStore()
+        self.blackboard = Blackboard(sandbox, MagicMock())
+
+    def test_compare_and_set(self):
+        value, version = self.blackboard.get("MASTER_PLAN")
+        new_version = self.blackboard.post("MASTER_PLAN", "v2", expected_version=version)
+        self.assertGreater(new_version, version)
+        with self.assertRaises(VersionConflict):
+            self.blackboard.post("MASTER_PLAN", "stale", expected_version=version)
+        self.assertEqual(self.blackboard.get("MASTER_PLAN"), ("v2", new_version))
+        self.blackboard.post("NEW_KEY", "x", expected_version=0)
+
+    def test_views_are_stable(self):
+        view = self.blackboard.view()
+        self.blackboard.post("TODO_LIST", "changed")
+        self.blackboard.post_discussion("CODER", "hello")
+        self.assertEqual(view.data["TODO_LIST"], "1. INITIAL_ANALYSIS (Pending)")
+        self.assertEqual(view.team_log, ())
+        self.assertEqual(self.blackboard.view().data["TODO_LIST"], "changed")
+        with self.assertRaises(TypeError):
+            view.data["TODO_LIST"] = "x"
+
+    def test_concurrent_updates_are_not_lost(self):
+        self.blackboard.post("COUNTER", 0)
+        def bump():
+            for _ in range(200):
+                self.blackboard.update("COUNTER", lambda v: v + 1, retries=10_000)
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(self.blackboard.get("COUNTER")[0], 800)
+
+    def test_wait_for_change(self):
+        version = self.blackboard.view().version
+        self.assertIsNone(self.blackboard.wait_for_change(version, timeout=0.05))
+        timer = threading.Timer(0.05, self.blackboard.post_discussion, args=("CODER", "done"))
+        timer.start()
+        self.assertIsNotNone(self.blackboard.wait_for_change(version, keys=[TEAM_LOG], timeout=5))
+        timer.join()
+        self.assertIsNone(self.blackboard.wait_for_change(version, keys=["MASTER_PLAN"], timeout=0.05))
+
+class TestAgentCursors(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.blackboard = Blackboard(self.sandbox, MagicMock())
+        self.coder, self.reviewer = SimpleNamespace(seen_generation=None), SimpleNamespace(seen_generation=None)
+        self.sandbox.write_file("app.py", "v = 0\n")
+        self._turn(None)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _turn(self, agent, **files):
+        """One agent action: the agent reads its diff, writes files, then the baseline moves on."""
+        diff = self.blackboard.diff_for(agent) if agent else ""
+        for path, content in files.items():
+            self.sandbox.write_file(path, content)
+        index = self.sandbox.snapshot_index
+        self.blackboard.set_baseline(self.sandbox.get_snapshot(), index.generation,
+                                     dirty=index.changed_since(self.blackboard.last_generation))
+        if agent:
+            self.blackboard.mark_seen(agent)
+        self.blackboard.collect_generations([self.coder.seen_generation, self.reviewer.seen_generation])
+        return diff
+
+    def test_each_agent_sees_changes_since_its_own_turn(self):
+        self._turn(self.reviewer)
+        self._turn(self.coder, **{"a.py": "a = 1\n"})
+        self._turn(self.coder, **{"b.py": "b = 1\n"})
+        diff = self._turn(self.reviewer)
+        self.assertIn("[NEW] a.py", diff) # Missed with a single global baseline
+        self.assertIn("[NEW] b.py", diff)
+        self.assertEqual(self._turn(self.reviewer), "NO_CHANGES")
+
+    def test_own_changes_not_repeated(self):
+        self._turn(self.coder, **{"a.py": "a = 1\n"})
+        self.assertEqual(self._turn(self.coder), "NO_CHANGES")
+
+    def test_generations_collected_once_passed(self):
+        self._turn(self.reviewer)
+        self._turn(self.coder, **{"a.py": "a = 1\n"})
+        self._turn(self.coder, **{"a.py": "a = 2\n"})
+        self.assertEqual(len(self.blackboard.generations), 3) # Pinned by the reviewer's cursor
+        self._turn(self.reviewer)
+        self.assertEqual(list(self.blackboard.generations), [self.blackboard.last_generation])
+        self.assertEqual(len(self.sandbox.blob_store), 2) # Only the live app.py and a.py versions remain
+
 if __name__ == "__main__":
     unittest.main()
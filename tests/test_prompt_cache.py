@@ -0,0 +1,171 @@
+import unittest
+import threading
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from google.genai import types
+from stratos.core import agent as agent_module
+from stratos.core.agent import AIAgent
+from stratos.core.clients import ClientRegistry
+from stratos.core.prompt_cache import PromptCacheManager
+from stratos.core.sandbox import Sandbox
+
+LONG_PROMPT = "mandate " * 2000
+
+class StubCaches:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created, self.updated, self.deleted = [], [], []
+
+    def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("400 cached content too small")
+        self.created.append((model, config))
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    def update(self, name, config):
+        self.updated.append((name, config.ttl))
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+class StubModels:
+    """Answers with a text reply; reports 'cached' prompt tokens when a cache is referenced."""
+    def __init__(self):
+        self.configs = []
+
+    async def generate_content_stream(self, model, contents, config):
+        self.configs.append(config)
+        cached = 900 if config.cached_content else None
+        return self._stream(cached)
+
+    async def _stream(self, cached):
+        yield SimpleNamespace(
+            usage_metadata=SimpleNamespace(prompt_token_count=1000, candidates_token_count=10, cached_content_token_count=cached),
+            candidates=[SimpleNamespace(content=types.Content(role="model", parts=[types.Part(text="done")]))])
+
+class StubClient:
+    def __init__(self, fail=False):
+        self.caches = StubCaches(fail)
+        self.models = StubModels()
+        self.aio = SimpleNamespace(models=self.models)
+
+def declaration(name):
+    return types.FunctionDeclaration(name=name, description="tool", parameters={"type": "OBJECT", "properties": {}})
+
+class TestPromptCacheManager(unittest.TestCase):
+    def setUp(self):
+        self.client = StubClient()
+        self.manager = PromptCacheManager(self.client, ttl=3600, refresh_margin=300)
+        self.tools = [declaration("read_file")]
+
+    def test_create_then_reuse(self):
+        name = self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools)
+        self.assertEqual(name, "cachedContents/1")
+        self.assertEqual(self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools), name)
+        self.assertEqual(len(self.client.caches.created), 1)
+        self.assertEqual(self.client.caches.created[0][1].system_instruction, LONG_PROMPT)
+        self.assertEqual(self.manager.stats["reused"], 1)
+
+    def test_key_covers_model_prompt_and_tools(self):
+        first = self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools)
+        self.assertNotEqual(self.manager.get("gemini-2.5-pro", LONG_PROMPT, self.tools), first)
+        self.assertNotEqual(self.manager.get("gemini-2.5-flash", LONG_PROMPT + "x", self.tools), first)
+        self.assertNotEqual(self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools + [declaration("grep_search")]), first)
+        self.assertEqual(len(self.client.caches.created), 4)
+
+    def test_refresh_before_expiry(self):
+        with patch("stratos.core.prompt_cache.time.time", return_value=1000.0):
+            name = self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools)
+        with patch("stratos.core.prompt_cache.time.time", return_value=1000.0 + 3600 - 100):
+            self.assertEqual(self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools), name)
+        self.assertEqual(self.client.caches.updated, [(name, "3600s")])
+        self.assertEqual(len(self.client.caches.created), 1)
+
+    def test_short_prefix_is_not_cached(self):
+        self.assertIsNone(self.manager.get("gemini-2.5-flash", "short", self.tools))
+        self.assertEqual(self.client.caches.created, [])
+
+    def test_failure_backs_off(self):
+        client = StubClient(fail=True)
+        manager = PromptCacheManager(client)
+        self.assertIsNone(manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools))
+        self.assertIsNone(manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools))
+        self.assertEqual(manager.stats["failed"], 1)
+
+    def test_slow_create_blocks_only_its_key(self):
+        release, started = threading.Event(), threading.Event()
+        create = self.client.caches.create
+        def slow_create(model, config):
+            if model == "gemini-2.5-pro":
+                started.set()
+                release.wait(5)
+            return create(model, config)
+        self.client.caches.create = slow_create
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.manager.get("gemini-2.5-pro", LONG_PROMPT, self.tools)))
+                   for _ in range(4)]
+        for t in threads: t.start()
+        self.assertTrue(started.wait(2))
+        self.assertEqual(self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools), "cachedContents/1") # Not blocked
+        release.set()
+        for t in threads: t.join()
+        self.assertEqual(results, ["cachedContents/2"] * 4)
+        self.assertEqual(len(self.client.caches.created), 2)
+
+    def test_close_deletes_created_caches(self):
+        name = self.manager.get("gemini-2.5-flash", LONG_PROMPT, self.tools)
+        self.manager.close()
+        self.assertEqual(self.client.caches.deleted, [name])
+
+class TestAgentPromptCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.client = StubClient()
+        registry = patch.object(agent_module, "CLIENTS", ClientRegistry(factory=lambda key: self.client))
+        registry.start()
+        self.addCleanup(registry.stop)
+        self.agent = self._agent("AGENT_CODER", "ENGINEER")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _agent(self, name, role):
+        return AIAgent(name, role, Sandbox(self.test_dir), MagicMock(show_results=False), "key",
+                       {"name": "demo", "desc": "demo app " * 600})
+
+    def test_static_prefix_moves_out_of_the_message(self):
+        self.assertEqual(self.agent.think_and_act("build it", context="CTX"), "done")
+        config = self.client.models.configs[0]
+        self.assertEqual(config.cached_content, "cachedContents/1")
+        self.assertIsNone(config.system_instruction)
+        self.assertIn("GLOBAL_SYSTEM_MANDATE", self.client.caches.created[0][1].system_instruction)
+        self.assertNotIn("AGENT_CODER", self.client.caches.created[0][1].system_instruction)
+        self.assertEqual(self.agent.history[0].parts[0].text, f"{self.agent._get_personalized_prompt()}STATE:\nCTX\n\nTASK: build it")
+
+    def test_agents_share_one_cache(self):
+        reviewer = self._agent("AGENT_REVIEWER", "QA")
+        self.assertIs(reviewer.prompt_cache, self.agent.prompt_cache)
+        self.agent.think_and_act("build it")
+        reviewer.think_and_act("review it")
+        self.assertEqual(len(self.client.caches.created), 1)
+        self.assertEqual({c.cached_content for c in self.client.models.configs}, {"cachedContents/1"})
+        self.assertIn("ID: AGENT_REVIEWER", reviewer.history[0].parts[0].text)
+
+    def test_tokens_split_cached_and_uncached(self):
+        self.agent.think_and_act("build it")
+        self.agent.think_and_act("test it")
+        self.assertEqual(self.agent.token_stats(), {"cached_input": 1800, "uncached_input": 200, "output": 20})
+        self.assertEqual(len(self.client.caches.created), 1)
+
+    def test_inline_prefix_without_cache(self):
+        self.agent.prompt_cache.min_tokens = 10**9
+        self.agent.think_and_act("build it")
+        config = self.client.models.configs[0]
+        self.assertIsNone(config.cached_content)
+        self.assertIn("GLOBAL_SYSTEM_MANDATE", config.system_instruction)
+        self.assertEqual(self.agent.token_stats()["cached_input"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
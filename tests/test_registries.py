@@ -0,0 +1,83 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock
+from stratos.core.clients import ClientRegistry, CLIENTS
+from stratos.core.pool import AIPool
+from stratos.core.sandbox import Sandbox
+from stratos.core.tools import ToolRegistry, DEFAULT_DESCRIPTION
+
+def read_file(path):
+    """Reads a file."""
+
+def write_file(path, content):
+    """Writes a file."""
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ToolRegistry()
+
+    def test_same_map_same_tuple(self):
+        first = self.registry.tools({"read_file": read_file, "write_file": write_file})
+        second = self.registry.tools({"read_file": lambda path: None, "write_file": write_file})
+        self.assertIsInstance(first, tuple)
+        self.assertEqual([d.name for d in first], ["read_file", "write_file"])
+        self.assertIsNot(first, second) # Different docstring -> different list
+        self.assertIs(first[1], second[1])
+        self.assertEqual(second[0].description, DEFAULT_DESCRIPTION)
+        self.assertIs(self.registry.tools({"read_file": read_file, "write_file": write_file}), first)
+
+    def test_derived_values_are_memoized(self):
+        tools = self.registry.tools({"read_file": read_file})
+        self.assertIs(self.registry.as_tool(tools), self.registry.as_tool(tools))
+        self.assertIn('"name": "read_file"', self.registry.fingerprint(tools))
+        self.assertEqual(self.registry.fingerprint(list(tools)), self.registry.fingerprint(tools))
+
+class TestClientRegistry(unittest.TestCase):
+    def test_one_client_per_key(self):
+        registry = ClientRegistry(factory=lambda key: MagicMock(key=key))
+        self.assertIs(registry.get("a"), registry.get("a"))
+        self.assertIsNot(registry.get("a"), registry.get("b"))
+        self.assertEqual(len(registry), 2)
+        client = registry.get("a")
+        registry.close()
+        client.close.assert_called_once()
+        self.assertEqual(len(registry), 0)
+
+    def test_one_prompt_cache_per_key(self):
+        registry = ClientRegistry(factory=lambda key: MagicMock(key=key))
+        cache = registry.prompt_cache("a")
+        self.assertIs(registry.prompt_cache("a"), cache)
+        self.assertIs(cache.client, registry.get("a"))
+        self.assertIsNot(registry.prompt_cache("b"), cache)
+        cache._entries[("m", "h")] = ["cachedContents/1", 0]
+        client = registry.get("a")
+        registry.close()
+        client.caches.delete.assert_called_once_with(name="cachedContents/1")
+
+class TestPoolSetup(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.pool = AIPool(Sandbox(os.path.join(self.test_dir, "project")), MagicMock(prompt_input=""), "key", {"name": "demo", "desc": "demo app"})
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_agents_share_client_and_tools(self):
+        self.pool.setup_default_pool()
+        self.pool.request_specialist(role_name="DBA", role_description="Database expert")
+        agents = self.pool._all_agents()
+        self.assertEqual(len({id(a.client) for a in agents}), 1)
+        self.assertIs(agents[0].client, CLIENTS.get("key"))
+        self.assertEqual(len({id(a.prompt_cache) for a in agents}), 1)
+        self.assertEqual(len({id(a.tools) for a in agents}), 1)
+        names = [d.name for d in agents[0].tools]
+        self.assertEqual(names[-3:], ["report_status", "request_specialist", "get_full_diff"])
+        self.assertIn("update_todo_list", names)
+        agents[-1].tool_map["update_todo_list"]("1. ship it")
+        self.assertEqual(self.pool.blackboard.get("TODO_LIST")[0], "1. ship it")
+
+if __name__ == '__main__':
+    unittest.main()
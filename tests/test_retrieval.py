@@ -0,0 +1,97 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock
+from stratos.core.retrieval import ChunkIndex, chunk_lines, tokenize
+from stratos.core.blobstore import BlobStore
+from stratos.core.pool import Blackboard
+from stratos.core.sandbox import Sandbox
+
+class TestChunkIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ChunkIndex(chunk_lines=10)
+
+    def test_tokenize_splits_identifiers(self):
+        self.assertEqual(tokenize("parseConfig(the load_user)"), ["parseconfig", "parse", "config", "load_user", "load", "user"])
+
+    def test_chunks_cut_at_definitions(self):
+        lines = ["x = 1"] * 7 + ["def f():"] + ["    pass"] * 10
+        self.assertEqual(chunk_lines(lines, 10), [(0, 7), (7, 17), (17, 18)])
+
+    def test_ranking_and_incremental_update(self):
+        self.index.update("billing.py", "def charge_invoice(invoice):\n    return invoice.total\n")
+        self.index.update("auth.py", "def login(user, password):\n    return check_password(user, password)\n")
+        self.index.update("notes.md", "The invoice page shows totals.\n")
+        self.assertEqual(self.index.search("charge the invoice", k=1)[0][1].path, "billing.py")
+        self.index.update("billing.py", "def refund(payment):\n    pass\n")
+        self.assertEqual([c.path for _, c in self.index.search("invoice")], ["notes.md"])
+        self.index.remove("auth.py")
+        self.assertEqual(self.index.search("password"), [])
+        self.assertNotIn("password", self.index.postings)
+
+    def test_sync_from_snapshot(self):
+        blobs = BlobStore()
+        snapshot = {"a.py": blobs.put("def alpha(): pass\n"), "b.py": blobs.put("def beta(): pass\n")}
+        self.assertEqual(self.index.sync(snapshot, blobs), 2)
+        self.assertEqual(self.index.sync(snapshot, blobs), 0) # Unchanged digests are skipped
+        del snapshot["b.py"]
+        self.assertEqual(self.index.sync(snapshot, blobs), 1)
+        self.assertEqual(self.index.search("beta"), [])
+
+    def test_per_file_cap(self):
+        self.index.update("big.py", "\n".join(f"token_{i} = 'parser'" for i in range(100)))
+        self.index.update("small.py", "parser = None\n")
+        paths = [c.path for _, c in self.index.search("parser", k=5)]
+        self.assertEqual(paths.count("big.py"), 2)
+        self.assertIn("small.py", paths)
+
+class TestRetrievalContext(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.sandbox.write_file("app/payments.py", "def refund_order(order):\n    return order.amount\n")
+        self.sandbox.write_file("app/users.py", "def create_user(name):\n    return name\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_retrieve(self):
+        text = self.sandbox.retrieve("Fix refund_order rounding", k=1)
+        self.assertTrue(text.startswith(f"--- {os.path.join('app', 'payments.py')}:1-2"))
+        self.assertIn("    1| def refund_order(order):", text)
+        self.sandbox.write_file("app/users.py", "def refund_user(name):\n    pass\n")
+        self.assertIn("refund_user", self.sandbox.retrieve("refund", k=2)) # Picks up new writes
+
+    def test_concurrent_retrieves_serialize_syncs(self):
+        sync, active, overlaps = self.sandbox.chunk_index.sync, [], []
+        def tracked_sync(snapshot, blobs):
+            active.append(1)
+            if len(active) > 1: overlaps.append(len(active))
+            time.sleep(0.02)
+            try: return sync(snapshot, blobs)
+            finally: active.pop()
+        self.sandbox.chunk_index.sync = tracked_sync
+        def work(n):
+            self.sandbox.write_file(f"app/mod{n}.py", f"def handler_{n}():\n    pass\n")
+            self.sandbox.retrieve(f"handler_{n}", k=1)
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(overlaps, [])
+        self.assertIn("handler_5", self.sandbox.retrieve("handler_5", k=1))
+        self.assertEqual(self.sandbox.chunk_index.digests, self.sandbox.get_snapshot())
+
+    def test_context_section(self):
+        board = Blackboard(self.sandbox, MagicMock())
+        board.post("TODO_LIST", "1. create_user validation")
+        context = board.get_all_context(task="Implement the TODO")
+        self.assertIn("RELEVANT_CODE", context)
+        self.assertIn("def create_user(name):", context)
+        board.retrieval_k = 0
+        self.assertNotIn("RELEVANT_CODE", board.get_all_context(task="Implement the TODO"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from google.genai import types
+from stratos.core import agent as agent_module
+from stratos.core.agent import AIAgent
+from stratos.core.clients import ClientRegistry
+from stratos.core.runtime import AsyncRuntime
+from stratos.core.sandbox import Sandbox
+
+class SlowModels:
+    """Streams one reply after a delay; the first turn asks for a file read."""
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def generate_content_stream(self, model, contents, config):
+        return self._stream(len(contents))
+
+    async def _stream(self, n):
+        await asyncio.sleep(self.delay)
+        part = types.Part(function_call=types.FunctionCall(name="file_info", args={"path": "a.py"})) if n == 1 else types.Part(text="done")
+        yield SimpleNamespace(usage_metadata=None, candidates=[SimpleNamespace(content=types.Content(role="model", parts=[part]))])
+
+class TestAsyncRuntime(unittest.TestCase):
+    def setUp(self):
+        self.runtime = AsyncRuntime()
+
+    def tearDown(self):
+        self.runtime.close()
+
+    def test_run_from_threads(self):
+        async def work(n):
+            await asyncio.sleep(0.05)
+            return n * 2
+        results = []
+        threads = [threading.Thread(target=lambda n=n: results.append(self.runtime.run(work(n)))) for n in range(5)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(sorted(results), [0, 2, 4, 6, 8])
+
+    def test_interrupted_wait_cancels(self):
+        cancelled = threading.Event()
+        async def forever():
+            try: await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        with self.assertRaises(FutureTimeout):
+            self.runtime.run(forever(), timeout=0.1)
+        self.assertTrue(cancelled.wait(2))
+
+    def test_run_inside_the_loop_is_refused(self):
+        async def nested():
+            self.runtime.run(asyncio.sleep(0))
+        with self.assertRaises(RuntimeError):
+            self.runtime.run(nested())
+
+class TestAsyncAgent(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        client = SimpleNamespace(aio=SimpleNamespace(models=SlowModels(0.3)))
+        registry = patch.object(agent_module, "CLIENTS", ClientRegistry(factory=lambda key: client))
+        registry.start()
+        self.addCleanup(registry.stop)
+        self.agents = []
+        for n in range(8):
+            agent = AIAgent(f"AGENT_{n}", "ENGINEER", Sandbox(self.test_dir), MagicMock(show_results=False), "key",
+                            {"name": "demo", "desc": "demo app"})
+            agent.prompt_cache.min_tokens = 10**9 # Inline prefix: no cache calls on the stub
+            agent.tool_map["file_info"] = lambda path: "12 lines"
+            self.agents.append(agent)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_agents_share_one_loop(self):
+        async def all_agents():
+            return await asyncio.gather(*(a.athink_and_act("inspect a.py") for a in self.agents))
+        started = time.monotonic()
+        self.assertEqual(asyncio.run(all_agents()), ["done"] * 8)
+        self.assertLess(time.monotonic() - started, 1.5) # 8 agents x 2 turns x 0.3s if they ran one by one
+        self.assertEqual({a.last_turns for a in self.agents}, {2})
+
+    def test_sync_facade(self):
+        self.assertEqual(self.agents[0].think_and_act("inspect a.py"), "done")
+        self.assertEqual(self.agents[0].history[2].parts[0].function_response.response, {"result": "12 lines"})
+
+if __name__ == '__main__':
+    unittest.main()
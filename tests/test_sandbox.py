@@ -55,6 +55,31 @@ class TestSandbox(unittest.TestCase):
         res = self.sandbox.read_file("chunk.txt", start_line=2, end_line=4)
         self.assertEqual(res, "2\n3\n4")
 
+    def test_read_file_open_ended_range(self):
+        with open(os.path.join(self.test_dir, "chunk.txt"), "w") as f:
+            f.write("1\n2\n3\n4\n5\n")
+        self.assertEqual(self.sandbox.read_file("chunk.txt", start_line=4), "4\n5")
+        self.assertEqual(self.sandbox.read_file("chunk.txt", end_line=2), "1\n2")
+        self.assertEqual(self.sandbox.read_file("chunk.txt", start_line=9, end_line=12), "")
+
+    def test_read_file_range_after_rewrite(self):
+        self.sandbox.write_file("grow.txt", "a\nb")
+        self.assertEqual(self.sandbox.read_file("grow.txt", start_line=2, end_line=3), "b")
+        self.sandbox.write_file("grow.txt", "a\nb\nc")
+        self.assertEqual(self.sandbox.read_file("grow.txt", start_line=2, end_line=3), "b\nc")
+
+    def test_read_file_range_with_form_feed_and_cr(self):
+        with open(os.path.join(self.test_dir, "odd.txt"), "wb") as f:
+            f.write(b"a\fb\nc\rd\ne\r\nf\n")
+        self.assertEqual(self.sandbox.read_file("odd.txt", start_line=2, end_line=3), "c\rd\ne")
+        self.assertEqual(self.sandbox.read_file("odd.txt", start_line=1, end_line=1), "a\fb")
+        self.assertEqual(self.sandbox.read_file("odd.txt", start_line=4), "f")
+
+    def test_file_info(self):
+        self.sandbox.write_file("info.txt", "x\ny\nz\n")
+        self.assertEqual(self.sandbox.file_info("info.txt"), "info.txt: 3 lines, 6 bytes")
+        self.assertIn("ERROR", self.sandbox.file_info("missing.txt"))
+
     # --- smart_replace tests ---
     def test_smart_replace_success(self):
         self.sandbox.write_file("replace.txt", "The quick brown fox")
@@ -68,6 +93,15 @@ class TestSandbox(unittest.TestCase):
         res = self.sandbox.smart_replace("replace.txt", "missing", "new")
         self.assertIn("ERROR", res)
 
+    # --- grep_search tests ---
+    def test_grep_search_format(self):
+        self.sandbox.write_file("src/app.py", "x = 1\nTODO = 2\n")
+        res = self.sandbox.grep_search("TODO")
+        self.assertEqual(res, f"{os.path.join('src', 'app.py')}:2:TODO = 2")
+
+    def test_grep_search_invalid_regex(self):
+        self.assertIn("ERROR: Invalid regex", self.sandbox.grep_search("(["))
+
     # --- safety tests ---
     def test_validate_command_safe(self):
         try:
@@ -0,0 +1,100 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from stratos.core.search_cache import SearchCache, normalize_query
+from stratos.core.sandbox import Sandbox
+
+class FakeBackend:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, query, max_results):
+        self.calls.append(query)
+        time.sleep(self.delay)
+        return [{"title": f"About {query}", "href": "https://example.com", "body": "snippet"}]
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "search.sqlite3")
+        self.cache = SearchCache(self.path, ttl=60)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_normalized_hit(self):
+        backend = FakeBackend()
+        _, cached = self.cache.get_or_fetch("Python  asyncio?", backend)
+        self.assertFalse(cached)
+        results, cached = self.cache.get_or_fetch("python asyncio", backend)
+        self.assertTrue(cached)
+        self.assertEqual(results[0]["title"], "About Python  asyncio?")
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(normalize_query("  Foo BAR. "), "foo bar")
+
+    def test_ttl_expiry(self):
+        backend = FakeBackend()
+        cache = SearchCache(self.path, ttl=0)
+        cache.get_or_fetch("q", backend)
+        cache.get_or_fetch("q", backend)
+        self.assertEqual(len(backend.calls), 2)
+        self.assertEqual(cache.purge_expired(), 1)
+        cache.close()
+
+    def test_persists_across_instances(self):
+        self.cache.get_or_fetch("q", FakeBackend())
+        other = SearchCache(self.path, ttl=60)
+        self.assertIsNotNone(other.get("Q"))
+        other.close()
+
+    def test_coalescing(self):
+        backend = FakeBackend(delay=0.3)
+        out = []
+        threads = [threading.Thread(target=lambda: out.append(self.cache.get_or_fetch("same", backend))) for _ in range(5)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(len(out), 5)
+        self.assertEqual(self.cache.stats()["coalesced"], 4)
+
+    def test_errors_and_empty_not_cached(self):
+        def failing(query, max_results): raise RuntimeError("rate limited")
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_fetch("q", failing)
+        self.cache.get_or_fetch("q", lambda q, n: [])
+        self.assertIsNone(self.cache.get("q"))
+
+    def test_stats_and_clear(self):
+        backend = FakeBackend()
+        self.cache.get_or_fetch("a", backend)
+        self.cache.get_or_fetch("a", backend)
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+class TestSandboxSearch(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.sandbox.search_backend = self.backend = FakeBackend()
+        self.sandbox.enable_search_cache(os.path.join(self.test_dir, "search.sqlite3"))
+
+    def tearDown(self):
+        self.sandbox.search_cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_search_web_uses_cache(self):
+        first = self.sandbox.search_web("flask tutorial")
+        second = self.sandbox.search_web("Flask Tutorial")
+        self.assertIn("Title: About flask tutorial", first)
+        self.assertEqual(first.splitlines()[1:], second.splitlines()[1:])
+        self.assertEqual(self.backend.calls, ["flask tutorial"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+import tempfile
+from stratos.core.shell import ShellPool
+from stratos.core.sandbox import Sandbox
+
+class TestShellPool(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        self.pool = ShellPool(self.test_dir, size=1)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_state_persists(self):
+        self.assertEqual(self.pool.run("export FOO=bar; mkdir sub; cd sub").returncode, 0)
+        result = self.pool.run("echo $FOO; pwd")
+        self.assertEqual(result.stdout, f"bar\n{os.path.join(self.test_dir, 'sub')}\n")
+        self.assertEqual(result.cwd, os.path.join(self.test_dir, "sub"))
+
+    def test_exit_code_and_streams(self):
+        result = self.pool.run("echo out; echo err >&2; false")
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+
+    def test_output_without_newline(self):
+        self.assertEqual(self.pool.run("printf abc").stdout, "abc\n")
+
+    def test_stdin_is_not_the_session(self):
+        self.assertEqual(self.pool.run("cat").returncode, 0)
+        self.assertEqual(self.pool.run("echo still").stdout, "still\n")
+
+    def test_crashed_session_restarts(self):
+        result = self.pool.run("export FOO=bar; exit 3")
+        self.assertEqual(result.returncode, 3)
+        self.assertIn("fresh shell", result.format())
+        self.assertEqual(self.pool.run("echo ${FOO:-unset}").stdout, "unset\n")
+
+    def test_timeout_restarts_session(self):
+        result = self.pool.run("sleep 30", timeout=0.5)
+        self.assertTrue(result.timed_out)
+        self.assertEqual(self.pool.run("echo ok").stdout, "ok\n")
+
+    def test_peak_rss_of_the_command(self):
+        result = self.pool.run("python3 -c 'import time; x = bytearray(64 << 20); time.sleep(0.3)'")
+        self.assertGreaterEqual(result.peak_rss_kb, 64 << 10)
+        self.assertIn("peak_rss=", result.format())
+        self.assertIsNone(self.pool.run("cd .").peak_rss_kb) # Builtins start no process
+
+    def test_leaving_sandbox_resets_cwd(self):
+        result = self.pool.run("cd /")
+        self.assertIn("reset to the project root", result.format())
+        self.assertEqual(self.pool.run("pwd").stdout, f"{self.test_dir}\n")
+
+class TestSandboxShell(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.sandbox = Sandbox(self.test_dir)
+        self.sandbox.enable_shell_sessions(size=1)
+
+    def tearDown(self):
+        self.sandbox.terminate_all()
+        shutil.rmtree(self.test_dir)
+
+    def test_execute_command_uses_session(self):
+        self.sandbox.execute_command("export GREETING=hello")
+        res = self.sandbox.execute_command("echo $GREETING")
+        self.assertIn("CODE_0", res)
+        self.assertIn("STDOUT: hello", res)
+
+    def test_isolated_commands_skip_session_state(self):
+        with open(os.path.join(self.test_dir, "notes.txt"), "w") as f: f.write("real content\n")
+        self.sandbox.execute_command("mkdir sub && cp notes.txt sub/ && cd sub && cat() { echo PWNED; } && trap 'echo PWNED' DEBUG")
+        self.assertIn("PWNED", self.sandbox.execute_command("cat notes.txt"))
+        res = self.sandbox.execute_command("cat notes.txt", isolated=True)
+        self.assertIn("STDOUT: real content", res)
+        self.assertNotIn("PWNED", res)
+        self.assertEqual(self.sandbox.command_cwd(), os.path.join(os.path.realpath(self.test_dir), "sub"))
+
+    def test_safety_checks_still_run(self):
+        self.assertIn("DANGEROUS COMMAND BLOCKED", self.sandbox.execute_command("rm -rf /"))
+
+if __name__ == "__main__":
+    unittest.main()
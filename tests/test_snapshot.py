@@ -0,0 +1,76 @@
+import unittest
+import os
+import shutil
+import tempfile
+from stratos.core.snapshot import SnapshotIndex
+
+class TestSnapshotIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.index = SnapshotIndex(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, rel, content, mode="w"):
+        path = os.path.join(self.test_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode) as f:
+            f.write(content)
+
+    def test_initial_refresh(self):
+        self._write("a.txt", "alpha")
+        self._write("src/b.py", "print('b')")
+        dirty = self.index.refresh()
+        self.assertEqual(dirty, {"a.txt", os.path.join("src", "b.py")})
+        self.assertEqual(self.index.read("a.txt"), "alpha")
+        self.assertIn(self.index.snapshot()["a.txt"], self.index.blobs)
+
+    def test_git_dir_ignored(self):
+        self._write(".git/HEAD", "ref: refs/heads/main")
+        self.index.refresh()
+        self.assertEqual(self.index.snapshot(), {})
+
+    def test_unchanged_stat_not_reread(self):
+        self._write("a.txt", "alpha")
+        self.index.refresh()
+        self.index.entries["a.txt"].racy = False
+        self.index.entries["a.txt"].digest = "cached"
+        self.assertEqual(self.index.refresh(), set())
+        self.assertEqual(self.index.snapshot()["a.txt"], "cached")
+
+    def test_changed_since(self):
+        self._write("a.txt", "alpha")
+        self._write("b.txt", "beta")
+        self.index.refresh()
+        gen = self.index.generation
+        self._write("a.txt", "alpha v2")
+        os.remove(os.path.join(self.test_dir, "b.txt"))
+        self._write("c.txt", "gamma")
+        self.index.refresh()
+        self.assertEqual(self.index.changed_since(gen), {"a.txt", "b.txt", "c.txt"})
+        self.assertEqual(self.index.changed_since(self.index.generation), set())
+
+    def test_touch_without_change_is_clean(self):
+        self._write("a.txt", "alpha")
+        self.index.refresh()
+        gen = self.index.generation
+        self._write("a.txt", "alpha")
+        self.assertEqual(self.index.refresh(), set())
+        self.assertEqual(self.index.generation, gen)
+
+    def test_binary_file_excluded_from_contents(self):
+        self._write("img.bin", b"\xff\xfe\x00\x01", mode="wb")
+        self.assertEqual(self.index.refresh(), {"img.bin"})
+        self.assertNotIn("img.bin", self.index.snapshot())
+
+    def test_identical_contents_deduplicated(self):
+        self._write("a.txt", "same")
+        self._write("b.txt", "same")
+        self.index.refresh()
+        snap = self.index.snapshot()
+        self.assertEqual(snap["a.txt"], snap["b.txt"])
+        self.assertEqual(len(self.index.blobs), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from stratos.core.trigram import TrigramIndex, required_trigrams
+from stratos.core.sandbox import Sandbox
+
+class TestRequiredTrigrams(unittest.TestCase):
+    def test_literal(self):
+        alts = required_trigrams("hello")
+        self.assertEqual(len(alts), 1)
+        self.assertIn(b"\0ell", alts[0])
+
+    def test_unconstrained_patterns(self):
+        self.assertIsNone(required_trigrams(r"\w+"))
+        self.assertIsNone(required_trigrams("ab"))
+        self.assertIsNone(required_trigrams("foo|.*"))
+
+    def test_branches_and_repeats(self):
+        alts = required_trigrams("alpha|beta")
+        self.assertEqual(len(alts), 2)
+        self.assertIn(b"\0alp", required_trigrams(r"(alpha)+\d")[0])
+        self.assertIsNone(required_trigrams("(alpha)*"))
+
+    def test_case_folded(self):
+        self.assertIn(b"\0foo", required_trigrams("(?i)FOO")[0])
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name, content in {"a.py": "def parse_config(): pass", "b.py": "import os", "c.md": "Parse notes"}.items():
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(content)
+        self.files = ["a.py", "b.py", "c.md"]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_candidates(self):
+        index = TrigramIndex()
+        index.update(self.test_dir, self.files)
+        self.assertEqual(index.candidates("parse_config", self.files), ["a.py"])
+        self.assertEqual(index.candidates("(?i)parse", self.files), ["a.py", "c.md"])
+        self.assertEqual(index.candidates(r"\d+", self.files), self.files)
+
+    def test_incremental_update_and_persistence(self):
+        path = os.path.join(self.test_dir, "index.json")
+        index = TrigramIndex(path)
+        self.assertEqual(index.update(self.test_dir, self.files), 3)
+        index.save()
+        reloaded = TrigramIndex(path)
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded.candidates("import os", self.files), ["b.py"])
+        reloaded.mark_dirty("b.py")
+        self.assertEqual(reloaded.update(self.test_dir, self.files[:2]), 2) # b.py re-indexed, c.md dropped
+
+    def test_sandbox_write_hook(self):
+        sandbox = Sandbox(self.test_dir)
+        self.assertIn("a.py", sandbox.grep_search("parse_config"))
+        sandbox.write_file("b.py", "x = parse_config()")
+        self.assertIn("b.py:1:", sandbox.grep_search("parse_config"))
+
+    def test_concurrent_searches_and_saves(self):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        sandbox = Sandbox(self.test_dir)
+        sandbox.enable_search_index(os.path.join(cache, "index.json"))
+        sandbox.start_watcher()
+        errors = []
+        def search(n):
+            try:
+                for i in range(10):
+                    sandbox.write_file(f"gen_{n}_{i}.py", f"value_{n} = {i}")
+                    self.assertIn(f"gen_{n}_{i}.py", sandbox.grep_search(f"value_{n} = {i}"))
+                    sandbox.get_structure_tree()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=search, args=(n,)) for n in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        sandbox.stop_watcher()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(cache), ["index.json"]) # No temp file left behind
+        self.assertEqual(len(TrigramIndex(os.path.join(cache, "index.json"))), len(sandbox.search_index))
+
+if __name__ == "__main__":
+    unittest.main()
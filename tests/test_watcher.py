@@ -0,0 +1,138 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from stratos.core.sandbox import Sandbox
+from stratos.core.snapshot import SnapshotIndex
+from stratos.core.watcher import ChangeSet, InotifyWatcher, PollingWatcher
+
+class WatcherContract:
+    """Behaviour shared by every watcher backend."""
+
+    def make_watcher(self, root, **kwargs):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.watcher = self.make_watcher(self.test_dir)
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, rel, content="x"):
+        path = os.path.join(self.test_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_created_modified_deleted(self):
+        self._write("keep.txt")
+        self._write("gone.txt")
+        self.watcher.drain()
+        self._write("new.txt")
+        self._write("keep.txt", "changed")
+        os.remove(os.path.join(self.test_dir, "gone.txt"))
+        changes = self.watcher.drain()
+        self.assertIn("new.txt", changes.created)
+        self.assertIn("keep.txt", changes.modified)
+        self.assertIn("gone.txt", changes.deleted)
+        self.assertFalse(self.watcher.drain())
+
+    def test_files_in_new_directory(self):
+        self._write("src/deep/app.py")
+        changes = self.watcher.drain()
+        self.assertIn(os.path.join("src", "deep", "app.py"), changes.created)
+
+    def test_git_dir_ignored(self):
+        self._write(".git/objects/ab")
+        changes = self.watcher.drain()
+        self.assertFalse(any(p.startswith(".git") for p in changes.paths))
+
+    def test_burst_coalesced(self):
+        watcher = self.make_watcher(self.test_dir, bulk_threshold=5)
+        try:
+            for i in range(20):
+                self._write(f"node_modules/pkg{i}.js")
+            self._write("main.js")
+            changes = watcher.drain()
+            self.assertIn("node_modules", changes.bulk)
+            self.assertIn("main.js", changes.created)
+            self.assertFalse(any(p.startswith("node_modules" + os.sep) for p in changes.paths))
+        finally:
+            watcher.stop()
+
+class TestPollingWatcher(WatcherContract, unittest.TestCase):
+    def make_watcher(self, root, **kwargs):
+        return PollingWatcher(root, **kwargs)
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestInotifyWatcher(WatcherContract, unittest.TestCase):
+    def make_watcher(self, root, **kwargs):
+        watcher = InotifyWatcher(root, **kwargs)
+        watcher.start()
+        return watcher
+
+    def test_refused_watch_forces_rescans(self):
+        self.watcher.stop()
+        os.makedirs(os.path.join(self.test_dir, "blocked"))
+        watcher = InotifyWatcher(self.test_dir)
+        add_watch, refuse = watcher._add_watch, [True]
+        watcher._add_watch = lambda fd, path, mask: -1 if refuse[0] and path.endswith(b"blocked") else add_watch(fd, path, mask)
+        watcher._unwatch_tree("blocked")
+        watcher._watch_tree("blocked", report=False) # As if max_user_watches was hit
+        self.assertIn("cannot watch 'blocked'", watcher.take_warning())
+        self.assertIsNone(watcher.take_warning())
+        self._write("blocked/app.py")
+        self.assertTrue(watcher.drain().overflow)
+        self.assertTrue(watcher.drain().overflow) # Still unwatched: every drain rescans
+        refuse[0] = False
+        self.assertTrue(watcher.drain().overflow) # The retry succeeded during this drain
+        self._write("blocked/app.py", "changed")
+        changes = watcher.drain()
+        self.assertFalse(changes.overflow)
+        self.assertIn(os.path.join("blocked", "app.py"), changes.modified)
+        watcher.stop()
+
+class TestIncrementalRefresh(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_refresh_with_changeset(self):
+        index = SnapshotIndex(self.test_dir)
+        for name in ("a.txt", "b.txt"):
+            with open(os.path.join(self.test_dir, name), "w") as f: f.write(name)
+        index.refresh()
+        with open(os.path.join(self.test_dir, "a.txt"), "w") as f: f.write("changed")
+        with open(os.path.join(self.test_dir, "b.txt"), "w") as f: f.write("changed too")
+        # Only the reported path is looked at
+        dirty = index.refresh(ChangeSet(modified={"a.txt"}))
+        self.assertEqual(dirty, {"a.txt"})
+
+    def test_deleted_directory_drops_entries(self):
+        index = SnapshotIndex(self.test_dir)
+        os.makedirs(os.path.join(self.test_dir, "pkg"))
+        with open(os.path.join(self.test_dir, "pkg", "m.py"), "w") as f: f.write("m")
+        index.refresh()
+        shutil.rmtree(os.path.join(self.test_dir, "pkg"))
+        dirty = index.refresh(ChangeSet(deleted={"pkg"}))
+        self.assertEqual(dirty, {os.path.join("pkg", "m.py")})
+
+    def test_sandbox_tree_cache_invalidated(self):
+        sandbox = Sandbox(self.test_dir)
+        sandbox.start_watcher()
+        try:
+            sandbox.write_file("one.txt", "1")
+            self.assertIn("one.txt", sandbox.get_structure_tree())
+            sandbox.write_file("two.txt", "2")
+            self.assertIn("two.txt", sandbox.get_structure_tree())
+            self.assertIn("two.txt", sandbox.get_snapshot())
+        finally:
+            sandbox.stop_watcher()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from stratos.core.webclient import WebClient, WebCache, html_to_markdown
+from stratos.core.sandbox import Sandbox
+
+PAGE = (b"<html><head><title>Docs</title><style>body{}</style></head><body>"
+        b"<nav>menu</nav><h2>Install</h2><p>Run <code>pip install x</code> then see "
+        b"<a href='/guide'>the guide</a>.</p><ul><li>one</li><li>two</li></ul>"
+        b"<script>alert(1)</script></body></html>")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers: self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.ports.add(self.client_address[1])
+        if self.path == "/page":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304, headers=[("ETag", '"v1"')])
+            return self._send(200, PAGE, [("Content-Type", "text/html; charset=utf-8"), ("ETag", '"v1"')])
+        if self.path == "/redirect":
+            return self._send(302, headers=[("Location", "/page")])
+        if self.path == "/gzip":
+            return self._send(200, gzip.compress(b"hello " * 100), [("Content-Type", "text/plain"), ("Content-Encoding", "gzip")])
+        if self.path == "/slow": # Headers, part of the body, then a stall
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            self.wfile.write(b"x" * 10)
+            self.wfile.flush()
+            time.sleep(1)
+            return
+        if self.path == "/big":
+            return self._send(200, b"x" * 100000, [("Content-Type", "text/plain")])
+        self._send(404, b"missing", [("Content-Type", "text/plain")])
+
+class TestWebClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.requests, self.server.ports = [], set()
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cache_dir = tempfile.mkdtemp()
+        self.client = WebClient(self.cache_dir)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_keep_alive_reuses_connection(self):
+        for _ in range(3):
+            self.assertEqual(self.client.fetch(f"{self.base}/gzip").status, 200)
+        self.assertEqual(len(self.server.ports), 1)
+        self.assertEqual(self.client.pool.created, 1)
+
+    def test_etag_revalidation(self):
+        first = self.client.fetch(f"{self.base}/page")
+        self.assertFalse(first.from_cache)
+        second = WebClient(self.cache_dir).fetch(f"{self.base}/page")
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.body, PAGE)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_redirect_and_gzip(self):
+        self.assertEqual(self.client.fetch(f"{self.base}/redirect").url, f"{self.base}/page")
+        self.assertEqual(self.client.fetch(f"{self.base}/gzip").body, b"hello " * 100)
+
+    def test_size_cap(self):
+        client = WebClient(max_size=1000)
+        resp = client.fetch(f"{self.base}/big")
+        client.close()
+        self.assertTrue(resp.truncated)
+        self.assertEqual(len(resp.body), 1000)
+
+    def test_failed_read_drops_connection(self):
+        client = WebClient(timeout=0.3)
+        conns, get = [], client.pool.get
+        client.pool.get = lambda *a: conns.append(get(*a)) or conns[-1]
+        with self.assertRaises(OSError):
+            client.fetch(f"{self.base}/slow")
+        self.assertIsNone(conns[0][1].sock) # Closed, not left half-read
+        self.assertEqual(client.fetch(f"{self.base}/gzip").status, 200)
+        self.assertEqual(client.pool.created, 2) # The half-read connection was not reused
+        client.close()
+
+    def test_concurrent_cache_puts(self):
+        cache = WebCache(self.cache_dir)
+        def put(n):
+            for _ in range(20):
+                cache.put("http://x/page", {"etag": f'"v{n}"'}, f"body {n}".encode() * 1000)
+        threads = [threading.Thread(target=put, args=(n,)) for n in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        meta, body = cache.get("http://x/page")
+        n = meta["headers"]["etag"].strip('"v')
+        self.assertEqual(body, f"body {n}".encode() * 1000)
+        leftovers = [f for _, _, files in os.walk(self.cache_dir) for f in files if f.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_rejects_other_schemes(self):
+        with self.assertRaises(ValueError):
+            self.client.fetch("file:///etc/passwd")
+
+    def test_web_fetch_format(self):
+        sandbox = Sandbox(self.cache_dir)
+        res = sandbox.web_fetch(f"{self.base}/page")
+        self.assertIn("STATUS: 200", res)
+        self.assertIn("## Install", res)
+        self.assertNotIn("<script>", res)
+        self.assertIn("STATUS: 404", sandbox.web_fetch(f"{self.base}/nope"))
+        self.assertTrue(sandbox.web_fetch("ftp://x").startswith("ERROR"))
+
+class TestHtmlToMarkdown(unittest.TestCase):
+    def test_extraction(self):
+        text = html_to_markdown(PAGE.decode())
+        self.assertTrue(text.startswith("# Docs"))
+        self.assertIn("## Install", text)
+        self.assertIn("`pip install x`", text)
+        self.assertIn("[the guide](/guide)", text)
+        self.assertIn("- one\n- two", text)
+        for noise in ("alert", "menu", "body{}"):
+            self.assertNotIn(noise, text)
+
+if __name__ == "__main__":
+    unittest.main()